@@ -2,3 +2,5 @@
 
 from .results import compute_avgs
 from .corrs import *
+from .resampling import run_resamples
+from .corr_results import CorrResults, correct_pvals
@@ -0,0 +1,296 @@
+"""Array-backed container for pairwise correlation results."""
+
+import numpy as np
+
+from apm.io.utils import check_folder
+from apm.io.store import ResultsStore, save_results
+
+###################################################################################################
+###################################################################################################
+
+class CorrResults():
+    """Pairwise correlation results between a set of measures, stored as arrays.
+
+    Parameters
+    ----------
+    labels : list of str
+        Labels of the measures.
+    r_vals : 2d array
+        Correlation values, as [n_measures, n_measures].
+    p_vals : 2d array
+        P-values, as [n_measures, n_measures].
+    cis : 3d array
+        Confidence intervals, as [2, n_measures, n_measures].
+
+    Notes
+    -----
+    Results can be accessed in the same way as nested dictionaries of correlation results,
+    as `corrs[m1][m2]`, which returns a tuple of (r_val, p_val, (ci_low, ci_high)).
+    As in the dictionary form, a measure is not included in its own results, and the
+    diagonal of each array is NaN. This is also used for differences between correlations.
+    The input arrays are copied, such that they are not changed by setting the diagonal.
+    """
+
+    def __init__(self, labels, r_vals, p_vals, cis):
+        """Initialize CorrResults object."""
+
+        self.labels = list(labels)
+        self.r_vals = np.array(r_vals, dtype=float, copy=True)
+        self.p_vals = np.array(p_vals, dtype=float, copy=True)
+        self.cis = np.array(cis, dtype=float, copy=True)
+
+        self._inds = {label : ind for ind, label in enumerate(self.labels)}
+
+        diag = np.diag_indices(len(self.labels))
+        self.r_vals[diag], self.p_vals[diag] = np.nan, np.nan
+        self.cis[(slice(None),) + diag] = np.nan
+
+
+    def __getitem__(self, label):
+        """Get the results for a measure, as a row that can be indexed by measure label."""
+
+        return CorrRow(self, self._inds[label])
+
+
+    def __contains__(self, label):
+        """Check if a measure is in the results."""
+
+        return label in self._inds
+
+
+    def __iter__(self):
+        """Iterate across measure labels."""
+
+        return iter(self.labels)
+
+
+    def __len__(self):
+        """Define length as the number of measures."""
+
+        return len(self.labels)
+
+
+    def keys(self):
+        """Labels of the measures."""
+
+        return list(self.labels)
+
+
+    def values(self):
+        """Results rows for each measure."""
+
+        return [self[label] for label in self.labels]
+
+
+    def items(self):
+        """Labels and results rows for each measure."""
+
+        return [(label, self[label]) for label in self.labels]
+
+
+    def get(self, label, default=None):
+        """Get the results for a measure, or a default value if it is not available."""
+
+        return self[label] if label in self else default
+
+
+    def get_result(self, label1, label2):
+        """Get the result between two measures, as (r_val, p_val, (ci_low, ci_high))."""
+
+        ind1, ind2 = self._inds[label1], self._inds[label2]
+
+        return (self.r_vals[ind1, ind2], self.p_vals[ind1, ind2],
+                (self.cis[0, ind1, ind2], self.cis[1, ind1, ind2]))
+
+
+    def select(self, labels):
+        """Select a subset of measures, returning a new object.
+
+        Parameters
+        ----------
+        labels : list of str
+            Labels of the measures to select.
+
+        Returns
+        -------
+        CorrResults
+            Results for the selected measures.
+        """
+
+        inds = np.array([self._inds[label] for label in labels], dtype=int)
+        grid = np.ix_(inds, inds)
+
+        return CorrResults(labels, self.r_vals[grid], self.p_vals[grid],
+                           self.cis[(slice(None),) + grid])
+
+
+    def correct_pvals(self, method='fdr_bh'):
+        """Correct p-values for multiple comparisons, returning a new object.
+
+        Parameters
+        ----------
+        method : {'fdr_bh', 'bonferroni', 'holm'}
+            Correction method.
+
+        Returns
+        -------
+        CorrResults
+            Results with corrected p-values.
+
+        Notes
+        -----
+        Each pair of measures is counted once in the correction, using the upper triangle,
+        with the corrected values mirrored into the full matrix.
+        """
+
+        rows, cols = np.triu_indices(len(self.labels), k=1)
+        p_vals = np.full(self.p_vals.shape, np.nan)
+        corrected = correct_pvals(self.p_vals[rows, cols], method)
+        p_vals[rows, cols], p_vals[cols, rows] = corrected, corrected
+
+        return CorrResults(self.labels, self.r_vals, p_vals, self.cis)
+
+
+    def save(self, f_name, save_path, compress=False):
+        """Save the results through the results I/O, as a results store.
+
+        Parameters
+        ----------
+        f_name : str
+            Name of the results store.
+        save_path : str or Path
+            Path to the folder to save the results store in.
+        compress : bool, optional, default: False
+            Whether to save with compression.
+        """
+
+        save_results({'r_vals' : self.r_vals, 'p_vals' : self.p_vals, 'cis' : self.cis},
+                     f_name, save_path, compress=compress, metadata={'labels' : self.labels})
+
+
+    @classmethod
+    def load(cls, f_name, save_path):
+        """Load results that were saved with `save`.
+
+        Parameters
+        ----------
+        f_name : str
+            Name of the results store.
+        save_path : str or Path
+            Path to the folder the results store is saved in.
+
+        Returns
+        -------
+        CorrResults
+            Loaded results.
+        """
+
+        store = ResultsStore(check_folder(f_name, save_path))
+        arrays = store.load()
+
+        return cls(store.metadata['labels'], arrays['r_vals'], arrays['p_vals'], arrays['cis'])
+
+
+class CorrRow():
+    """Results for one measure, to all other measures, within a CorrResults object."""
+
+    def __init__(self, corrs, ind):
+        """Initialize CorrRow object."""
+
+        self._corrs = corrs
+        self._ind = ind
+        self.label = corrs.labels[ind]
+
+
+    def __getitem__(self, label):
+        """Get the result between the measure of this row and another measure."""
+
+        if label == self.label:
+            raise KeyError(label)
+
+        return self._corrs.get_result(self.label, label)
+
+
+    def __contains__(self, label):
+        """Check if a measure is in the row."""
+
+        return label != self.label and label in self._corrs
+
+
+    def __iter__(self):
+        """Iterate across the labels of the other measures."""
+
+        return iter(self.keys())
+
+
+    def __len__(self):
+        """Define length as the number of other measures."""
+
+        return len(self._corrs) - 1
+
+
+    def keys(self):
+        """Labels of the other measures."""
+
+        return [label for label in self._corrs.labels if label != self.label]
+
+
+    def values(self):
+        """Results to each of the other measures."""
+
+        return [self[label] for label in self.keys()]
+
+
+    def items(self):
+        """Labels and results for each of the other measures."""
+
+        return [(label, self[label]) for label in self.keys()]
+
+
+    def get(self, label, default=None):
+        """Get the result to another measure, or a default value if it is not available."""
+
+        return self[label] if label in self else default
+
+###################################################################################################
+###################################################################################################
+
+def correct_pvals(p_vals, method='fdr_bh'):
+    """Correct a set of p-values for multiple comparisons.
+
+    Parameters
+    ----------
+    p_vals : 1d array
+        P-values. NaN values are ignored, and not counted as comparisons.
+    method : {'fdr_bh', 'bonferroni', 'holm'}
+        Correction method.
+
+    Returns
+    -------
+    corrected : 1d array
+        Corrected p-values.
+    """
+
+    p_vals = np.asarray(p_vals, dtype=float)
+    corrected = np.full(p_vals.shape, np.nan)
+
+    valid = ~np.isnan(p_vals)
+    n_comps = int(valid.sum())
+    order = np.argsort(p_vals[valid])
+    sorted_pvals = p_vals[valid][order]
+
+    if method == 'bonferroni':
+        sorted_corr = sorted_pvals * n_comps
+    elif method == 'holm':
+        sorted_corr = np.maximum.accumulate(sorted_pvals * (n_comps - np.arange(n_comps)))
+    elif method == 'fdr_bh':
+        sorted_corr = sorted_pvals * n_comps / np.arange(1, n_comps + 1)
+        sorted_corr = np.minimum.accumulate(sorted_corr[::-1])[::-1]
+    else:
+        raise ValueError('Correction method not understood.')
+
+    valid_corr = np.zeros(n_comps)
+    valid_corr[order] = np.minimum(sorted_corr, 1.)
+    corrected[valid] = valid_corr
+
+    return corrected
@@ -1,18 +1,22 @@
 """Compute and compare correlations between measures."""
 
 from itertools import product
+from functools import partial
 
 import numpy as np
-from sklearn import linear_model
+from scipy.stats import rankdata, t as t_dist
 
-from bootstrap import bootstrap_corr, bootstrap_diff
+from bootstrap import bootstrap_corr
 
 from apm.utils.data import select_vals
+from apm.analysis.corr_results import CorrResults
+from apm.analysis.resampling import run_resamples
 
 ###################################################################################################
 ###################################################################################################
 
-def compute_all_corrs(results, select=None, corr_func=bootstrap_corr):
+def compute_all_corrs(results, select=None, corr_func=None, n_bootstraps=1000, ci_pc=95,
+                      rng=None, early_stop=False, n_jobs=1):
     """Compute correlations across all sets of measures.
 
     Parameters
@@ -23,16 +27,51 @@ def compute_all_corrs(results, select=None, corr_func=bootstrap_corr):
         Each set of values should be an array of measure results.
     select : 1d array of bool, optional
         A set of results to select for each measure to compute the correlation from.
+    corr_func : callable, optional
+        Function to compute the correlation results for each pair of measures, separately.
+        If not provided, bootstrapped Spearman correlations are computed for all pairs
+        together, with `bootstrap_corr_matrix`.
+    n_bootstraps : int, optional, default: 1000
+        Number of bootstrap samples. Only used if `corr_func` is not provided.
+    ci_pc : float, optional, default: 95
+        Percentage of the confidence interval. Only used if `corr_func` is not provided.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+    early_stop : bool, optional, default: False
+        Whether to stop bootstrapping each pair once its decision is resolved, such that
+        compute is spent on borderline pairs. Only used if `corr_func` is not provided.
+    n_jobs : int, optional, default: 1
+        Number of jobs to run bootstrap blocks across in parallel.
+        Only used if `corr_func` is not provided.
 
     Returns
     -------
-    all_corrs : dict
+    all_corrs : CorrResults or dict
         Correlation results.
         Each key is a measure name.
         Each value is another dictionary, with names & correlation results of all other measures.
+        If `corr_func` is not provided, this is a CorrResults object, which supports the same
+        access, with each correlation result as a tuple of (r_val, p_val, (ci_low, ci_high)).
+
+    Notes
+    -----
+    By default, results are computed with `bootstrap_corr_matrix`, rather than with
+    `bootstrap_corr` per pair, and are returned as a CorrResults object, rather than a
+    dictionary. Correlation values and p-values match `scipy.stats.spearmanr`, and confidence
+    intervals are percentile intervals across bootstrap samples, covering `ci_pc` percent.
+    Measures with any NaN values in the selected results have NaN results, as with the
+    default 'propagate' NaN policy of `spearmanr`.
+    To compute results per pair, as a dictionary, pass `corr_func=bootstrap_corr`.
     """
 
     methods = results.keys()
+
+    if corr_func is None:
+        data = np.array(select_vals(select, *results.values())).T
+        return CorrResults(methods, *bootstrap_corr_matrix(data, n_bootstraps, ci_pc, rng=rng,
+                                                           early_stop=early_stop,
+                                                           n_jobs=n_jobs))
+
     all_corrs = {method : {} for method in methods}
 
     for m1, m2 in product(methods, methods):
@@ -85,7 +124,8 @@ def compute_corrs_to_feature(results, feature, select=None, corr_func=bootstrap_
     return all_corrs
 
 
-def compute_diffs_to_feature(results, feature, select=None, diff_func=bootstrap_diff):
+def compute_diffs_to_feature(results, feature, select=None, diff_func=None, n_bootstraps=1000,
+                             ci_pc=95, rng=None, early_stop=False, n_jobs=1):
     """Compute differences between correlations of a set of measures to a given feature.
 
     Parameters
@@ -99,16 +139,50 @@ def compute_diffs_to_feature(results, feature, select=None, diff_func=bootstrap_
         Should have the same length as each entry in `results`.
     select : 1d array of bool, optional
         A set of results to select for each measure to compute the correlation from.
+    diff_func : callable, optional
+        Function to compute the difference results for each pair of measures, separately.
+        If not provided, bootstrapped differences of Spearman correlations are computed for
+        all pairs together, with `bootstrap_diff_matrix`.
+    n_bootstraps : int, optional, default: 1000
+        Number of bootstrap samples. Only used if `diff_func` is not provided.
+    ci_pc : float, optional, default: 95
+        Percentage of the confidence interval. Only used if `diff_func` is not provided.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+    early_stop : bool, optional, default: False
+        Whether to stop bootstrapping each pair once its decision is resolved, such that
+        compute is spent on borderline pairs. Only used if `diff_func` is not provided.
+    n_jobs : int, optional, default: 1
+        Number of jobs to run bootstrap blocks across in parallel.
+        Only used if `diff_func` is not provided.
 
     Results
     -------
-    all_diffs : dict
+    all_diffs : CorrResults or dict
         Difference results.
         Each key is a measure name.
         Each value is another dictionary, with names & correlation results of all other measures.
+        If `diff_func` is not provided, this is a CorrResults object, which supports the same
+        access, with each result as a tuple of (diff, p_val, (ci_low, ci_high)), for the
+        correlation to the feature of the first measure minus that of the second.
+
+    Notes
+    -----
+    By default, differences are antisymmetric: `all_diffs[m1][m2]` is the correlation of `m1`
+    minus that of `m2`, and is the negative of `all_diffs[m2][m1]`, with the confidence
+    interval negated and flipped, and the same p-value. With `diff_func`, the same result,
+    from `diff_func(feature, m1, m2)`, is stored for both orders of each pair.
     """
 
     methods = results.keys()
+
+    if diff_func is None:
+        feat, *data = select_vals(select, feature, *results.values())
+        return CorrResults(methods, *bootstrap_diff_matrix(np.array(data).T, feat,
+                                                           n_bootstraps, ci_pc, rng=rng,
+                                                           early_stop=early_stop,
+                                                           n_jobs=n_jobs))
+
     all_diffs = {method : {} for method in methods}
 
     for m1, m2 in product(methods, methods):
@@ -117,29 +191,222 @@ def compute_diffs_to_feature(results, feature, select=None, diff_func=bootstrap_
         if m1 == m2 or all_diffs.get(m2).get(m1) is not None:
             continue
 
-        feature, result1, result2 = select_vals(select, feature, results[m1], results[m2])
+        feat, result1, result2 = select_vals(select, feature, results[m1], results[m2])
 
-        diffs = diff_func(feature, result1, result2)
+        diffs = diff_func(feat, result1, result2)
         all_diffs[m1][m2] = diffs
         all_diffs[m2][m1] = diffs
 
     return all_diffs
 
 
+def bootstrap_corr_matrix(data, n_bootstraps=1000, ci_pc=95, block_size=100, rng=None,
+                          early_stop=False, n_jobs=1):
+    """Compute bootstrapped Spearman correlations between all pairs of measures.
+
+    Parameters
+    ----------
+    data : 2d array
+        Measure results, organized as [n_observations, n_measures].
+    n_bootstraps : int, optional, default: 1000
+        Number of bootstrap samples. If stopping early, this is the maximum number.
+    ci_pc : float, optional, default: 95
+        Percentage of the confidence interval.
+    block_size : int, optional, default: 100
+        Number of bootstrap samples to compute together, which sets the memory use.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+    early_stop : bool, optional, default: False
+        Whether to stop bootstrapping each pair of measures once it is resolved whether its
+        confidence interval excludes zero, as in `run_resamples`.
+    n_jobs : int, optional, default: 1
+        Number of jobs to run bootstrap blocks across in parallel.
+
+    Returns
+    -------
+    r_vals : 2d array
+        Spearman correlation values, as [n_measures, n_measures].
+    p_vals : 2d array
+        P-values of the correlations, as [n_measures, n_measures].
+    cis : 3d array
+        Bootstrapped confidence intervals, as [2, n_measures, n_measures].
+
+    Notes
+    -----
+    Resamples are drawn in blocks with `run_resamples`, and each block of resamples is shared
+    across all pairs of measures. Each measure is sorted once. Per bootstrap sample,
+    the ranks of the resampled data are computed from the resample counts of the sorted
+    observations, and correlations for all pairs are computed together as a matrix product,
+    as a weighted correlation across observations, with resample counts as weights.
+    With early stopping, blocks only include measures that are in unresolved pairs.
+    Measures with any NaN values have NaN results.
+    """
+
+    data = np.asarray(data, dtype=float)
+    n_obs, n_meas = data.shape
+
+    sorts = [_sort_groups(data[:, ind]) for ind in range(n_meas)]
+    has_nan = np.isnan(data).any(axis=0)
+
+    # Compute correlations on the original data, with each observation counted once
+    counts = np.ones([1, n_obs])
+    r_vals = _weighted_corrs(counts, _resampled_ranks(counts, sorts))[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_vals = r_vals * np.sqrt((n_obs - 2) / ((1 + r_vals) * (1 - r_vals)))
+    p_vals = 2 * t_dist.sf(np.abs(t_vals), n_obs - 2)
+
+    # Compute bootstrapped correlations in blocks, skipping measures with NaN values
+    nan_mask = has_nan[:, np.newaxis] | has_nan[np.newaxis, :]
+    boots = run_resamples(partial(_corrs_block, sorts=sorts, skip=has_nan), n_obs,
+                          (n_meas, n_meas), n_resamples=n_bootstraps, block_size=block_size,
+                          ci_pc=ci_pc, early_stop=early_stop, n_jobs=n_jobs, rng=rng)
+    cis = boots['cis']
+
+    r_vals[nan_mask], p_vals[nan_mask], cis[:, nan_mask] = np.nan, np.nan, np.nan
+
+    return r_vals, p_vals, cis
+
+
+def bootstrap_diff_matrix(data, feature, n_bootstraps=1000, ci_pc=95, block_size=100,
+                          rng=None, early_stop=False, n_jobs=1):
+    """Compute bootstrapped differences between the correlations of measures to a feature.
+
+    Parameters
+    ----------
+    data : 2d array
+        Measure results, organized as [n_observations, n_measures].
+    feature : 1d array
+        Values to compute correlations to, with one value per observation.
+    n_bootstraps : int, optional, default: 1000
+        Number of bootstrap samples. If stopping early, this is the maximum number.
+    ci_pc : float, optional, default: 95
+        Percentage of the confidence interval.
+    block_size : int, optional, default: 100
+        Number of bootstrap samples to compute together, which sets the memory use.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+    early_stop : bool, optional, default: False
+        Whether to stop bootstrapping each pair of measures once it is resolved whether the
+        difference is significant, as in `run_resamples`.
+    n_jobs : int, optional, default: 1
+        Number of jobs to run bootstrap blocks across in parallel.
+
+    Returns
+    -------
+    diffs : 2d array
+        Differences of Spearman correlations to the feature, as [n_measures, n_measures],
+        with each entry as the correlation of the row measure minus that of the column measure.
+    p_vals : 2d array
+        Bootstrapped two-sided p-values of the differences, as [n_measures, n_measures].
+    cis : 3d array
+        Bootstrapped confidence intervals, as [2, n_measures, n_measures].
+
+    Notes
+    -----
+    The feature and measures are resampled together, once per bootstrap sample, and the
+    correlation of each measure to the feature is computed into a [n_block, n_measures]
+    matrix, from which differences between all pairs are computed by broadcasting.
+    Results are antisymmetric, such that `diffs` is equal to `-diffs.T`, and the lower
+    confidence bounds are equal to the negated, transposed upper bounds.
+    With early stopping, blocks only include measures that are in unresolved pairs.
+    Measures with any NaN values have NaN results.
+    """
+
+    data = np.column_stack([data, feature]).astype(float)
+    n_obs, n_meas = data.shape[0], data.shape[1] - 1
+
+    sorts = [_sort_groups(data[:, ind]) for ind in range(n_meas + 1)]
+
+    # Compute correlations to the feature on the original data
+    r_vals = _weighted_corrs_to_last(np.ones([1, n_obs]),
+                                     _resampled_ranks(np.ones([1, n_obs]), sorts))[0]
+
+    # Set results for measures with any NaN values, or if the feature has NaNs, to NaN
+    has_nan = np.isnan(data[:, :-1]).any(axis=0) | np.isnan(data[:, -1]).any()
+    r_vals[has_nan] = np.nan
+    diffs = r_vals[:, np.newaxis] - r_vals[np.newaxis, :]
+
+    # Compute bootstrapped differences in blocks, skipping measures with NaN values
+    boots = run_resamples(partial(_diffs_block, sorts=sorts, skip=has_nan), n_obs,
+                          (n_meas, n_meas), n_resamples=n_bootstraps, block_size=block_size,
+                          ci_pc=ci_pc, early_stop=early_stop, n_jobs=n_jobs, rng=rng)
+    p_vals, cis = boots['p_vals'], boots['cis']
+
+    nan_mask = np.isnan(diffs)
+    p_vals[nan_mask], cis[:, nan_mask] = np.nan, np.nan
+
+    return diffs, p_vals, cis
+
+
+def compute_subj_corrs(results, ci_pc=95):
+    """Compute spatial correlations between all pairs of measures, separately per subject.
+
+    Parameters
+    ----------
+    results : dict
+        Measure results.
+        Each key should be a measure name.
+        Each set of values should be an array of measure results, as [subjects, channels].
+    ci_pc : float, optional, default: 95
+        Percentage of the confidence interval for the group average correlations.
+
+    Returns
+    -------
+    subj_corrs : 3d array
+        Spearman correlations across channels per subject, as [subjects, measures, measures].
+    group_corrs : CorrResults
+        Group statistics of the per-subject correlations. Correlation values are the
+        average across subjects, and p-values and confidence intervals are from a one-sample
+        t-test across subjects, computed on Fisher z-transformed correlation values.
+
+    Notes
+    -----
+    Results are organized as a [subjects, measures, channels] array, which is ranked across
+    channels once, and correlations for all subjects and pairs are computed as a batched
+    matrix product. Per subject, channels with a NaN value for any measure are excluded.
+    """
+
+    labels = list(results.keys())
+    data = np.stack([np.asarray(results[label], dtype=float) for label in labels], axis=1)
+
+    # Rank across channels, ranking NaNs last, such that valid channels are ranked together
+    valid = ~np.isnan(data).any(axis=1)
+    ranks = rankdata(np.where(valid[:, np.newaxis, :], data, np.inf), axis=-1)
+
+    subj_corrs = _weighted_corrs(valid.astype(float), np.swapaxes(ranks, 1, 2))
+
+    # Compute group statistics, on Fisher z-transformed values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_vals = np.arctanh(subj_corrs)
+        n_subjs = np.sum(~np.isnan(z_vals), axis=0)
+        z_mean = np.nanmean(z_vals, axis=0)
+        z_sem = np.nanstd(z_vals, axis=0, ddof=1) / np.sqrt(n_subjs)
+        p_vals = 2 * t_dist.sf(np.abs(z_mean / z_sem), n_subjs - 1)
+        crit = t_dist.ppf(1 - (100 - ci_pc) / 200, n_subjs - 1)
+        cis = np.tanh(np.array([z_mean - crit * z_sem, z_mean + crit * z_sem]))
+        r_vals = np.nanmean(subj_corrs, axis=0)
+
+    return subj_corrs, CorrResults(labels, r_vals, p_vals, cis)
+
+
 def unpack_corrs(corrs):
     """Unpack a correlation dictionary into a matrix.
 
     Parameters
     ----------
-    corrs : dict
-        Dictionary of correlation results.
+    corrs : CorrResults or dict
+        Correlation results.
 
     Returns
     -------
     corrs_mat : 2d array
         Matrix of correlation values.
+        For CorrResults, this is a copy of the stored array of correlation values.
     """
 
+    if isinstance(corrs, CorrResults):
+        return corrs.r_vals.copy()
+
     corrs_mat = np.zeros([len(corrs.keys()), len(corrs.keys())])
 
     for ii, m1 in enumerate(corrs.keys()):
@@ -153,12 +420,176 @@ def unpack_corrs(corrs):
 
 
 def compute_reg_var(var, control):
-    """Compute a partialized variable - residuals after removing impact of another variable."""
+    """Compute a partialized variable - residuals after removing impact of another variable.
+
+    Parameters
+    ----------
+    var : 1d or 2d array
+        Variable(s) to partialize, as [n_obs] or [n_obs, n_vars].
+    control : 1d or 2d array
+        Control covariate(s) to regress out, as [n_obs] or [n_obs, n_covariates].
 
-    vals = var.reshape(-1, 1)
-    cont = control.reshape(-1, 1)
+    Returns
+    -------
+    vals_res : 2d array
+        Residuals, after regressing out the control covariates and an intercept,
+        as [n_obs, n_vars]. A 1d input variable returns residuals as [n_obs, 1].
+
+    Notes
+    -----
+    All variables are residualized together, with one least squares solve. Rank-deficient
+    designs, such as with a constant control covariate, or with fewer observations than
+    covariates, use the minimum-norm solution, such that residuals match those from
+    `sklearn.linear_model.LinearRegression`.
+    Observations with a NaN value in any covariate, or in a variable, are excluded from the
+    fit for that variable, and have NaN residuals. Variables with the same pattern of NaN
+    values are solved together.
+    """
+
+    vals = np.asarray(var, dtype=float).reshape(len(var), -1)
+    cont = np.asarray(control, dtype=float).reshape(len(control), -1)
 
-    vals_reg = linear_model.LinearRegression().fit(cont, vals)
-    vals_res = vals - vals_reg.predict(cont)
+    design = np.column_stack([np.ones(len(cont)), cont])
+    masks = ~np.isnan(vals) & ~np.isnan(cont).any(axis=1, keepdims=True)
+
+    vals_res = np.full(vals.shape, np.nan)
+    patterns, pattern_inds = np.unique(masks.T, axis=0, return_inverse=True)
+    for p_ind, mask in enumerate(patterns):
+        cols = np.flatnonzero(pattern_inds.ravel() == p_ind)
+        if not mask.any():
+            continue
+        coefs = np.linalg.lstsq(design[mask], vals[np.ix_(mask, cols)], rcond=None)[0]
+        vals_res[np.ix_(mask, cols)] = vals[np.ix_(mask, cols)] - design[mask] @ coefs
 
     return vals_res
+
+
+def _sort_groups(values):
+    """Sort a set of values once, finding the groups of tied values in sorted order."""
+
+    order = np.argsort(values, kind='stable')
+    sorted_vals = values[order]
+    starts = np.flatnonzero(np.r_[True, sorted_vals[1:] != sorted_vals[:-1]])
+    group_ids = np.cumsum(np.r_[True, sorted_vals[1:] != sorted_vals[:-1]]) - 1
+
+    return order, starts, group_ids
+
+
+def _resample_counts(resamples, n_obs):
+    """Count the number of times each observation is drawn, for a set of resamples."""
+
+    offsets = np.arange(len(resamples))[:, np.newaxis] * n_obs
+    counts = np.bincount((resamples + offsets).ravel(), minlength=len(resamples) * n_obs)
+
+    return counts.reshape(len(resamples), n_obs)
+
+
+def _resampled_ranks(counts, sorts):
+    """Compute the ranks each observation has in a set of resamples, from resample counts.
+
+    Parameters
+    ----------
+    counts : 2d array
+        Number of times each observation is resampled, as [n_samples, n_observations].
+    sorts : list of tuple
+        Sort order, group starts and group indices for each measure, from `_sort_groups`.
+
+    Returns
+    -------
+    ranks : 3d array
+        Rank of each observation within each resample, as [n_samples, n_obs, n_measures].
+        Tied values, including repeats of the same observation, get their average rank.
+    """
+
+    ranks = np.zeros(counts.shape + (len(sorts),))
+    for ind, (order, starts, group_ids) in enumerate(sorts):
+        sorted_counts = counts[:, order]
+        group_counts = np.add.reduceat(sorted_counts, starts, axis=1)
+        group_ranks = np.cumsum(group_counts, axis=1) - (group_counts - 1) / 2
+        ranks[:, order, ind] = group_ranks[:, group_ids]
+
+    return ranks
+
+
+def _weighted_corrs_to_last(counts, values):
+    """Compute correlations of each measure to the last measure, weighting observations by counts.
+
+    Parameters
+    ----------
+    counts : 2d array
+        Weight of each observation, as [n_samples, n_observations].
+    values : 3d array
+        Values, as [n_samples, n_observations, n_measures + 1].
+
+    Returns
+    -------
+    corrs : 2d array
+        Correlations of each measure to the last measure, as [n_samples, n_measures].
+    """
+
+    weights = counts / counts.sum(axis=1, keepdims=True)
+    demeaned = values - np.einsum('si,sim->sm', weights, values)[:, np.newaxis, :]
+
+    covs = np.einsum('si,sim,si->sm', weights, demeaned[:, :, :-1], demeaned[:, :, -1])
+    variances = np.einsum('si,sim->sm', weights, demeaned ** 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corrs = covs / np.sqrt(variances[:, :-1] * variances[:, -1:])
+
+    return corrs
+
+
+def _weighted_corrs(counts, values):
+    """Compute correlations between all pairs of measures, weighting observations by counts.
+
+    Parameters
+    ----------
+    counts : 2d array
+        Weight of each observation, as [n_samples, n_observations].
+    values : 3d array
+        Values, as [n_samples, n_observations, n_measures].
+
+    Returns
+    -------
+    corrs : 3d array
+        Correlations between all pairs of measures, as [n_samples, n_measures, n_measures].
+    """
+
+    weights = counts / counts.sum(axis=1, keepdims=True)
+    demeaned = values - np.einsum('si,sim->sm', weights, values)[:, np.newaxis, :]
+    covs = np.matmul(np.swapaxes(demeaned * weights[..., np.newaxis], 1, 2), demeaned)
+
+    stds = np.sqrt(np.diagonal(covs, axis1=1, axis2=2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corrs = covs / (stds[:, :, np.newaxis] * stds[:, np.newaxis, :])
+
+    return corrs
+
+
+def _corrs_block(resamples, active, sorts=None, skip=None):
+    """Compute bootstrapped correlations for a block of resamples, for active pairs."""
+
+    n_meas = len(sorts)
+    inds = np.flatnonzero((active.any(axis=0) | active.any(axis=1)) & ~skip)
+
+    corrs = np.full([len(resamples), n_meas, n_meas], np.nan)
+    if len(inds):
+        counts = _resample_counts(resamples, resamples.shape[1])
+        ranks = _resampled_ranks(counts, [sorts[ind] for ind in inds])
+        corrs[:, inds[:, np.newaxis], inds[np.newaxis, :]] = _weighted_corrs(counts, ranks)
+
+    return corrs
+
+
+def _diffs_block(resamples, active, sorts=None, skip=None):
+    """Compute bootstrapped differences of correlations to the last measure, for active pairs."""
+
+    n_meas = len(sorts) - 1
+    inds = np.flatnonzero((active.any(axis=0) | active.any(axis=1)) & ~skip)
+
+    corrs = np.full([len(resamples), n_meas], np.nan)
+    if len(inds):
+        counts = _resample_counts(resamples, resamples.shape[1])
+        ranks = _resampled_ranks(counts, [sorts[ind] for ind in inds] + [sorts[-1]])
+        corrs[:, inds] = _weighted_corrs_to_last(counts, ranks)
+
+    return corrs[:, :, np.newaxis] - corrs[:, np.newaxis, :]
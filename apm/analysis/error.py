@@ -1,5 +1,8 @@
 """Compute and compare error metrics of aperiodic methods."""
 
+import numpy as np
+from scipy.stats import norm
+
 ###################################################################################################
 ###################################################################################################
 
@@ -16,10 +19,312 @@ def sqd_err(measured_value, true_value):
 
 
 def calculate_errors(measures, true_values, error_func=abs_err):
-    """Calculate errors of measured values."""
+    """Calculate errors of measured values.
+
+    Note: if all methods have the same number of measured values, errors are computed for all
+    methods together, as a [methods, samples] array. Otherwise, errors are computed per method.
+    """
+
+    values = [np.asarray(vals, dtype=float) for vals in measures.values()]
+
+    if len(set(vals.shape for vals in values)) <= 1:
+        errors = error_func(np.array(values), true_values)
+    else:
+        errors = [error_func(vals, true_values) for vals in values]
+
+    return dict(zip(measures.keys(), errors))
+
+
+def compute_error_metrics(measured, true_values):
+    """Compute summary error metrics for a set of methods, ignoring NaN values.
+
+    Parameters
+    ----------
+    measured : 2d array
+        Measured values, as [methods, samples].
+    true_values : float or 1d array
+        True values, as a single value, or one value per sample.
+
+    Returns
+    -------
+    metrics : dict
+        Error metrics, each as a 1d array with one value per method:
+
+        - 'n' : number of non-NaN values
+        - 'bias' : mean signed error
+        - 'mae' : mean absolute error
+        - 'median_ae' : median absolute error
+        - 'rmse' : root mean squared error
+    """
+
+    diffs = np.asarray(measured, dtype=float) - true_values
+    abs_diffs = np.abs(diffs)
+
+    metrics = {
+        'n' : np.sum(~np.isnan(diffs), axis=-1),
+        'bias' : np.nanmean(diffs, axis=-1),
+        'mae' : np.nanmean(abs_diffs, axis=-1),
+        'median_ae' : np.nanmedian(abs_diffs, axis=-1),
+        'rmse' : np.sqrt(np.nanmean(abs_diffs ** 2, axis=-1)),
+    }
+
+    return metrics
+
+
+def compute_ranksums(data):
+    """Compute Wilcoxon rank-sum tests between all pairs of a set of distributions.
+
+    Parameters
+    ----------
+    data : 2d array or list of 1d array
+        Values per distribution, as [n_distributions, n_samples], or a list of arrays,
+        which can have different lengths. NaN values are omitted.
+
+    Returns
+    -------
+    stats : 2d array
+        Rank-sum test statistics, as [n_distributions, n_distributions], with positive values
+        for distributions in rows that tend to be larger than those in columns.
+    p_vals : 2d array
+        Two-sided p-values, as [n_distributions, n_distributions].
+
+    Notes
+    -----
+    This matches `scipy.stats.ranksums` applied to each pair, with `nan_policy='omit'`.
+    All values are ranked together once. For each group of tied values, the counts per
+    distribution and the cumulative counts below it give the rank sum of each distribution
+    within each pair, computed for all pairs together as a matrix product.
+    """
+
+    data = [np.asarray(vals, dtype=float) for vals in data]
+    data = [vals[~np.isnan(vals)] for vals in data]
+    n_dists = len(data)
+
+    # Rank all values together, and count the values per distribution for each tied group
+    values = np.concatenate(data)
+    labels = np.repeat(np.arange(n_dists), [len(vals) for vals in data])
+    _, groups = np.unique(values, return_inverse=True)
+    counts = np.bincount(groups.ravel() * n_dists + labels,
+                         minlength=(groups.max() + 1) * n_dists if len(groups) else 0)
+    counts = counts.reshape(-1, n_dists).astype(float)
+    below = np.cumsum(counts, axis=0) - counts
+
+    # Compute, per pair, the count of values in the other distribution below each value
+    n_vals = counts.sum(axis=0)
+    u_vals = counts.T @ (below + 0.5 * counts)
+
+    # Convert to the rank sum, and the test statistic, as in scipy.stats.ranksums
+    n_rows, n_cols = n_vals[:, np.newaxis], n_vals[np.newaxis, :]
+    rank_sums = n_rows * (n_rows + 1) / 2 + u_vals
+    expected = n_rows * (n_rows + n_cols + 1) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats = (rank_sums - expected) / np.sqrt(n_rows * n_cols * (n_rows + n_cols + 1) / 12)
+    p_vals = 2 * norm.sf(np.abs(stats))
+
+    return stats, p_vals
+
+###################################################################################################
+###################################################################################################
+
+class ErrorAccumulator():
+    """Mergeable streaming summary of a set of error values.
+
+    Parameters
+    ----------
+    thresholds : list of float, optional, default: (0.025,)
+        Thresholds to count the number of errors below and above.
+    rel_acc : float, optional, default: 0.01
+        Relative accuracy of the quantile sketch, used to estimate the median.
+
+    Attributes
+    ----------
+    n_total : int
+        Number of values added, including NaN values.
+    count : int
+        Number of non-NaN values added.
+    mean : float
+        Mean of the non-NaN values.
+    m2 : float
+        Sum of squared differences from the mean, of the non-NaN values.
+    n_below, n_above : dict
+        Number of values below and above each threshold.
+
+    Notes
+    -----
+    The mean and variance are updated with Welford's algorithm, in its batched form, such that
+    accumulators can be merged exactly. Quantiles are estimated from a sketch of counts in
+    logarithmically spaced bins, which is mergeable, and has a bounded relative error of
+    `rel_acc` on the estimated values. Memory use does not depend on the number of values.
+    """
+
+    def __init__(self, thresholds=(0.025,), rel_acc=0.01):
+        """Initialize ErrorAccumulator object."""
+
+        self.thresholds = tuple(thresholds)
+        self.rel_acc = rel_acc
+        self._log_gamma = np.log((1 + rel_acc) / (1 - rel_acc))
+
+        self.n_total = 0
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+        self.n_below = {thresh : 0 for thresh in self.thresholds}
+        self.n_above = {thresh : 0 for thresh in self.thresholds}
+
+        # Quantile sketch: counts per bin, for positive & negative values, and zeros
+        self._pos_bins, self._neg_bins, self._n_zero = {}, {}, 0
+
+
+    def __add__(self, other):
+        """Overload addition, to merge accumulators into a new accumulator."""
+
+        return ErrorAccumulator(self.thresholds, self.rel_acc).merge(self).merge(other)
+
+
+    @property
+    def var(self):
+        """Variance of the non-NaN values."""
+
+        return self.m2 / self.count if self.count else np.nan
+
+
+    @property
+    def std(self):
+        """Standard deviation of the non-NaN values."""
+
+        return np.sqrt(self.var)
+
+
+    def add(self, values):
+        """Add a set of error values to the accumulator.
+
+        Parameters
+        ----------
+        values : 1d array
+            Error values. NaN values are counted in `n_total`, but otherwise ignored.
+        """
+
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        self.n_total += values.size
+        values = values[~np.isnan(values)]
+
+        if values.size:
+            self._update_moments(values.size, values.mean(), np.sum((values - values.mean())**2))
+
+        for thresh in self.thresholds:
+            self.n_below[thresh] += int(np.sum(values < thresh))
+            self.n_above[thresh] += int(np.sum(values > thresh))
+
+        self._n_zero += int(np.sum(values == 0))
+        for bins, vals in [(self._pos_bins, values[values > 0]),
+                           (self._neg_bins, -values[values < 0])]:
+            inds, counts = np.unique(np.ceil(np.log(vals) / self._log_gamma).astype(int),
+                                     return_counts=True)
+            for ind, count in zip(inds.tolist(), counts.tolist()):
+                bins[ind] = bins.get(ind, 0) + count
+
+        return self
+
+
+    def merge(self, other):
+        """Merge another accumulator into this one, in place.
+
+        Parameters
+        ----------
+        other : ErrorAccumulator
+            Accumulator to merge in. Must have the same thresholds and relative accuracy.
+        """
+
+        if other.thresholds != self.thresholds or other.rel_acc != self.rel_acc:
+            raise ValueError('Accumulators must have the same thresholds and accuracy to merge.')
+
+        self.n_total += other.n_total
+        if other.count:
+            self._update_moments(other.count, other.mean, other.m2)
+
+        for thresh in self.thresholds:
+            self.n_below[thresh] += other.n_below[thresh]
+            self.n_above[thresh] += other.n_above[thresh]
+
+        self._n_zero += other._n_zero
+        for bins, other_bins in [(self._pos_bins, other._pos_bins),
+                                 (self._neg_bins, other._neg_bins)]:
+            for ind, count in other_bins.items():
+                bins[ind] = bins.get(ind, 0) + count
+
+        return self
+
+
+    def quantile(self, quant):
+        """Estimate a quantile of the non-NaN values, from the quantile sketch.
+
+        Parameters
+        ----------
+        quant : float
+            Quantile to estimate, between 0 and 1.
+
+        Returns
+        -------
+        float
+            Estimated quantile value.
+        """
+
+        if not self.count:
+            return np.nan
+
+        # Collect bins in order of increasing value, as (value, count)
+        gamma = np.exp(self._log_gamma)
+        bins = [(-2 * gamma ** ind / (gamma + 1), count) \
+            for ind, count in sorted(self._neg_bins.items(), reverse=True)]
+        bins.append((0., self._n_zero))
+        bins.extend([(2 * gamma ** ind / (gamma + 1), count) \
+            for ind, count in sorted(self._pos_bins.items())])
+
+        rank = quant * (self.count - 1)
+        cumulative = 0
+        for value, count in bins:
+            cumulative += count
+            if cumulative > rank:
+                return value
+
+        return bins[-1][0]
+
+
+    def median(self):
+        """Estimate the median of the non-NaN values."""
+
+        return self.quantile(0.5)
+
+
+    def percent_threshold(self, thresh, direction='below'):
+        """Compute the percentage of all values below or above a threshold.
+
+        Parameters
+        ----------
+        thresh : float
+            Threshold. Must be one of the thresholds of the accumulator.
+        direction : {'below', 'above'}
+            Whether to compute the percentage of values below or above the threshold.
+
+        Returns
+        -------
+        float
+            Percentage of values, or NaN if no values have been added.
+        """
+
+        if thresh not in self.thresholds:
+            raise ValueError('Threshold {} is not tracked by the accumulator.'.format(thresh))
+
+        counts = self.n_below if direction == 'below' else self.n_above
+
+        return counts[thresh] / self.n_total * 100 if self.n_total else np.nan
+
 
-    errors = {}
-    for method in measures.keys():
-        errors[method] = error_func(measures[method], true_values)
+    def _update_moments(self, count, mean, m2):
+        """Combine running moments with the moments of another set of values."""
 
-    return errors
+        delta = mean - self.mean
+        total = self.count + count
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
@@ -0,0 +1,238 @@
+"""Block-based engine for bootstrap and permutation resampling, with early stopping."""
+
+from functools import partial
+
+import numpy as np
+from scipy.stats import norm
+
+###################################################################################################
+###################################################################################################
+
+def run_resamples(block_func, n_obs, shape, kind='bootstrap', observed=None, null=0.,
+                  n_resamples=1000, block_size=100, ci_pc=95, early_stop=False, n_min=None,
+                  mc_conf=99, n_jobs=1, rng=None):
+    """Run resamples in blocks, estimating p-values and confidence intervals of statistics.
+
+    Parameters
+    ----------
+    block_func : callable
+        Function to compute statistics for a block of resamples, called as
+        `block_func(resamples, active)`, where `resamples` is an index array, as
+        [n_block, n_obs], and `active` is a boolean array of the statistics to compute, of
+        shape `shape`. Should return an array as [n_block, *shape]. Inactive statistics
+        are ignored, and can be set to any value, such as NaN.
+        To use `n_jobs` > 1, this should be picklable, such as a module-level function.
+    n_obs : int
+        Number of observations.
+    shape : tuple of int
+        Shape of the computed statistics.
+    kind : {'bootstrap', 'permutation'}
+        Type of resampling. Bootstrap resamples draw observations with replacement,
+        and permutation resamples are random orderings of the observations.
+    observed : array, optional
+        Statistics computed on the original data, of shape `shape`. Required for permutations.
+    null : float, optional, default: 0.
+        Value of the statistic under the null hypothesis, used for bootstrap p-values.
+    n_resamples : int, optional, default: 1000
+        Maximum number of resamples.
+    block_size : int, optional, default: 100
+        Number of resamples to compute together, which sets the memory use.
+    ci_pc : float, optional, default: 95
+        Percentage of the confidence interval. Also sets the significance level for decisions,
+        as `1 - ci_pc / 100`, such that for bootstraps, a decision is whether the confidence
+        interval excludes the null value.
+    early_stop : bool, optional, default: False
+        Whether to stop resampling each statistic once its decision is resolved.
+    n_min : int, optional
+        Minimum number of resamples before stopping early. Defaults to `block_size * n_jobs`.
+    mc_conf : float, optional, default: 99
+        Confidence, as a percentage, that the Monte Carlo error of the p-value is
+        small enough to not change the decision, for a decision to be resolved.
+    n_jobs : int, optional, default: 1
+        Number of jobs to run in parallel. If -1, uses all available cores.
+        If more than 1, blocks are run across a process pool, with one block per job per round.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+
+    Returns
+    -------
+    results : dict
+        Resampling results, with keys:
+
+        * 'p_vals' : two-sided p-values, of shape `shape`
+        * 'p_errors' : Monte Carlo standard errors of the p-values
+        * 'cis' : confidence intervals, as [2, *shape], for bootstraps, otherwise None
+        * 'ci_errors' : Monte Carlo standard errors of the confidence interval bounds,
+          as [2, *shape], for bootstraps, otherwise None
+        * 'n_resamples' : number of resamples used for each statistic
+
+    Notes
+    -----
+    Each block draws its resamples from its own seed, drawn in order from `rng`, such that
+    the resamples do not depend on `n_jobs`, and without early stopping, neither do results.
+    Resamples in a block are shared across statistics.
+
+    Bootstrap p-values are twice the smaller of the fractions of resampled statistics at or
+    below, and at or above, the null value. Permutation p-values are the fraction of resampled
+    statistics with an absolute value at or above that of the observed statistic, counting
+    the observed statistic as one of the resamples.
+
+    With early stopping, after each round of blocks, a decision is resolved if the distance
+    between the p-value and the significance level is larger than the Monte Carlo error of
+    the p-value, scaled to the `mc_conf` confidence level. Resolved statistics are not
+    computed in later blocks, such that compute is spent on borderline statistics.
+    The Monte Carlo error of each confidence interval bound is estimated from the spread of
+    the order statistics within one standard error of the bound's quantile.
+    """
+
+    if kind not in ['bootstrap', 'permutation']:
+        raise ValueError('Resampling kind not understood.')
+    if kind == 'permutation' and observed is None:
+        raise ValueError('Observed statistics are required for permutations.')
+
+    rng = np.random.default_rng(rng)
+    n_jobs = _get_n_jobs(n_jobs)
+    n_min = block_size * n_jobs if n_min is None else n_min
+    alpha = 1 - ci_pc / 100
+    z_crit = norm.ppf(1 - (1 - mc_conf / 100) / 2)
+
+    run_block = partial(_run_block, block_func=block_func, n_obs=n_obs, kind=kind)
+    pool = None
+    if n_jobs > 1:
+        from apm.run.parallel import get_pool
+        pool = get_pool(n_jobs)
+
+    active = np.ones(shape, dtype=bool)
+    blocks, n_done = [], 0
+    while n_done < n_resamples and active.any():
+
+        n_round = min(block_size * n_jobs, n_resamples - n_done)
+        sizes = [min(block_size, n_round - start) for start in range(0, n_round, block_size)]
+        tasks = [(seed, size, active) for seed, size in \
+            zip(rng.integers(0, 2 ** 32, len(sizes)), sizes)]
+
+        for block in (pool.map(run_block, tasks) if pool else map(run_block, tasks)):
+            block = np.array(block, dtype=float)
+            block[:, ~active] = np.nan
+            blocks.append(block)
+        n_done += n_round
+
+        if early_stop and n_done >= n_min:
+            p_vals, p_errors, n_valid = _compute_pvals(blocks, kind, observed, null)
+            with np.errstate(invalid='ignore'):
+                resolved = (n_valid == 0) | (np.abs(p_vals - alpha) > z_crit * p_errors)
+            active &= ~resolved
+
+    p_vals, p_errors, n_valid = _compute_pvals(blocks, kind, observed, null)
+
+    cis, ci_errors = None, None
+    if kind == 'bootstrap':
+        stats = np.sort(np.concatenate(blocks), axis=0)
+        bounds = np.array([alpha / 2, 1 - alpha / 2])
+        cis = np.stack([_order_quantile(stats, n_valid, bound) for bound in bounds])
+        ci_errors = np.stack([_quantile_error(stats, n_valid, bound) for bound in bounds])
+
+    return {'p_vals' : p_vals, 'p_errors' : p_errors, 'cis' : cis, 'ci_errors' : ci_errors,
+            'n_resamples' : n_valid}
+
+
+def _get_n_jobs(n_jobs):
+    """Get the number of jobs, replacing -1 with the number of available cores."""
+
+    from multiprocessing import cpu_count
+
+    return cpu_count() if n_jobs == -1 else n_jobs
+
+
+def _run_block(task, block_func=None, n_obs=None, kind='bootstrap'):
+    """Draw a block of resamples from a seed, and compute statistics for them.
+
+    Parameters
+    ----------
+    task : tuple of (int, int, array)
+        Seed, number of resamples, and mask of active statistics for the block.
+
+    Returns
+    -------
+    array
+        Statistics for each resample in the block, as [n_block, *shape].
+    """
+
+    seed, size, active = task
+    rng = np.random.default_rng(seed)
+
+    if kind == 'bootstrap':
+        resamples = rng.integers(0, n_obs, [size, n_obs])
+    else:
+        resamples = rng.permuted(np.tile(np.arange(n_obs), (size, 1)), axis=1)
+
+    return block_func(resamples, active)
+
+
+def _compute_pvals(blocks, kind, observed, null):
+    """Compute p-values, and their Monte Carlo standard errors, from blocks of statistics."""
+
+    stats = np.concatenate(blocks)
+    valid = ~np.isnan(stats)
+    n_valid = valid.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if kind == 'bootstrap':
+            n_below = np.sum(valid & (stats <= null), axis=0)
+            n_above = np.sum(valid & (stats >= null), axis=0)
+            n_extreme = 2 * np.minimum(n_below, n_above)
+            p_vals = np.minimum(n_extreme / n_valid, 1.)
+        else:
+            n_extreme = np.sum(valid & (np.abs(stats) >= np.abs(observed)), axis=0)
+            p_vals = (n_extreme + 1) / (n_valid + 1)
+
+        # Use a shrunk estimate for the error, to not have zero error if no values are extreme
+        p_shrunk = (n_extreme + 0.5) / (n_valid + 1)
+        p_errors = np.sqrt(p_shrunk * (1 - np.minimum(p_shrunk, 1.)) / n_valid)
+
+    p_vals[n_valid == 0], p_errors[n_valid == 0] = np.nan, np.nan
+
+    return p_vals, p_errors, n_valid
+
+
+def _order_quantile(stats, n_valid, quantile):
+    """Compute quantiles from sorted statistics, with varying numbers of valid values.
+
+    Parameters
+    ----------
+    stats : array
+        Statistics, sorted along the first axis, with NaN values last.
+    n_valid : array
+        Number of valid values, for each statistic.
+    quantile : float or array
+        Quantile to compute, between 0 and 1, for all or for each statistic.
+
+    Returns
+    -------
+    array
+        Quantile values, using linear interpolation, as in `np.nanpercentile`.
+    """
+
+    pos = np.clip(quantile * (n_valid - 1), 0, None)
+    low = np.floor(pos).astype(int)
+    high = np.minimum(low + 1, np.maximum(n_valid - 1, 0))
+
+    low_vals = np.take_along_axis(stats, low[np.newaxis], axis=0)[0]
+    high_vals = np.take_along_axis(stats, high[np.newaxis], axis=0)[0]
+    values = low_vals + (pos - low) * (high_vals - low_vals)
+    values[n_valid == 0] = np.nan
+
+    return values
+
+
+def _quantile_error(stats, n_valid, quantile):
+    """Estimate the Monte Carlo standard error of a quantile, from sorted statistics."""
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q_error = np.sqrt(quantile * (1 - quantile) / n_valid)
+    q_error[n_valid == 0] = 0.
+
+    upper = _order_quantile(stats, n_valid, np.minimum(quantile + q_error, 1.))
+    lower = _order_quantile(stats, n_valid, np.maximum(quantile - q_error, 0.))
+
+    return (upper - lower) / 2
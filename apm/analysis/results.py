@@ -1,8 +1,5 @@
 """Compute measures on results."""
 
-from math import sqrt
-from statistics import mean, stdev
-
 import numpy as np
 
 ###################################################################################################
@@ -26,13 +23,31 @@ def compute_avgs(results, avg_func=np.nanmean):
 
 
 def cohens_d(d1, d2, nan_policy='omit'):
-    """Compute Cohen's D effect size measure between two sets of results."""
+    """Compute Cohen's D effect size measure between two sets of results.
 
-    if nan_policy == 'omit':
-        mask = np.logical_and(~np.isnan(d1), ~np.isnan(d2))
-        d1 = d1[mask]
-        d2 = d2[mask]
+    Note: inputs can be 2d arrays, as [n_sets, n_samples], computing a value per row.
+    With 'omit', samples that are NaN in either input are dropped, per row.
+    With 'propagate', any NaN gives a NaN result. With 'raise', any NaN raises an error.
+    """
+
+    d1 = np.asarray(d1, dtype=float)
+    d2 = np.asarray(d2, dtype=float)
 
-    d_val = (mean(d1) - mean(d2)) / (sqrt((stdev(d1) ** 2 + stdev(d2) ** 2) / 2))
+    if nan_policy not in ['omit', 'propagate', 'raise']:
+        raise ValueError("nan_policy must be one of {'omit', 'propagate', 'raise'}.")
+
+    if nan_policy == 'raise' and (np.isnan(d1).any() or np.isnan(d2).any()):
+        raise ValueError('The input contains nan values.')
+
+    if nan_policy == 'omit':
+        mask = np.isnan(d1) | np.isnan(d2)
+        d1 = np.where(mask, np.nan, d1)
+        d2 = np.where(mask, np.nan, d2)
+        mean_func, var_func = np.nanmean, np.nanvar
+    else:
+        mean_func, var_func = np.mean, np.var
+
+    d_val = (mean_func(d1, axis=-1) - mean_func(d2, axis=-1)) / \
+        np.sqrt((var_func(d1, axis=-1, ddof=1) + var_func(d2, axis=-1, ddof=1)) / 2)
 
     return d_val
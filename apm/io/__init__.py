@@ -2,3 +2,5 @@
 
 from .db import APMDB
 from .io import *
+from .store import ResultsStore, ResultsRef, save_results, load_results
+from .cache import ArtifactCache
@@ -0,0 +1,300 @@
+"""Content-addressed cache of computed artifacts for the aperiodic methods project."""
+
+import os
+import json
+import pickle
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+###################################################################################################
+###################################################################################################
+
+CACHE_EXT = '.p'
+
+###################################################################################################
+###################################################################################################
+
+class ArtifactCache():
+    """Cache of computed artifacts, stored under a hash of their inputs.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the cache directory.
+    max_size : int, optional
+        Maximum total size of the cache, in bytes. If None, the cache size is not limited.
+
+    Notes
+    -----
+    Each artifact is stored as a pickle file, named by the function name and a hash of the
+    input data identity, function name, and settings. Any object that can be pickled can be
+    cached, such as power spectra, FOOOFGroup objects, or dictionaries of measure results.
+
+    Writes are atomic: entries are written to a temporary file that is then moved into place,
+    such that parallel jobs sharing a cache never read a partially written entry.
+
+    Entries are evicted in least recently used order, using file modification times,
+    which are updated on each cache hit, when the cache size exceeds `max_size`.
+    """
+
+    def __init__(self, path, max_size=None):
+        """Initialize ArtifactCache object."""
+
+        self.path = Path(path)
+        self.max_size = max_size
+
+        os.makedirs(self.path, exist_ok=True)
+
+
+    def __contains__(self, key):
+        """Check if a key is in the cache."""
+
+        return self._get_file(key).exists()
+
+
+    @property
+    def size(self):
+        """Total size of all cached entries, in bytes."""
+
+        return sum(entry['size'] for entry in self.entries())
+
+
+    def make_key(self, data, func_name, settings=None):
+        """Make a cache key for an artifact.
+
+        Parameters
+        ----------
+        data : obj
+            Input data the artifact is computed from, such as an array or a file path.
+        func_name : str
+            Name of the function that computes the artifact.
+        settings : dict, optional
+            Settings used to compute the artifact.
+
+        Returns
+        -------
+        key : str
+            Cache key, as '<func_name>-<hash>'.
+        """
+
+        hasher = hashlib.sha1()
+        hasher.update(hash_data(data).encode())
+        hasher.update(func_name.encode())
+        hasher.update(json.dumps(settings or {}, sort_keys=True, default=repr).encode())
+
+        return func_name + '-' + hasher.hexdigest()
+
+
+    def get(self, key, default=None):
+        """Get an artifact from the cache, marking it as recently used.
+
+        Parameters
+        ----------
+        key : str
+            Cache key.
+        default : obj, optional
+            Value to return if the key is not in the cache.
+
+        Returns
+        -------
+        obj
+            Cached artifact, or `default` if the key is not in the cache.
+        """
+
+        file_path = self._get_file(key)
+
+        try:
+            with open(file_path, 'rb') as cache_file:
+                value = pickle.load(cache_file)
+        except FileNotFoundError:
+            return default
+
+        # Update the modification time, which is used for LRU eviction
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            pass
+
+        return value
+
+
+    def put(self, key, value):
+        """Add an artifact to the cache, evicting old entries if the cache is over size.
+
+        Parameters
+        ----------
+        key : str
+            Cache key.
+        value : obj
+            Artifact to cache.
+        """
+
+        file_path = self._get_file(key)
+        temp_file = self.path / '.{}.{}.tmp'.format(key, os.getpid())
+
+        with open(temp_file, 'wb') as cache_file:
+            pickle.dump(value, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, file_path)
+
+        if self.max_size is not None:
+            self.evict(self.max_size, keep=key)
+
+
+    def compute(self, func, data, settings=None, func_name=None):
+        """Get an artifact from the cache, computing and caching it if it is not available.
+
+        Parameters
+        ----------
+        func : callable
+            Function to compute the artifact, called as `func(data, **settings)`.
+        data : obj
+            Input data to compute the artifact from.
+        settings : dict, optional
+            Settings for `func`.
+        func_name : str, optional
+            Name to use for the function in the cache key. Defaults to the function name.
+
+        Returns
+        -------
+        obj
+            Cached or computed artifact.
+        """
+
+        settings = settings if settings else {}
+        key = self.make_key(data, func_name if func_name else func.__name__, settings)
+
+        value = self.get(key, default=_MISSING)
+        if value is _MISSING:
+            value = func(data, **settings)
+            self.put(key, value)
+
+        return value
+
+
+    def entries(self):
+        """List the entries in the cache.
+
+        Returns
+        -------
+        entries : list of dict
+            Cache entries, with the 'key', 'func', 'size' in bytes, and 'last_used' time
+            as seconds since the epoch, sorted from least to most recently used.
+        """
+
+        entries = []
+        for file_path in self.path.glob('*' + CACHE_EXT):
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append({'key' : file_path.stem, 'func' : file_path.stem.rsplit('-', 1)[0],
+                            'size' : stat.st_size, 'last_used' : stat.st_mtime})
+
+        return sorted(entries, key=lambda entry: entry['last_used'])
+
+
+    def evict(self, max_size, keep=None):
+        """Remove least recently used entries until the cache is within a given size.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum total size of the cache, in bytes.
+        keep : str, optional
+            Key of an entry to not evict, such as the most recently added entry.
+
+        Returns
+        -------
+        removed : list of str
+            Keys of the removed entries.
+        """
+
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+
+        removed = []
+        for entry in entries:
+            if total <= max_size:
+                break
+            if entry['key'] == keep:
+                continue
+            self.remove(entry['key'])
+            total -= entry['size']
+            removed.append(entry['key'])
+
+        return removed
+
+
+    def remove(self, key):
+        """Remove an entry from the cache, if it exists."""
+
+        try:
+            os.remove(self._get_file(key))
+        except FileNotFoundError:
+            pass
+
+
+    def clear(self):
+        """Remove all entries from the cache."""
+
+        for entry in self.entries():
+            self.remove(entry['key'])
+
+
+    def _get_file(self, key):
+        """Get the file path for a cache key."""
+
+        return self.path / (key + CACHE_EXT)
+
+
+# Sentinel for cache misses, as None can be a cached value
+_MISSING = object()
+
+###################################################################################################
+###################################################################################################
+
+def hash_data(data):
+    """Compute a hash of the identity of input data.
+
+    Parameters
+    ----------
+    data : obj
+        Input data. Arrays are hashed by content, shape and data type, with the elements
+        of object arrays hashed individually. File paths are hashed by path, size and
+        modification time. Lists, tuples and dictionaries are hashed by their type and their
+        elements. Other objects are hashed by their pickled content.
+
+    Returns
+    -------
+    str
+        Hash of the data.
+    """
+
+    hasher = hashlib.sha1()
+
+    if isinstance(data, np.ndarray):
+        hasher.update(str((data.shape, data.dtype.str)).encode())
+        if data.dtype.hasobject:
+            # Object arrays store pointers, so hash each element instead of the buffer
+            for item in data.ravel():
+                hasher.update(hash_data(item).encode())
+        else:
+            hasher.update(np.ascontiguousarray(data).data)
+    elif isinstance(data, (str, Path)) and os.path.isfile(data):
+        stat = os.stat(data)
+        hasher.update(str((os.path.abspath(data), stat.st_size, stat.st_mtime_ns)).encode())
+    elif isinstance(data, (list, tuple)):
+        hasher.update(type(data).__name__.encode())
+        for item in data:
+            hasher.update(hash_data(item).encode())
+    elif isinstance(data, dict):
+        hasher.update(type(data).__name__.encode())
+        for label in sorted(data, key=str):
+            hasher.update(repr(label).encode())
+            hasher.update(hash_data(data[label]).encode())
+    else:
+        hasher.update(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+    return hasher.hexdigest()
@@ -1,39 +1,137 @@
 """I/O utilities for loading empirical data."""
 
+import os
 import csv
+import json
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-import pandas as pd
-from scipy.io import loadmat
-
-import mne
-from mne.io import read_raw_edf
+from scipy.io import loadmat, whosmat
+from scipy.io.matlab import matfile_version
 
 from apm.io.io import check_folder
+from apm.io.utils import LazyStack
+
+###################################################################################################
+###################################################################################################
+
+# Data types of numeric MATLAB classes, as loaded by scipy
+MAT_DTYPES = {
+    'double' : 'float64',
+    'single' : 'float32',
+    'int8' : 'int8',
+    'int16' : 'int16',
+    'int32' : 'int32',
+    'int64' : 'int64',
+    'uint8' : 'uint8',
+    'uint16' : 'uint16',
+    'uint32' : 'uint32',
+    'uint64' : 'uint64',
+    'logical' : 'bool',
+}
 
 ###################################################################################################
 ###################################################################################################
 
 ## EEG1: DEMO DATA
 
-def load_eeg_demo_data(files, folder, data_field):
-    """Helper function for loading the EEG demo dataset."""
+def load_eeg_demo_data(files, folder, data_field, n_jobs=1, pad=True, dtype=None):
+    """Helper function for loading the EEG demo dataset.
+
+    Parameters
+    ----------
+    files : list of str
+        File names to load.
+    folder : str or Path
+        Folder containing the files.
+    data_field : str
+        Name of the variable to load from each file.
+    n_jobs : int, optional, default: 1
+        Number of threads to use to read files in parallel. If -1, uses all available cores.
+    pad : bool, optional, default: True
+        How to collect data with different shapes across files.
+        If True, returns an array padded with NaN, which requires the data in each file to
+        have the same number of dimensions. If False, returns a list of arrays.
+    dtype : str, optional
+        Data type of the output. If not provided, uses the data type of the data in the files.
+        If the output is padded with NaN, integer data types are promoted to float.
+
+    Returns
+    -------
+    data : array or list of array
+        Loaded data, with files stacked along the first axis.
+
+    Notes
+    -----
+    A first pass reads the shape of `data_field` from each file, without loading the data,
+    which is used to preallocate the output. The data are then read directly into the output.
+    Only `data_field` is read from each file. MATLAB v7.3 (HDF5) files are also supported,
+    which requires the optional dependency `h5py`.
+
+    Raises a KeyError if `data_field` is not a variable in any of the files.
+    """
+
+    file_paths = [check_folder(file, folder) for file in files]
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        variables = list(executor.map(lambda path: _get_mat_var(path, data_field), file_paths))
+    shapes = [shape for shape, _ in variables]
+
+    if dtype is None:
+        dtype = np.result_type(*[var_dtype for _, var_dtype in variables])
+        if len(set(shapes)) > 1 and pad:
+            dtype = np.result_type(dtype, np.float32)
+
+    # Preallocate output: stacked if shapes are consistent, otherwise padded or ragged
+    if len(set(shapes)) == 1:
+        data = np.empty((len(files), *shapes[0]), dtype=dtype)
+    elif pad:
+        if len(set(len(shape) for shape in shapes)) > 1:
+            msg = 'Cannot pad data with different numbers of dimensions across files: {}'
+            raise ValueError(msg.format({file : shape for file, shape in zip(files, shapes)}))
+        data = np.full((len(files), *np.max(shapes, axis=0)), np.nan, dtype=dtype)
+    else:
+        data = [np.empty(shape, dtype=dtype) for shape in shapes]
+
+    # Read data from each file directly into the output
+    def _read_file(ind):
+        data[ind][tuple(slice(0, size) for size in shapes[ind])] = \
+            _load_mat_field(file_paths[ind], data_field)
 
-    data = []
-    for file in files:
-        loaded = loadmat(check_folder(file, folder), squeeze_me=True)
-        data.append(loaded[data_field])
-    data = np.array(data)
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        list(executor.map(_read_file, range(len(files))))
 
     return data
 
 
-def load_eeg_demo_group_data(data_path):
-    """Helper function to load complete group of demo EEG data."""
+def load_eeg_demo_group_data(data_path, mmap=True):
+    """Helper function to load complete group of demo EEG data.
+
+    Parameters
+    ----------
+    data_path : Path
+        Path to the data files.
+    mmap : bool, optional, default: True
+        Whether to memory-map the data files, returning a lazy view of the stacked data.
+        If False, the data are loaded into memory and stacked as an array.
+
+    Returns
+    -------
+    group_data : LazyStack or 3d array
+        Group data, organized as [subjects, channels, timepoints].
+    """
 
-    data1 = np.load(data_path / 'rtPB_extracted_block.npy')
-    data2 = np.load(data_path / 'PBA_extracted_block.npy')
-    group_data = np.vstack([data1, data2])
+    mmap_mode = 'r' if mmap else None
+    data1 = np.load(data_path / 'rtPB_extracted_block.npy', mmap_mode=mmap_mode)
+    data2 = np.load(data_path / 'PBA_extracted_block.npy', mmap_mode=mmap_mode)
+
+    if mmap:
+        group_data = LazyStack([data1, data2])
+    else:
+        group_data = np.vstack([data1, data2])
 
     return group_data
 
@@ -41,6 +139,8 @@ def load_eeg_demo_group_data(data_path):
 def load_eeg_demo_info(data_path):
     """Helper function to load montage & info for demo EEG data."""
 
+    import mne
+
     with open(data_path / 'ch_names.txt') as file:
         ch_names = [str(line.strip()) for line in file]
 
@@ -52,9 +152,36 @@ def load_eeg_demo_info(data_path):
 
 ## EEG2: DEV DATA
 
+def load_eeg_dev_group_data(data_path, condition=0, mmap=True):
+    """Helper function to load the group of dev EEG data, for a given condition.
+
+    Parameters
+    ----------
+    data_path : Path
+        Path to the data files.
+    condition : int, optional, default: 0
+        Index of the condition to select.
+    mmap : bool, optional, default: True
+        Whether to memory-map the data file, returning a view of the selected condition.
+        If False, the data are loaded into memory.
+
+    Returns
+    -------
+    group_data : 3d array
+        Group data, organized as [subjects, channels, timepoints].
+    """
+
+    data = np.load(data_path / 'MIPDB_extracted_block.npy', mmap_mode='r' if mmap else None)
+    group_data = data[:, condition, :, :]
+
+    return group_data
+
+
 def load_eeg_dev_info(data_path):
     """Helper function to load montage & info for dev EEG data."""
 
+    import mne
+
     # Read in list of channel names that are kept in reduced 111 montage
     with open(data_path / 'chans111.csv', 'r') as csv_file:
         reader = csv.reader(csv_file)
@@ -72,23 +199,17 @@ def load_eeg_dev_info(data_path):
 def load_ieeg_file(file, folder, max_time=None, return_channels=False):
     """Helper function to load a file of iEEG data."""
 
+    from mne.io import read_raw_edf
+
     edf = read_raw_edf(folder / file, verbose=False)
 
-    # Extract data attributes of interest from object
-    times = edf.times
-    data = np.array(edf.get_data())
+    # Restrict data to times of interest, before loading the data
+    n_times = _get_n_times(edf, max_time)
+    times = edf.times[:n_times].astype('float32')
+    data = edf.get_data(stop=n_times).astype('float32')
 
     # Collect channel names, and strip 'W' marker
-    ch_names = [ch[0:-1] for ch in edf.ch_names]
-
-    # Restrict data to times of interest
-    if max_time:
-        mask = times < max_time
-        data = data[:, mask]
-        times = times[mask]
-
-    times = times.astype('float32')
-    data = data.astype('float32')
+    ch_names = _get_ch_names(edf)
 
     if not return_channels:
         return times, data
@@ -96,22 +217,91 @@ def load_ieeg_file(file, folder, max_time=None, return_channels=False):
         return times, data, ch_names
 
 
-def load_ieeg_all(files, folder, max_time=None, exclude_files=None, return_channels=False):
-    """Helper function to load all iEEG data together."""
+def load_ieeg_all(files, folder, max_time=None, exclude_files=None, return_channels=False,
+                  n_jobs=1, cache_path=None):
+    """Helper function to load all iEEG data together.
+
+    Parameters
+    ----------
+    files : list of str
+        File names to load.
+    folder : str or Path
+        Folder containing the files.
+    max_time : float, optional
+        Time, in seconds, to restrict the data to.
+    exclude_files : list of str, optional
+        File names to skip.
+    return_channels : bool, optional, default: False
+        Whether to return the channel names.
+    n_jobs : int, optional, default: 1
+        Number of threads to use to read files in parallel. If -1, uses all available cores.
+    cache_path : str or Path, optional
+        Folder to cache the loaded data in. If provided, the data are saved as a `.npy` file,
+        with a channel name index, keyed by the file modification times and `max_time`.
+        If a matching cache exists, the data are loaded from it, as a memory-mapped array.
+
+    Returns
+    -------
+    all_data : 2d array
+        Data, as float32, organized as [channels, timepoints].
+    all_chs : list of str
+        Channel names. Only returned if `return_channels` is True.
+
+    Notes
+    -----
+    Each file is truncated to `max_time` before its data are read, and is written
+    directly into a preallocated output array (or the memory-mapped cache file).
+    """
+
+    from mne.io import read_raw_edf
+
+    folder = Path(folder)
+    if exclude_files:
+        files = [file for file in files if file not in exclude_files]
+
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+
+    if cache_path:
+        cache_file, chs_file = _get_ieeg_cache_files(files, folder, max_time, cache_path)
+        if chs_file.exists():
+            all_data = np.load(cache_file, mmap_mode='r')
+            with open(chs_file) as f_obj:
+                all_chs = json.load(f_obj)
+            return (all_data, all_chs) if return_channels else all_data
+
+    # Read file headers, to get the output shape
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        edfs = list(executor.map(lambda file: read_raw_edf(folder / file, verbose=False), files))
+    n_times = [_get_n_times(edf, max_time) for edf in edfs]
+    if len(set(n_times)) > 1:
+        raise ValueError('Files have different numbers of timepoints.')
+    ch_inds = np.cumsum([0] + [len(edf.ch_names) for edf in edfs])
+
+    # Preallocate output, either in memory or as the cache file
+    shape = (int(ch_inds[-1]), n_times[0])
+    if cache_path:
+        temp_file = cache_file.with_name(cache_file.stem + '_' + str(os.getpid()) + '.tmp.npy')
+        all_data = np.lib.format.open_memmap(temp_file, 'w+', 'float32', shape)
+    else:
+        all_data = np.empty(shape, dtype='float32')
 
-    all_data = []
-    all_chs = []
-    for file in files:
+    # Read data from each file directly into its slice of the output array
+    def _read_file(ind):
+        all_data[ch_inds[ind]:ch_inds[ind + 1], :] = edfs[ind].get_data(stop=n_times[ind])
 
-        if exclude_files:
-            if file in exclude_files:
-                continue
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        list(executor.map(_read_file, range(len(edfs))))
 
-        _, data, chs = load_ieeg_file(file, folder, max_time=max_time, return_channels=True)
-        all_data.append(data)
-        all_chs.extend(chs)
+    all_chs = [ch for edf in edfs for ch in _get_ch_names(edf)]
 
-    all_data = np.vstack(all_data)
+    # Finalize cache: the channel index is written last, marking the cache as complete
+    if cache_path:
+        all_data.flush()
+        del all_data
+        os.replace(temp_file, cache_file)
+        with open(chs_file, 'w') as f_obj:
+            json.dump(all_chs, f_obj)
+        all_data = np.load(cache_file, mmap_mode='r')
 
     if not return_channels:
         return all_data
@@ -120,22 +310,166 @@ def load_ieeg_all(files, folder, max_time=None, exclude_files=None, return_chann
 
 
 def load_ieeg_metadata(path):
-    """Load metadata files for the iEEG dataset."""
+    """Load metadata files for the iEEG dataset.
+
+    Notes
+    -----
+    Channel information is indexed by channel name, and patient information is indexed by
+    patient ID, for use as lookup tables. The indexed columns are also kept as columns.
+    """
+
+    import pandas as pd
 
     ch_info = pd.read_csv(path / 'ChannelInformation.csv', dtype = {'Channel name': str})
     ch_info['Channel name'] = [ch[1:-1] for ch in ch_info['Channel name']]
+    ch_info = ch_info.set_index('Channel name', drop=False)
 
     patient_info = pd.read_csv(path / 'PatientInformation.csv')
+    patient_info = patient_info.set_index('ID', drop=False)
+
     region_info = pd.read_csv(path / 'RegionInformation.csv')
 
     return ch_info, patient_info, region_info
 
 
-def get_patient_info(chs, ch_info, patient_info):
-    """Get patient information, based on a set of channel labels."""
+def get_patient_info(chs, ch_info, patient_info, missing='raise'):
+    """Get patient information, based on a set of channel labels.
+
+    Parameters
+    ----------
+    chs : list of str
+        Channel names.
+    ch_info, patient_info : pd.DataFrame
+        Channel and patient information, as returned by `load_ieeg_metadata`.
+    missing : {'raise', 'nan'}
+        How to handle channels that are not in the channel information, and patients that
+        are not in the patient information. If 'raise', raises an error.
+        If 'nan', sets the patient and / or age as NaN.
+
+    Returns
+    -------
+    patients : 1d array
+        Patient ID for each channel. If any channels are missing, with `missing` as 'nan',
+        this is an object array, which keeps the IDs of the other channels as they are.
+    ages : 1d array
+        Patient age for each channel.
+    """
+
+    if missing not in ('raise', 'nan'):
+        raise ValueError("Missing input not understood. Should be one of {'raise', 'nan'}.")
+
+    ch_table = _get_lookup(ch_info, 'Channel name')
+    patient_table = _get_lookup(patient_info, 'ID')
+
+    # Reindex as objects, such that patient IDs are not cast to float if channels are missing
+    patients = ch_table['Patient'].astype(object).reindex(chs)
+
+    if missing == 'raise' and patients.isna().any():
+        msg = 'Channels not found in channel information: {}'.format(\
+            list(patients.index[patients.isna()]))
+        raise ValueError(msg)
+
+    missing_ids = set(patients.dropna()) - set(patient_table.index)
+    if missing == 'raise' and missing_ids:
+        msg = 'Patients not found in patient information: {}'.format(sorted(missing_ids))
+        raise ValueError(msg)
+
+    ages = patient_table['Age at time of study'].reindex(patients.values)
 
-    patients = [ch_info[ch_info['Channel name'] == ch]['Patient'].values[0] for ch in chs]
-    ages = [patient_info[patient_info['ID'] == patient]['Age at time of study'].values[0] \
-        for patient in patients]
+    if not patients.isna().any():
+        patients = patients.astype(ch_table['Patient'].dtype)
 
-    return np.array(patients), np.array(ages)
+    return patients.values, ages.values
+
+
+def _get_n_times(edf, max_time=None):
+    """Get the number of timepoints in an EDF file, restricted to before a max time."""
+
+    return int(np.sum(edf.times < max_time)) if max_time else len(edf.times)
+
+
+def _get_ch_names(edf):
+    """Get channel names from an EDF file, stripping the 'W' marker."""
+
+    return [ch[0:-1] for ch in edf.ch_names]
+
+
+def _get_ieeg_cache_files(files, folder, max_time, cache_path):
+    """Get cache file names for a set of iEEG files, keyed by file modification times."""
+
+    key_info = [(file, os.path.getmtime(folder / file)) for file in files] + [max_time]
+    key = hashlib.md5(json.dumps(key_info).encode()).hexdigest()[:16]
+
+    cache_path = Path(cache_path)
+    cache_path.mkdir(parents=True, exist_ok=True)
+
+    return cache_path / ('ieeg_' + key + '.npy'), cache_path / ('ieeg_' + key + '_chs.json')
+
+
+def _get_lookup(info, column):
+    """Get a lookup table from an information table, indexed by a given column.
+
+    If the same label appears more than once, the first entry is used.
+    """
+
+    if info.index.name != column:
+        info = info.set_index(column, drop=False)
+
+    return info[~info.index.duplicated(keep='first')]
+
+
+def _is_mat_hdf5(file_path):
+    """Check if a .mat file is a MATLAB v7.3 (HDF5) file."""
+
+    return matfile_version(file_path)[0] == 2
+
+
+def _get_mat_var(file_path, data_field):
+    """Get the (squeezed) shape and data type of a variable in a .mat file, without loading it."""
+
+    if _is_mat_hdf5(file_path):
+        h5py = _import_h5py()
+        with h5py.File(file_path, 'r') as h5file:
+            variable = h5file.get(data_field)
+            if isinstance(variable, h5py.Dataset):
+                shape, dtype = variable.shape[::-1], variable.dtype
+            else:
+                shape = None
+    else:
+        variables = {var[0] : var[1:] for var in whosmat(file_path)}
+        if data_field in variables:
+            shape, mat_class = variables[data_field]
+            dtype = np.dtype(MAT_DTYPES.get(mat_class, 'float64'))
+        else:
+            shape = None
+
+    if shape is None:
+        msg = 'Variable {!r} not found in file: {}'.format(data_field, file_path)
+        raise KeyError(msg)
+
+    return tuple(size for size in shape if size != 1), dtype
+
+
+def _import_h5py():
+    """Import h5py, which is needed for MATLAB v7.3 files, with an informative error."""
+
+    try:
+        import h5py
+    except ImportError as error:
+        msg = 'Loading MATLAB v7.3 (HDF5) files requires h5py, which is not installed.'
+        raise ImportError(msg) from error
+
+    return h5py
+
+
+def _load_mat_field(file_path, data_field):
+    """Load a single variable from a .mat file, reading only the requested variable."""
+
+    if _is_mat_hdf5(file_path):
+        h5py = _import_h5py()
+        with h5py.File(file_path, 'r') as h5file:
+            data = np.squeeze(h5file[data_field][()].T)
+    else:
+        data = loadmat(file_path, squeeze_me=True, variable_names=[data_field])[data_field]
+
+    return data
@@ -4,6 +4,8 @@ import os
 from pathlib import Path
 
 from apm.io.io import get_files
+from apm.io.store import ResultsStore
+from apm.io.cache import ArtifactCache
 
 ###################################################################################################
 ###################################################################################################
@@ -23,6 +25,8 @@ class APMDB():
         Path to power spectra.
     fooof_path : str
         Path to FOOOF files.
+    cache_path : str
+        Path to cached artifacts.
     """
 
     def __init__(self, base_path=None, gen_paths=True):
@@ -49,6 +53,7 @@ class APMDB():
         # Data path subfolders
         self.sims_path = self.data_path / 'sims'
         self.literature_path = self.data_path / 'literature'
+        self.cache_path = self.data_path / 'cache'
 
         # Initialize paths if not already created
         self._mkpath(self.data_path)
@@ -66,6 +71,21 @@ class APMDB():
         return get_files(getattr(self, directory + '_path'), **kwargs)
 
 
+    def get_store(self, name, directory='data'):
+        """Get a results store with a given name, in the specified directory.
+
+        directory: {'data', 'sims', 'literature'}
+        """
+
+        return ResultsStore(getattr(self, directory + '_path') / name)
+
+
+    def get_cache(self, max_size=None):
+        """Get the artifact cache, with an optional maximum size in bytes."""
+
+        return ArtifactCache(self.cache_path, max_size=max_size)
+
+
     def make_fig_name(self, file_name, file_type='pdf'):
         """Return the file path for a figure with a given name."""
 
@@ -0,0 +1,335 @@
+"""Chunked, per-measure storage of results arrays for the aperiodic methods project."""
+
+import os
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from apm.io.utils import check_folder
+
+###################################################################################################
+###################################################################################################
+
+INDEX_FILE = 'index.json'
+
+###################################################################################################
+###################################################################################################
+
+class ResultsStore():
+    """Directory-based store of results, with chunked arrays per measure and a metadata index.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the store directory.
+
+    Attributes
+    ----------
+    index : dict
+        Store index, with an entry per measure, and a metadata dictionary.
+
+    Notes
+    -----
+    Each measure is stored in its own folder, as a set of chunks split along the first axis.
+    Each call to `append` adds a new chunk per measure. Uncompressed chunks are saved as
+    `.npy` files, and are memory-mapped when loading, such that partial reads only load
+    the selected data. Compressed chunks are saved as `.npz` files, and are loaded per chunk.
+    """
+
+    def __init__(self, path):
+        """Initialize ResultsStore object."""
+
+        self.path = Path(path)
+
+        if (self.path / INDEX_FILE).exists():
+            with open(self.path / INDEX_FILE) as index_file:
+                self.index = json.load(index_file)
+        else:
+            self.index = {'measures' : {}, 'metadata' : {}}
+
+
+    def __contains__(self, measure):
+        """Check if a measure is in the store."""
+
+        return measure in self.index['measures']
+
+
+    @property
+    def measures(self):
+        """Labels for all the measures in the store."""
+
+        return list(self.index['measures'].keys())
+
+
+    @property
+    def metadata(self):
+        """Metadata for the store."""
+
+        return self.index['metadata']
+
+
+    def shape(self, measure):
+        """Get the shape of the stored array for a measure."""
+
+        info = self.index['measures'][measure]
+
+        return tuple([sum(chunk['n_rows'] for chunk in info['chunks'])] + info['shape'])
+
+
+    def append(self, results, compress=False, metadata=None):
+        """Append results to the store, as a new chunk per measure.
+
+        Parameters
+        ----------
+        results : dict
+            Results, organized as {label : array_of_results}.
+            Arrays are appended along the first axis.
+        compress : bool, optional, default: False
+            Whether to save the chunks with compression.
+        metadata : dict, optional
+            Metadata to add to the store index. Should be JSON serializable.
+        """
+
+        # Check all measures before writing, such that a mismatch does not leave partial chunks
+        results = {measure : np.asarray(values) for measure, values in results.items()}
+        for measure, values in results.items():
+            if values.ndim == 0:
+                raise ValueError('Appended results for {} must be arrays.'.format(measure))
+            if measure in self and \
+                list(values.shape[1:]) != self.index['measures'][measure]['shape']:
+                msg = 'Shape of appended results for {} does not match.'.format(measure)
+                raise ValueError(msg)
+
+        for measure, values in results.items():
+
+            info = self.index['measures'].setdefault(\
+                measure, {'shape' : list(values.shape[1:]), 'dtype' : str(values.dtype),
+                          'chunks' : []})
+
+            os.makedirs(self.path / measure, exist_ok=True)
+            chunk_name = 'chunk_{:04d}'.format(len(info['chunks']))
+            if compress:
+                chunk_file = chunk_name + '.npz'
+                np.savez_compressed(self.path / measure / chunk_file, values=values)
+            else:
+                chunk_file = chunk_name + '.npy'
+                np.save(self.path / measure / chunk_file, values)
+
+            info['chunks'].append({'file' : chunk_file, 'n_rows' : len(values)})
+
+        if metadata:
+            self.index['metadata'].update(metadata)
+
+        self._save_index()
+
+
+    def load(self, measures=None, select=None):
+        """Load results from the store.
+
+        Parameters
+        ----------
+        measures : str or list of str, optional
+            Measure(s) to load. If not provided, loads all measures.
+        select : int, slice, array or tuple, optional
+            Index to select from each array, such as a subject index, or a tuple of
+            subject and channel indices. If not provided, loads the full arrays.
+
+        Returns
+        -------
+        results : dict
+            Results, organized as {label : array_of_results}.
+        """
+
+        if measures is None:
+            measures = self.measures
+        elif isinstance(measures, str):
+            measures = [measures]
+
+        return {measure : self.load_measure(measure, select) for measure in measures}
+
+
+    def load_measure(self, measure, select=None):
+        """Load results for a single measure from the store.
+
+        Parameters
+        ----------
+        measure : str
+            Measure to load.
+        select : int, slice, array or tuple, optional
+            Index to select from the array. If not provided, loads the full array.
+
+        Returns
+        -------
+        values : array
+            Results for the measure.
+        """
+
+        info = self.index['measures'][measure]
+
+        first, rest = (select[0], select[1:]) if isinstance(select, tuple) else (select, ())
+        if first is None:
+            first = slice(None)
+
+        n_rows = self.shape(measure)[0]
+        inds = np.arange(n_rows)[first]
+        inds_1d = np.atleast_1d(inds)
+
+        # Load the selected rows from each chunk that contains any of them
+        bounds = np.cumsum([0] + [chunk['n_rows'] for chunk in info['chunks']])
+        chunk_ids = np.searchsorted(bounds, inds_1d, side='right') - 1
+        values = []
+        for c_ind in np.unique(chunk_ids):
+            chunk_vals = self._load_chunk(measure, info['chunks'][c_ind]['file'])
+            chunk_inds = inds_1d[chunk_ids == c_ind] - bounds[c_ind]
+            values.append(chunk_vals[chunk_inds][(slice(None),) + rest])
+
+        # Collect values, restoring the order of the selected indices
+        if values:
+            values = np.concatenate(values)[np.argsort(np.argsort(chunk_ids, kind='stable'))]
+        else:
+            values = np.zeros([0] + info['shape'], dtype=info['dtype'])[(slice(None),) + rest]
+
+        return values[0] if np.ndim(inds) == 0 else values
+
+
+    def ref(self, measures=None, select=None):
+        """Make a reference to results in the store, which can be loaded later.
+
+        Parameters
+        ----------
+        measures : str or list of str, optional
+            Measure(s) to refer to. If not provided, refers to all measures.
+        select : int, slice, array or tuple, optional
+            Index to select from each array. If not provided, refers to the full arrays.
+
+        Returns
+        -------
+        ResultsRef
+            Reference to the results.
+        """
+
+        return ResultsRef(self.path, measures, select)
+
+
+    def _load_chunk(self, measure, chunk_file):
+        """Load a chunk, memory-mapping it if it is uncompressed."""
+
+        if chunk_file.endswith('.npz'):
+            with np.load(self.path / measure / chunk_file) as chunk:
+                return chunk['values']
+        else:
+            return np.load(self.path / measure / chunk_file, mmap_mode='r')
+
+
+    def _save_index(self):
+        """Save the store index, writing to a temporary file that is then moved into place."""
+
+        os.makedirs(self.path, exist_ok=True)
+        temp_file = self.path / (INDEX_FILE + '.tmp')
+        with open(temp_file, 'w') as index_file:
+            json.dump(self.index, index_file)
+        os.replace(temp_file, self.path / INDEX_FILE)
+
+
+class ResultsRef():
+    """Reference to results in a results store, which are loaded when used.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the store directory.
+    measures : str or list of str, optional
+        Measure(s) to refer to. If not provided, refers to all measures.
+    select : int, slice, array or tuple, optional
+        Index to select from each array. If not provided, refers to the full arrays.
+
+    Notes
+    -----
+    References are small to pickle, and can be passed to other processes in place of
+    results arrays, with each process loading the results it needs from the store.
+    """
+
+    def __init__(self, path, measures=None, select=None):
+        """Initialize ResultsRef object."""
+
+        self.path = Path(path)
+        self.measures = measures
+        self.select = select
+
+
+    def load(self):
+        """Load the referenced results.
+
+        Returns
+        -------
+        dict or array
+            Results, organized as {label : array_of_results}, or the array of results,
+            if the reference is to a single measure, given as a string.
+        """
+
+        results = ResultsStore(self.path).load(self.measures, self.select)
+
+        return results[self.measures] if isinstance(self.measures, str) else results
+
+###################################################################################################
+###################################################################################################
+
+def save_results(results, f_name, save_path, compress=False, metadata=None, overwrite=True):
+    """Save a dictionary of results arrays to a results store.
+
+    Parameters
+    ----------
+    results : dict
+        Results, organized as {label : array_of_results}.
+    f_name : str
+        Name of the results store.
+    save_path : str or Path
+        Path to the folder to save the results store in.
+    compress : bool, optional, default: False
+        Whether to save with compression.
+    metadata : dict, optional
+        Metadata to save in the store index. Should be JSON serializable.
+    overwrite : bool, optional, default: True
+        Whether to overwrite an existing results store. If False, results are appended.
+
+    Returns
+    -------
+    store : ResultsStore
+        Results store.
+    """
+
+    store_path = check_folder(f_name, save_path)
+
+    if overwrite and (Path(store_path) / INDEX_FILE).exists():
+        shutil.rmtree(store_path)
+
+    store = ResultsStore(store_path)
+    store.append(results, compress=compress, metadata=metadata)
+
+    return store
+
+
+def load_results(f_name, save_path, measures=None, select=None):
+    """Load results arrays from a results store.
+
+    Parameters
+    ----------
+    f_name : str
+        Name of the results store.
+    save_path : str or Path
+        Path to the folder the results store is saved in.
+    measures : str or list of str, optional
+        Measure(s) to load. If not provided, loads all measures.
+    select : int, slice, array or tuple, optional
+        Index to select from each array, such as a subject index, or a tuple of
+        subject and channel indices. If not provided, loads the full arrays.
+
+    Returns
+    -------
+    results : dict
+        Results, organized as {label : array_of_results}.
+    """
+
+    return ResultsStore(check_folder(f_name, save_path)).load(measures, select)
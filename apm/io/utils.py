@@ -2,6 +2,8 @@
 
 from pathlib import Path
 
+import numpy as np
+
 ###################################################################################################
 ###################################################################################################
 
@@ -61,3 +63,86 @@ def check_ext(file_name, extension):
         file_name = file_name.with_suffix(extension)
 
     return file_name
+
+
+class LazyStack():
+    """Lazy view of a set of arrays, stacked along the first axis, without copying the data.
+
+    Parameters
+    ----------
+    arrays : list of array
+        Arrays to stack, such as memory-mapped arrays.
+        All arrays should have the same shape, except for the first axis.
+
+    Notes
+    -----
+    Indexing with an integer along the first axis returns a view of the corresponding array,
+    such that only the selected data are read when using memory-mapped arrays.
+    Any other indexing along the first axis returns a copy.
+    """
+
+    def __init__(self, arrays):
+        """Initialize LazyStack object."""
+
+        if len(set(arr.shape[1:] for arr in arrays)) > 1:
+            raise ValueError('Arrays have inconsistent shapes.')
+
+        self.arrays = arrays
+        self._bounds = np.cumsum([0] + [len(arr) for arr in arrays])
+
+
+    def __len__(self):
+        """Define the length as the size of the stacked first axis."""
+
+        return int(self._bounds[-1])
+
+
+    def __iter__(self):
+        """Iterate across the first axis."""
+
+        for arr in self.arrays:
+            yield from arr
+
+
+    def __getitem__(self, index):
+        """Index into the stacked arrays."""
+
+        first, rest = (index[0], index[1:]) if isinstance(index, tuple) else (index, ())
+
+        if isinstance(first, (int, np.integer)):
+            first = first + len(self) if first < 0 else first
+            if not 0 <= first < len(self):
+                raise IndexError('Index out of range.')
+            arr_ind = np.searchsorted(self._bounds, first, side='right') - 1
+            return self.arrays[arr_ind][(first - self._bounds[arr_ind],) + rest]
+
+        inds = np.arange(len(self))[first]
+        return np.stack([self[int(ind)] for ind in inds])[(slice(None),) + rest]
+
+
+    def __array__(self, dtype=None, copy=None):
+        """Convert to an array, loading all the data."""
+
+        return np.concatenate(self.arrays).astype(dtype) if dtype else \
+            np.concatenate(self.arrays)
+
+
+    @property
+    def shape(self):
+        """Shape of the stacked arrays."""
+
+        return (len(self), ) + self.arrays[0].shape[1:]
+
+
+    @property
+    def ndim(self):
+        """Number of dimensions of the stacked arrays."""
+
+        return self.arrays[0].ndim
+
+
+    @property
+    def dtype(self):
+        """Data type of the stacked arrays."""
+
+        return self.arrays[0].dtype
@@ -1,9 +1,55 @@
-"""Methods related code for the aperiodic methods project."""
+"""Methods related code for the aperiodic methods project.
 
-# Link in functions from antropy to import from here
-from antropy import higuchi_fd, petrosian_fd, katz_fd
-from antropy import sample_entropy, perm_entropy, app_entropy, spectral_entropy
+Notes
+-----
+Functions are loaded lazily, on first access, such that heavy dependencies,
+such as antropy, neurokit2 and fooof, are only imported when they are used.
+"""
 
-# Import local wrapper functions to here
-from .fit import SpectralFits
-from .wrappers import *
+from importlib import import_module
+
+###################################################################################################
+###################################################################################################
+
+# Map of public names to the module they are loaded from
+#   Includes functions linked in from antropy, and local wrapper functions
+_LAZY_NAMES = {
+    'higuchi_fd' : 'antropy',
+    'petrosian_fd' : 'antropy',
+    'katz_fd' : 'antropy',
+    'sample_entropy' : 'antropy',
+    'perm_entropy' : 'antropy',
+    'app_entropy' : 'antropy',
+    'spectral_entropy' : 'antropy',
+    'SpectralFits' : 'apm.methods.fit',
+    'StreamAutocorr' : 'apm.methods.streaming',
+    'StreamExponent' : 'apm.methods.streaming',
+    'StreamPermEntropy' : 'apm.methods.streaming',
+}
+
+_WRAPPERS = ['autocorr', 'autocorr_decay_time', 'autocorr_timescale', 'hurst', 'dfa',
+             'multi_dfa', 'hjorth_activity', 'hjorth_mobility', 'hjorth_complexity', 'lempelziv',
+             'lyapunov', 'correlation_dimension', 'sevcik_fd', 'wperm_entropy',
+             'multi_app_entropy', 'multi_sample_entropy', 'multi_perm_entropy',
+             'multi_wperm_entropy', 'fit_irasa_exp', 'fit_irasa_knee', 'fit_irasa_knee_exp',
+             'IRASA_FIT_FUNCS', 'irasa', 'specparam']
+_LAZY_NAMES.update({name : 'apm.methods.wrappers' for name in _WRAPPERS})
+
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    """Load public functions on first access."""
+
+    if name in _LAZY_NAMES:
+        value = getattr(import_module(_LAZY_NAMES[name]), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    """List module attributes, including lazily loaded functions."""
+
+    return sorted(list(globals()) + __all__)
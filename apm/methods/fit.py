@@ -6,10 +6,10 @@ All these functions have the same design:
 """
 
 import warnings
+from types import MappingProxyType
 
 import numpy as np
 import statsmodels.api as sm
-from scipy.stats import ranksums
 from scipy.optimize import curve_fit
 from sklearn.linear_model import RANSACRegressor
 
@@ -19,7 +19,7 @@ with warnings.catch_warnings():
     from fooof import FOOOF
     from fooof.core.funcs import expo_nk_function as expf
 
-from apm.analysis.error import abs_err
+from apm.analysis.error import abs_err, compute_ranksums, ErrorAccumulator
 from apm.utils.data import exclude_spectrum
 from apm.utils.decorators import CheckDims1D, CheckDims2D
 from apm.methods.settings import ALPHA_RANGE
@@ -28,11 +28,32 @@ from apm.methods.settings import ALPHA_RANGE
 ###################################################################################################
 
 class SpectralFits():
-    """Class object for fitting power spectra using multiple methods."""
-
-    def __init__(self):
+    """Class object for fitting power spectra using multiple methods.
+
+    Parameters
+    ----------
+    keep_errors : bool, optional, default: True
+        Whether to keep all error values. If False, only the error summaries are kept.
+    thresholds : list of float, optional, default: (0.025,)
+        Thresholds to track in the error summaries, for `compute_threshold`.
+
+    Notes
+    -----
+    Error summaries are stored as an `ErrorAccumulator` per method, in `accumulators`,
+    which are merged when objects are added, without needing the error values.
+    If errors are not kept, summary methods use the accumulators, with the median
+    estimated from a quantile sketch, and `compare_errors` is not available.
+
+    Errors are read-only, such that the summaries stay in sync with the error values.
+    To change errors, set `errors`, which updates the summaries.
+    """
+
+    def __init__(self, keep_errors=True, thresholds=(0.025,)):
         """Initialize object."""
 
+        self.keep_errors = keep_errors
+        self.thresholds = tuple(thresholds)
+
         self.fit_funcs = {'OLS' : fit_ols,
                           'OLS-EA' : fit_ols_alph,
                           'OLS-EO' : fit_ols_oscs,
@@ -52,18 +73,58 @@ class SpectralFits():
     def __add__(self, other):
         """Overload addition, to add errors fit across different datasets."""
 
-        out = SpectralFits()
+        return self.merge([self, other])
+
+
+    def __len__(self):
+        """"Define length of the object as the number of computed errors."""
+
+        return len(self.errors[self.labels[0]]) if self.keep_errors else \
+            self.accumulators[self.labels[0]].n_total
+
+
+    @classmethod
+    def merge(cls, all_fits):
+        """Merge a set of objects, such as partial results from parallel workers or batches.
 
-        for key in other.errors.keys():
-            out.errors[key] = np.append(self.errors[key], other.errors[key])
+        Parameters
+        ----------
+        all_fits : list of SpectralFits
+            Objects to merge.
+
+        Returns
+        -------
+        out : SpectralFits
+            Merged object. Errors are only kept if they are kept in all the input objects.
+        """
+
+        out = cls(keep_errors=all(fits.keep_errors for fits in all_fits),
+                  thresholds=all_fits[0].thresholds)
+
+        for key in out.labels:
+            for fits in all_fits:
+                out.accumulators[key].merge(fits.accumulators[key])
+            if out.keep_errors:
+                out._errors[key] = _read_only(np.concatenate([fits.errors[key] \
+                    for fits in all_fits]))
 
         return out
 
 
-    def __len__(self):
-        """"Define length of the object as the number of computed errors."""
+    @property
+    def errors(self):
+        """Fitting errors per method, as a read-only mapping of read-only arrays."""
+
+        return MappingProxyType(self._errors)
 
-        return len(self.errors[self.labels[0]])
+
+    @errors.setter
+    def errors(self, errors):
+        """Set fitting errors per method, such as loaded from file, updating the summaries."""
+
+        self._errors = {key : _read_only(np.array(errors[key], dtype=float)) \
+            for key in self.labels}
+        self._update_accumulators()
 
 
     @property
@@ -83,49 +144,71 @@ class SpectralFits():
     def initialize_error_dict(self, n_psds):
         """Create a dictionary to store fitting errors."""
 
-        self.errors = dict()
+        self._errors = dict()
         for key in self.labels:
-            self.errors[key] = np.zeros(n_psds)
+            self._errors[key] = _read_only(np.zeros(n_psds))
+
+        self.accumulators = {key : ErrorAccumulator(self.thresholds) for key in self.labels}
 
 
     def fit_spectra(self, exp, freqs, powers):
-        """Fit spectra with available methods."""
+        """Fit spectra with available methods.
+
+        Note: `exp` can be a single value, or an array with one value per spectrum.
+        """
 
         n_psds, _ = powers.shape
         self.initialize_error_dict(n_psds)
 
+        exps = np.broadcast_to(exp, n_psds)
+
+        errors = {key : np.zeros(n_psds) for key in self.labels}
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore")
             for ki, fn in self.fit_funcs.items():
                 for ind in range(n_psds):
                     try:
-                        self.errors[ki][ind] = abs_err(-exp, fn(freqs, powers[ind, :]))
+                        errors[ki][ind] = abs_err(-exps[ind], fn(freqs, powers[ind, :]))
                     except:
-                        self.errors[ki][ind] = np.nan
+                        errors[ki][ind] = np.nan
+
+        self.errors = errors
+
+        if not self.keep_errors:
+            self._errors = {key : np.zeros(0) for key in self.labels}
+
+
+    def _update_accumulators(self):
+        """Recompute the error summaries from the error values."""
+
+        self.accumulators = {key : ErrorAccumulator(self.thresholds).add(self.errors[key]) \
+            for key in self.labels}
 
 
     def compare_errors(self):
         """Compare error distributions between methods."""
 
-        comps = np.zeros([self.n_methods, self.n_methods])
+        if not self.keep_errors:
+            raise ValueError('Comparing errors requires errors to be kept.')
 
-        for ii, ki in enumerate(self.labels):
-            for ij, kj in enumerate(self.labels):
-                stat, p_val = ranksums(self.errors[ki], self.errors[kj], nan_policy='omit')
-                comps[ii, ij] = p_val
+        _, comps = compute_ranksums([self.errors[key] for key in self.labels])
 
         return comps
 
 
     def compute_avg_errors(self, avg='median'):
-        """Compute average errors per method."""
+        """Compute average errors per method.
+
+        Note: if errors are not kept, the median is estimated from the error summaries.
+        """
 
         avg_errors = []
-        for key, vals in self.errors.items():
+        for key, accumulator in self.accumulators.items():
             if avg == 'median':
-                avg_errors.append((np.nanmedian(vals), key))
+                avg_errors.append((np.nanmedian(self.errors[key]) if self.keep_errors \
+                    else accumulator.median(), key))
             elif avg == 'mean':
-                avg_errors.append((np.nanmean(vals), key))
+                avg_errors.append((accumulator.mean if accumulator.count else np.nan, key))
             else:
                 raise ValueError('Average type not understood')
         avg_errors.sort()
@@ -137,8 +220,8 @@ class SpectralFits():
         """Compute standard deviation of error per method."""
 
         std_errors = []
-        for key, vals in self.errors.items():
-            std_errors.append((np.nanstd(vals), key))
+        for key, accumulator in self.accumulators.items():
+            std_errors.append((accumulator.std, key))
         std_errors.sort()
 
         return std_errors
@@ -150,17 +233,30 @@ class SpectralFits():
         """
 
         percent = []
-        for key, vals in self.errors.items():
-            if direction == 'below':
-                percent.append((sum(vals < thresh) / len(vals) * 100, key))
+        for key, accumulator in self.accumulators.items():
+            if thresh in self.thresholds or not self.keep_errors:
+                percent.append((accumulator.percent_threshold(thresh, direction), key))
+            elif direction == 'below':
+                vals = self.errors[key]
+                percent.append((sum(vals < thresh) / len(vals) * 100 if len(vals) else np.nan,
+                                key))
             elif direction == 'above':
-                percent.append((sum(vals > thresh) / len(vals) * 100, key))
+                vals = self.errors[key]
+                percent.append((sum(vals > thresh) / len(vals) * 100 if len(vals) else np.nan,
+                                key))
         percent.sort()
         percent.reverse()
 
         return percent
 
 
+def _read_only(array):
+    """Set an array to be read-only, returning it."""
+
+    array.setflags(write=False)
+
+    return array
+
 ###################################################################################################
 ###################################################################################################
 
@@ -0,0 +1,267 @@
+"""Streaming estimators of aperiodic measures, updated incrementally per block of samples.
+
+Each estimator keeps running state across blocks of data, organized as [channels, samples],
+such that each update only processes the new block, at a cost that does not grow with the
+number of samples seen so far, and estimates can be computed at any point, without
+recomputing from the full signal. Estimates match the equivalent wrapper functions,
+applied to all the data seen so far.
+"""
+
+from math import factorial
+
+import numpy as np
+from scipy.signal import get_window, fftconvolve
+
+###################################################################################################
+###################################################################################################
+
+class StreamAutocorr():
+    """Streaming autocorrelation, matching `autocorr` applied to all samples seen so far.
+
+    Parameters
+    ----------
+    n_chs : int
+        Number of channels.
+    max_lag : int, optional, default: 1000
+        Maximum lag to compute autocorrelations for, in samples.
+    lag_step : int, optional, default: 1
+        Step size (lag advance) for computing autocorrelations.
+
+    Notes
+    -----
+    State is the running sum of lagged products, for each lag, the running sum of the signal,
+    and the first and last `max_lag` samples, which are used to demean the lagged products.
+    Lagged products of each block are computed for all lags at once, as a cross-correlation
+    with FFTs, such that each update is O((block + max_lag) log(block + max_lag)).
+    """
+
+    def __init__(self, n_chs, max_lag=1000, lag_step=1):
+        """Initialize StreamAutocorr object."""
+
+        self.max_lag = max_lag
+        self.lag_step = lag_step
+
+        self.n_samples = 0
+        self.total = np.zeros(n_chs)
+        self.lag_sums = np.zeros([n_chs, max_lag + 1])
+        self.head = np.zeros([n_chs, 0])
+        self.tail = np.zeros([n_chs, max_lag])
+
+
+    def update(self, block):
+        """Update the running state with a new block of samples, as [channels, samples]."""
+
+        block = np.atleast_2d(block)
+        n_block = block.shape[1]
+
+        # Cross-correlate the block with the extended signal, as products at each lag
+        extended = np.concatenate([self.tail, block], axis=1)
+        products = fftconvolve(extended, block[:, ::-1], mode='valid', axes=1)
+        self.lag_sums += products[:, ::-1]
+
+        self.total += block.sum(axis=1)
+        self.n_samples += n_block
+        if self.head.shape[1] < self.max_lag:
+            self.head = np.concatenate([self.head, block], axis=1)[:, :self.max_lag]
+        self.tail = extended[:, -self.max_lag:] if self.max_lag else self.tail
+
+
+    def estimate(self):
+        """Estimate the autocorrelation.
+
+        Returns
+        -------
+        autocorrs : 2d array
+            Autocorrelation values, across time lags, as [channels, lags].
+        """
+
+        if self.n_samples <= self.max_lag:
+            return np.full([len(self.total), len(range(0, self.max_lag + 1, self.lag_step))],
+                           np.nan)
+
+        lags = np.arange(self.max_lag + 1)
+        mean = self.total[:, np.newaxis] / self.n_samples
+
+        # Sums of the signal excluding the last / first `lag` samples, to demean lagged products
+        last_sums = np.concatenate([np.zeros([len(self.total), 1]),
+                                    np.cumsum(self.tail[:, ::-1], axis=1)], axis=1)
+        first_sums = np.concatenate([np.zeros([len(self.total), 1]),
+                                     np.cumsum(self.head, axis=1)], axis=1)
+        lead_sums = self.total[:, np.newaxis] - last_sums
+        lagged_sums = self.total[:, np.newaxis] - first_sums
+
+        autocovs = self.lag_sums - mean * (lead_sums + lagged_sums) + \
+            (self.n_samples - lags) * mean ** 2
+        autocorrs = autocovs / autocovs[:, :1]
+
+        return autocorrs[:, ::self.lag_step]
+
+
+class StreamExponent():
+    """Streaming aperiodic exponent, from a running Welch power spectrum.
+
+    Parameters
+    ----------
+    n_chs : int
+        Number of channels.
+    fs : float
+        Sampling rate, in Hz.
+    f_range : list of [float, float]
+        Frequency range to fit the exponent across.
+    nperseg : int, optional
+        Length of each segment, in samples. Defaults to `fs`, as in `compute_spectrum`.
+    noverlap : int, optional
+        Number of samples to overlap between segments. Defaults to `nperseg // 8`.
+    flip_sign : bool, optional, default: True
+        Whether to sign-flip the exponent, to match specparam format, as in `irasa`.
+
+    Notes
+    -----
+    State is the running sum of the periodograms of each complete segment, and any samples
+    that are not yet part of a complete segment. The exponent is fit as a line in log-log
+    space, as in `fit_irasa_exp`, solved in closed form across all channels together.
+    """
+
+    def __init__(self, n_chs, fs, f_range, nperseg=None, noverlap=None, flip_sign=True):
+        """Initialize StreamExponent object."""
+
+        self.fs = fs
+        self.f_range = f_range
+        self.nperseg = int(fs) if nperseg is None else nperseg
+        self.noverlap = self.nperseg // 8 if noverlap is None else noverlap
+        self.flip_sign = flip_sign
+
+        self.window = get_window('hann', self.nperseg)
+        self.scale = 1. / (fs * np.sum(self.window ** 2))
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1. / fs)
+
+        self.n_segs = 0
+        self.psd_sum = np.zeros([n_chs, len(self.freqs)])
+        self.buffer = np.zeros([n_chs, 0])
+
+
+    def update(self, block):
+        """Update the running state with a new block of samples, as [channels, samples]."""
+
+        extended = np.concatenate([self.buffer, np.atleast_2d(block)], axis=1)
+
+        step = self.nperseg - self.noverlap
+        starts = np.arange(0, extended.shape[1] - self.nperseg + 1, step)
+        if len(starts):
+            segs = np.lib.stride_tricks.sliding_window_view(\
+                extended, self.nperseg, axis=1)[:, starts, :]
+            segs = segs - segs.mean(axis=-1, keepdims=True)
+            powers = np.abs(np.fft.rfft(segs * self.window, axis=-1)) ** 2 * self.scale
+            powers[..., 1:-1 if self.nperseg % 2 == 0 else None] *= 2
+            self.psd_sum += powers.sum(axis=1)
+            self.n_segs += len(starts)
+
+        next_start = starts[-1] + step if len(starts) else 0
+        self.buffer = extended[:, next_start:]
+
+
+    def spectrum(self):
+        """Get the running average power spectrum.
+
+        Returns
+        -------
+        freqs : 1d array
+            Frequency values.
+        powers : 2d array
+            Power values, as [channels, frequencies].
+        """
+
+        return self.freqs, self.psd_sum / self.n_segs if self.n_segs else \
+            np.full(self.psd_sum.shape, np.nan)
+
+
+    def estimate(self):
+        """Estimate the aperiodic exponent.
+
+        Returns
+        -------
+        exponents : 1d array
+            Aperiodic exponent per channel.
+        """
+
+        freqs, powers = self.spectrum()
+        f_mask = (freqs >= self.f_range[0]) & (freqs <= self.f_range[1])
+
+        log_freqs = np.log10(freqs[f_mask])
+        log_powers = np.log10(powers[:, f_mask])
+
+        # Fit slope in log-log space, with ordinary least squares across all channels
+        freqs_dm = log_freqs - log_freqs.mean()
+        slopes = log_powers @ freqs_dm / np.sum(freqs_dm ** 2)
+
+        return -slopes if self.flip_sign else slopes
+
+
+class StreamPermEntropy():
+    """Streaming permutation entropy, matching `perm_entropy` applied to all samples seen so far.
+
+    Parameters
+    ----------
+    n_chs : int
+        Number of channels.
+    order : int, optional, default: 3
+        Order of the permutation entropy.
+    delay : int, optional, default: 1
+        Time delay (lag), in samples.
+    normalize : bool, optional, default: False
+        Whether to normalize the entropy to be between 0 and 1.
+
+    Notes
+    -----
+    State is a histogram of ordinal patterns per channel, and the last samples of the
+    previous block, such that patterns that span block boundaries are counted.
+    """
+
+    def __init__(self, n_chs, order=3, delay=1, normalize=False):
+        """Initialize StreamPermEntropy object."""
+
+        self.order = order
+        self.delay = delay
+        self.normalize = normalize
+
+        self.span = (order - 1) * delay + 1
+        self.hashmult = np.power(order, np.arange(order))
+        self.counts = np.zeros([n_chs, order ** order], dtype=int)
+        self.tail = np.zeros([n_chs, 0])
+
+
+    def update(self, block):
+        """Update the running state with a new block of samples, as [channels, samples]."""
+
+        extended = np.concatenate([self.tail, np.atleast_2d(block)], axis=1)
+
+        if extended.shape[1] >= self.span:
+            embedded = np.lib.stride_tricks.sliding_window_view(\
+                extended, self.span, axis=1)[..., ::self.delay]
+            hashvals = embedded.argsort(axis=-1, kind='stable') @ self.hashmult
+
+            n_chs, n_bins = self.counts.shape
+            offsets = np.arange(n_chs)[:, np.newaxis] * n_bins
+            self.counts += np.bincount((hashvals + offsets).ravel(),
+                                       minlength=n_chs * n_bins).reshape(n_chs, n_bins)
+
+        self.tail = extended[:, max(0, extended.shape[1] - self.span + 1):]
+
+
+    def estimate(self):
+        """Estimate the permutation entropy.
+
+        Returns
+        -------
+        entropies : 1d array
+            Permutation entropy per channel.
+        """
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probs = self.counts / self.counts.sum(axis=1, keepdims=True)
+            entropies = -np.sum(np.where(probs > 0, probs * np.log2(probs), 0.), axis=1)
+
+        if self.normalize:
+            entropies = np.clip(entropies / np.log2(factorial(self.order)), 0., 1.)
+
+        return entropies
@@ -3,20 +3,9 @@
 import warnings
 
 import numpy as np
-from scipy.optimize import curve_fit
 
-from antropy import hjorth_params, lziv_complexity
-from neurokit2.complexity import (fractal_correlation, fractal_sevcik, complexity_lyapunov,
-                                  complexity_wpe, complexity_mfdfa, entropy_multiscale)
-
-from fooof import FOOOF
-from fooof.core.funcs import expo_function
-from fooof.core.errors import NoModelError
-
-from neurodsp.spectral import compute_spectrum
-from neurodsp.aperiodic.dfa import compute_fluctuations
-from neurodsp.aperiodic.irasa import compute_irasa, fit_irasa
-from neurodsp.aperiodic.autocorr import compute_autocorr, compute_decay_time, fit_autocorr
+# Note: dependencies are imported within each wrapper, such that importing this module is fast,
+#   and only the dependencies of the measures that are used get loaded (for example, in workers)
 
 ###################################################################################################
 ###################################################################################################
@@ -26,18 +15,24 @@ from neurodsp.aperiodic.autocorr import compute_autocorr, compute_decay_time, fi
 def autocorr(sig, **kwargs):
     """Wrapper funtion for computing autocorrelation."""
 
+    from neurodsp.aperiodic.autocorr import compute_autocorr
+
     return compute_autocorr(sig, **kwargs)[1]
 
 
 def autocorr_decay_time(sig, fs, level=0, **kwargs):
     """Wrapper function for computing the autocorrelation & decay time together."""
 
+    from neurodsp.aperiodic.autocorr import compute_autocorr, compute_decay_time
+
     return compute_decay_time(*compute_autocorr(sig, **kwargs), fs, level)
 
 
 def autocorr_timescale(sig, fs, **kwargs):
     """Wrapper function for computing autocorrelation and timescale together."""
 
+    from neurodsp.aperiodic.autocorr import compute_autocorr, fit_autocorr
+
     return fit_autocorr(*compute_autocorr(sig, **kwargs), fs)[0]
 
 
@@ -46,18 +41,24 @@ def autocorr_timescale(sig, fs, **kwargs):
 def hurst(sig, **kwargs):
     """Wrapper function for computing the Hurst exponent."""
 
+    from neurodsp.aperiodic.dfa import compute_fluctuations
+
     return compute_fluctuations(sig, method='rs', **kwargs)[2]
 
 
 def dfa(sig, **kwargs):
     """Wrapper function for computing DFA."""
 
+    from neurodsp.aperiodic.dfa import compute_fluctuations
+
     return compute_fluctuations(sig, method='dfa', **kwargs)[2]
 
 
 def multi_dfa(sig, return_val='Width', **kwargs):
     """Wrapper function for computing multiscale / multifractal DFA."""
 
+    from neurokit2.complexity import complexity_mfdfa
+
     mfdfa, info = complexity_mfdfa(sig, **kwargs)
 
     return mfdfa[return_val].values[0]
@@ -68,20 +69,25 @@ def multi_dfa(sig, return_val='Width', **kwargs):
 def hjorth_activity(sig):
     """Wrapper function for computing Hjorth activity.
     Note: 'Hjorth activity' is the variance of the signal.
+    Note: also accepts 2d arrays, returning the activity of each row.
     """
 
-    return np.var(sig)
+    return np.var(sig, axis=-1)
 
 
 def hjorth_mobility(sig):
     """Wrapper function for computing Hjorth mobility."""
 
+    from antropy import hjorth_params
+
     return hjorth_params(sig)[0]
 
 
 def hjorth_complexity(sig):
     """Wrapper function for computing Hjorth complexity."""
 
+    from antropy import hjorth_params
+
     return hjorth_params(sig)[1]
 
 
@@ -89,6 +95,8 @@ def lempelziv(sig, **kwargs):
     """Wrapper function for computing Lempel-Ziv complexity.
     Note: LZ complexity is computed on a binarized version of the signal."""
 
+    from antropy import lziv_complexity
+
     bin_sig = np.array(sig > np.median(sig)).astype(int)
     return lziv_complexity(bin_sig, **kwargs)
 
@@ -96,6 +104,8 @@ def lempelziv(sig, **kwargs):
 def lyapunov(sig, **kwargs):
     """Wrapper function for computing Lyapunov exponent."""
 
+    from neurokit2.complexity import complexity_lyapunov
+
     return complexity_lyapunov(sig)[0]
 
 
@@ -104,12 +114,16 @@ def lyapunov(sig, **kwargs):
 def correlation_dimension(sig, **kwargs):
     """Wrapper function for computing correlation dimension."""
 
+    from neurokit2.complexity import fractal_correlation
+
     return fractal_correlation(sig, **kwargs)[0]
 
 
 def sevcik_fd(sig, **kwargs):
     """Wrapper function for computing Sevcik fractal dimension."""
 
+    from neurokit2.complexity import fractal_sevcik
+
     return fractal_sevcik(sig)[0]
 
 
@@ -118,6 +132,8 @@ def sevcik_fd(sig, **kwargs):
 def wperm_entropy(sig, **kwargs):
     """Wrapper function for computing weighted permutation entropy."""
 
+    from neurokit2.complexity import complexity_wpe
+
     return complexity_wpe(sig, **kwargs)[0]
 
 
@@ -126,24 +142,32 @@ def wperm_entropy(sig, **kwargs):
 def multi_app_entropy(sig, **kwargs):
     """Wrapper function for computing multiscale approximate entropy."""
 
+    from neurokit2.complexity import entropy_multiscale
+
     return entropy_multiscale(sig, method='MSApEn', **kwargs)[0]
 
 
 def multi_sample_entropy(sig, **kwargs):
     """Wrapper function for computing multiscale sample entropy."""
 
+    from neurokit2.complexity import entropy_multiscale
+
     return entropy_multiscale(sig, method='MSEn', **kwargs)[0]
 
 
 def multi_perm_entropy(sig, **kwargs):
     """Wrapper function for computing multiscale permutation entropy."""
 
+    from neurokit2.complexity import entropy_multiscale
+
     return entropy_multiscale(sig, method='MSPEn', **kwargs)[0]
 
 
 def multi_wperm_entropy(sig, **kwargs):
     """Wrapper function for computing multiscale weighted permutation entropy."""
 
+    from neurokit2.complexity import entropy_multiscale
+
     return entropy_multiscale(sig, method='MSWPEn', **kwargs)[0]
 
 ## SPECTRAL MEASURES
@@ -151,12 +175,17 @@ def multi_wperm_entropy(sig, **kwargs):
 def fit_irasa_exp(freqs, psd_ap):
     """IRASAS fit function - fit single exponent model & return exponent."""
 
+    from neurodsp.aperiodic.irasa import fit_irasa
+
     return fit_irasa(freqs, psd_ap)[1]
 
 
 def fit_irasa_knee(freqs, psd_ap):
     """IRASA fit function - fit knee model."""
 
+    from scipy.optimize import curve_fit
+    from fooof.core.funcs import expo_function
+
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
         popt, _ = curve_fit(expo_function, freqs, np.log10(psd_ap),
@@ -184,6 +213,8 @@ def irasa(sig, fit_func='fit_irasa_exp', flip_sign=True, **kwargs):
     Note: output value is sign-flipped by default, to match specparam format.
     """
 
+    from neurodsp.aperiodic.irasa import compute_irasa
+
     freqs, psd_ap, psd_pe = compute_irasa(sig, **kwargs)
 
     try:
@@ -200,6 +231,10 @@ def irasa(sig, fit_func='fit_irasa_exp', flip_sign=True, **kwargs):
 def specparam(sig, **kwargs):
     """Wrapper function for applying specparam (starting from a time series)."""
 
+    from fooof import FOOOF
+    from fooof.core.errors import NoModelError
+    from neurodsp.spectral import compute_spectrum
+
     freqs, powers = compute_spectrum(sig, kwargs.pop('fs'), f_range=kwargs.pop('f_range', None))
 
     if 'fm' in kwargs:
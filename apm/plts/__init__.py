@@ -1,6 +1,45 @@
-"""Plots for the aperiodic methods project."""
+"""Plots for the aperiodic methods project.
 
-from .base import *
-from .errors import *
-from .results import *
-from .utils import plot_colorbar, color_red_or_green
+Notes
+-----
+Functions are loaded lazily, on first access, such that matplotlib, and other plotting
+dependencies, are only imported when they are used.
+"""
+
+from importlib import import_module
+
+###################################################################################################
+###################################################################################################
+
+# Map of public names to the module they are loaded from
+_LAZY_NAMES = {
+    'plot_dots' : 'apm.plts.base',
+    'plot_density' : 'apm.plts.base',
+    'plot_lines' : 'apm.plts.base',
+    'plot_boxplot_errors' : 'apm.plts.errors',
+    'plot_violin_errors' : 'apm.plts.errors',
+    'plot_corr_matrix' : 'apm.plts.results',
+    'plot_topo' : 'apm.plts.results',
+    'plot_colorbar' : 'apm.plts.utils',
+    'color_red_or_green' : 'apm.plts.utils',
+    'render_figures' : 'apm.plts.batch',
+}
+
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    """Load public functions on first access."""
+
+    if name in _LAZY_NAMES:
+        value = getattr(import_module(_LAZY_NAMES[name]), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    """List module attributes, including lazily loaded functions."""
+
+    return sorted(list(globals()) + __all__)
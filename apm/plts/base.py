@@ -1,22 +1,32 @@
 """Base plot functions."""
 
+import numpy as np
 import matplotlib.pyplot as plt
 
 from neurodsp.plts.utils import savefig
 from neurodsp.plts.style import style_plot
 
-from scipy.stats import spearmanr
-
 from .utils import get_ax, add_text, formr
+from .settings import RASTER_THRESH, DENSITY_BINS
 
 ###################################################################################################
 ###################################################################################################
 
 @savefig
 @style_plot
-def plot_dots(x_vals=None, y_vals=None, add_corr=True, corr_func=spearmanr,
-              tposition='tr', expected=None, ax=None, **plt_kwargs):
-    """Plot data as dots."""
+def plot_dots(x_vals=None, y_vals=None, add_corr=True, corr_func=None, r_val=None,
+              tposition='tr', expected=None, density=None, ax=None, **plt_kwargs):
+    """Plot data as dots.
+
+    Notes
+    -----
+    If `r_val` is provided, it is used as the correlation value to report.
+    Otherwise, if `corr_func` is not provided, a Spearman correlation is used.
+
+    If `density` is 'hexbin' or 'hist2d', the density of the data is plotted, binned
+    into `gridsize` bins per axis, instead of each point. Scatter plots with more
+    than `RASTER_THRESH` points are rasterized, to keep vector figures small.
+    """
 
     ax = get_ax(ax, figsize=plt_kwargs.pop('figsize', None))
 
@@ -24,16 +34,67 @@ def plot_dots(x_vals=None, y_vals=None, add_corr=True, corr_func=spearmanr,
         ax.plot(expected, expected, color='black', linestyle='--', alpha=0.35)
 
     if x_vals is not None:
-        ax.scatter(x_vals, y_vals, **plt_kwargs)
+        if density:
+            plot_density(x_vals, y_vals, density, ax=ax, **plt_kwargs)
+        else:
+            plt_kwargs.setdefault('rasterized', np.size(x_vals) > RASTER_THRESH)
+            ax.scatter(x_vals, y_vals, **plt_kwargs)
 
     if ax.get_legend_handles_labels()[0]:
         plt.legend()
 
     if add_corr:
-        r_val, p_val = corr_func(x_vals, y_vals)
+        if r_val is None:
+            if corr_func is None:
+                from scipy.stats import spearmanr
+                corr_func = spearmanr
+            r_val, _ = corr_func(x_vals, y_vals)
         add_text(formr(r_val), position=tposition, ax=ax)
 
 
+def plot_density(x_vals, y_vals, density='hexbin', gridsize=DENSITY_BINS, cmap='Greys',
+                 ax=None, **plt_kwargs):
+    """Plot the density of data, as a binned 2D histogram.
+
+    Parameters
+    ----------
+    x_vals, y_vals : 1d array
+        Data values. Pairs with any non-finite values are dropped.
+    density : {'hexbin', 'hist2d'}
+        Type of density plot, as hexagonal or rectangular bins.
+    gridsize : int, optional
+        Number of bins, per axis.
+    cmap : str or Colormap, optional, default: 'Greys'
+        Colormap to use for the counts of each bin.
+    ax : matplotlib.Axes, optional
+        Figure axes upon which to plot.
+    **plt_kwargs
+        Keyword arguments for the plot call. Scatter specific arguments are ignored.
+
+    Notes
+    -----
+    The size of the plot depends on the number of bins, and not the number of data points.
+    Rectangular bins are rasterized, as this is smaller than a vector mesh.
+    """
+
+    ax = get_ax(ax, figsize=plt_kwargs.pop('figsize', None))
+
+    x_vals, y_vals = np.asarray(x_vals), np.asarray(y_vals)
+    mask = np.isfinite(x_vals) & np.isfinite(y_vals)
+
+    for label in ['s', 'color', 'c', 'marker', 'edgecolor', 'edgecolors', 'linewidths']:
+        plt_kwargs.pop(label, None)
+
+    if density == 'hexbin':
+        ax.hexbin(x_vals[mask], y_vals[mask], gridsize=gridsize, cmap=cmap, mincnt=1,
+                  **plt_kwargs)
+    elif density == 'hist2d':
+        ax.hist2d(x_vals[mask], y_vals[mask], bins=gridsize, cmap=cmap, cmin=1,
+                  rasterized=True, **plt_kwargs)
+    else:
+        raise ValueError('Density plot type not understood.')
+
+
 @savefig
 @style_plot
 def plot_lines(x_vals=None, y_vals=None, shade_vals=None, ax=None, **plt_kwargs):
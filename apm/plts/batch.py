@@ -0,0 +1,112 @@
+"""Batch rendering of figures, across worker processes."""
+
+import os
+from functools import partial
+
+from apm.plts.settings import EXT
+
+###################################################################################################
+###################################################################################################
+
+def render_figures(jobs, file_path=None, n_jobs=4, backend='Agg', pbar=False):
+    """Render and save a batch of figures, in parallel across worker processes.
+
+    Parameters
+    ----------
+    jobs : list of tuple
+        Figures to render, each as (plot_func, data, plt_kwargs, file_name).
+        Each `plot_func` is called as `plot_func(*data, **plt_kwargs)`, with `data` as a
+        list of positional arguments. If `data` is not a list or tuple, it is used as the
+        only positional argument. Any positional arguments that are `ResultsRef` objects
+        are loaded in the worker. If `file_name` has no extension, the default is added.
+    file_path : str or Path, optional
+        Path to the folder to save the figures in.
+    n_jobs : int, optional, default: 4
+        Number of jobs to run in parallel. If -1, uses all available cores.
+        If 1, figures are rendered in the current process, with the current backend.
+    backend : str, optional, default: 'Agg'
+        Non-interactive matplotlib backend to use in the worker processes.
+    pbar : bool, optional, default: False
+        Whether to display a progress bar.
+
+    Returns
+    -------
+    outputs : list of str
+        File paths of the saved figures, in the order of the jobs.
+
+    Notes
+    -----
+    Data should be passed as `ResultsRef` objects, such as from `ResultsStore.ref`,
+    such that only references, and not results arrays, are sent to each worker.
+
+    The pool is shared with, and can be closed in the same way as, `apm.run.parallel`.
+    If any of the plot functions are defined in `__main__`, a new pool is used.
+    """
+
+    from multiprocessing import Pool, cpu_count
+    from apm.run.parallel import get_pool
+    from apm.run.monitor import get_pbar
+
+    n_jobs = cpu_count() if n_jobs == -1 else n_jobs
+    render = partial(_render_job, file_path=file_path,
+                     backend=backend if n_jobs > 1 else None)
+
+    if n_jobs == 1:
+        return [render(job) for job in get_pbar(jobs, desc="Rendering Figures",
+                                                total=len(jobs), disable=not pbar)]
+
+    reuse = not any(getattr(job[0], '__module__', None) == '__main__' for job in jobs)
+    pool = get_pool(n_jobs) if reuse else Pool(processes=n_jobs)
+
+    try:
+        mapping = pool.imap(render, jobs)
+        outputs = list(get_pbar(mapping, desc="Rendering Figures", total=len(jobs),
+                                disable=not pbar))
+    finally:
+        if not reuse:
+            pool.close()
+            pool.join()
+
+    return outputs
+
+
+def _render_job(job, file_path=None, backend=None):
+    """Render and save a single figure.
+
+    Parameters
+    ----------
+    job : tuple
+        Figure to render, as (plot_func, data, plt_kwargs, file_name).
+    file_path : str or Path, optional
+        Path to the folder to save the figure in.
+    backend : str, optional
+        Matplotlib backend to switch to before rendering.
+
+    Returns
+    -------
+    str
+        File path of the saved figure.
+    """
+
+    import matplotlib.pyplot as plt
+    from apm.io.store import ResultsRef
+
+    if backend:
+        plt.switch_backend(backend)
+
+    plot_func, data, plt_kwargs, file_name = job
+
+    data = data if isinstance(data, (list, tuple)) else [data]
+    data = [arg.load() if isinstance(arg, ResultsRef) else arg for arg in data]
+
+    if not os.path.splitext(file_name)[1]:
+        file_name = file_name + EXT
+    output = os.path.join(file_path, file_name) if file_path else file_name
+
+    try:
+        plot_func(*data, **plt_kwargs if plt_kwargs else {})
+        plt.savefig(output, bbox_inches='tight')
+    finally:
+        plt.close('all')
+
+    return str(output)
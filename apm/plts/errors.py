@@ -1,7 +1,5 @@
 """Plots for the distributions of errors across methods."""
 
-import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
 
 from neurodsp.plts.utils import savefig
@@ -23,6 +21,9 @@ def plot_boxplot_errors(errors, labels=None, **plt_kwargs):
         Dictionary of errors per method.
     """
 
+    import pandas as pd
+    import seaborn as sns
+
     df = pd.DataFrame(errors)
 
     ax = get_ax(None, figsize=plt_kwargs.pop('figsize', [10, 5]))
@@ -46,6 +47,9 @@ def plot_violin_errors(errors, labels=None, **plt_kwargs):
         Dictionary of errors per method.
     """
 
+    import pandas as pd
+    import seaborn as sns
+
     df = pd.DataFrame(errors)
 
     ax = get_ax(None, figsize=plt_kwargs.pop('figsize', [8, 2]))
@@ -15,7 +15,8 @@ from apm.plts.settings import LABELS
 ###################################################################################################
 
 @savefig
-def plot_results_rows(results, rows, columns, tposition='tr', **plt_kwargs):
+def plot_results_rows(results, rows, columns, tposition='tr', corrs=None, density=None,
+                      **plt_kwargs):
     """Plot result comparisons, organized by rows and columns.
 
     Parameters
@@ -26,8 +27,15 @@ def plot_results_rows(results, rows, columns, tposition='tr', **plt_kwargs):
         Which results to plot across the rows and columns.
     tposition : str or array, optional
         Position to place text, to report the correlation results.
+    corrs : CorrResults or dict, optional
+        Precomputed correlation results, to report, as from `compute_all_corrs`.
+        If not provided, Spearman correlations for all pairs are computed together.
+    density : {'hexbin', 'hist2d'}, optional
+        If provided, plots the density of the results in each panel, instead of each point.
     """
 
+    r_vals = _get_corr_vals(results, list(rows) + list(columns), corrs, plt_kwargs)
+
     n_rows, n_cols = len(rows), len(columns)
     axes = make_axes(n_rows, n_cols,
                      figsize=plt_kwargs.pop('figsize', (4 * n_cols, 4 * n_rows)),
@@ -38,13 +46,14 @@ def plot_results_rows(results, rows, columns, tposition='tr', **plt_kwargs):
     for ri, row in enumerate(rows):
         for ci, col in enumerate(columns):
             tpos = tposition[ri, ci] if isinstance(tposition, np.ndarray) else tposition
-            plot_dots(results[row], results[col],
-                      xlabel=LABELS[row], ylabel=LABELS[col],
-                      tposition=tpos, **plt_kwargs, ax=axes[ri, ci])
+            plot_dots(results[row], results[col], r_val=r_vals.get((row, col)),
+                      xlabel=LABELS[row], ylabel=LABELS[col], tposition=tpos,
+                      density=density, **plt_kwargs, ax=axes[ri, ci])
 
 
 @savefig
-def plot_results_all(results, labels=None, tposition='tr', **plt_kwargs):
+def plot_results_all(results, labels=None, tposition='tr', corrs=None, density=None,
+                     **plt_kwargs):
     """Plot multi-axis figure comparing all measures to each other.
 
     Parameters
@@ -56,11 +65,18 @@ def plot_results_all(results, labels=None, tposition='tr', **plt_kwargs):
         If not provided, plots all measures in results.
     tposition : str or array, optional
         Position to place text, to report the correlation results.
+    corrs : CorrResults or dict, optional
+        Precomputed correlation results, to report, as from `compute_all_corrs`.
+        If not provided, Spearman correlations for all pairs are computed together.
+    density : {'hexbin', 'hist2d'}, optional
+        If provided, plots the density of the results in each panel, instead of each point.
     """
 
     if not labels:
         labels = list(results.keys())
 
+    r_vals = _get_corr_vals(results, labels, corrs, plt_kwargs)
+
     n_measures = len(labels) - 1
 
     plt_kwargs.setdefault('alpha', 0.75)
@@ -91,7 +107,8 @@ def plot_results_all(results, labels=None, tposition='tr', **plt_kwargs):
                     ax_kwargs['ylabel'] = LABELS[row]
 
                 tpos = tposition[ri, ci] if isinstance(tposition, np.ndarray) else tposition
-                plot_dots(results[col], results[row], tposition=tpos,
+                plot_dots(results[col], results[row], r_val=r_vals.get((col, row)),
+                          tposition=tpos, density=density,
                           **ax_kwargs, **plt_kwargs, ax=axes[ri, ci])
 
 
@@ -104,3 +121,46 @@ def plot_topo_row(results, measures, info, vlims={}, **plt_kwargs):
     for measure, ax in zip(measures, axes):
         ax.set_title(measure, fontdict={'fontsize' : 10})
         plot_topo(results[measure], info, vlim=vlims.get(measure, [None, None]), axes=ax)
+
+
+def _get_corr_vals(results, labels, corrs=None, plt_kwargs=None):
+    """Get correlation values between all pairs of a set of measures, to report in plots.
+
+    Parameters
+    ----------
+    results : dict
+        Results, organized as {label : array_of_results}.
+    labels : list of str
+        Measures to get correlation values for.
+    corrs : CorrResults or dict, optional
+        Precomputed correlation results, indexable as `corrs[label1][label2]`, with each
+        result starting with the correlation value. If not provided, Spearman correlations
+        are computed for all pairs together, from the ranks of the results.
+    plt_kwargs : dict, optional
+        Plot keyword arguments. If correlations are not added, or a custom `corr_func` is
+        given, no correlations are computed.
+
+    Returns
+    -------
+    r_vals : dict
+        Correlation values, as {(label1, label2) : r_val}.
+    """
+
+    plt_kwargs = plt_kwargs if plt_kwargs else {}
+    if not plt_kwargs.get('add_corr', True) or plt_kwargs.get('corr_func'):
+        return {}
+
+    labels = list(dict.fromkeys(labels))
+    pairs = [(l1, l2) for l1 in labels for l2 in labels if l1 != l2]
+
+    if corrs is not None:
+        return {(l1, l2) : corrs[l1][l2][0] for l1, l2 in pairs}
+
+    from scipy.stats import rankdata
+
+    ranks = rankdata(np.array([results[label] for label in labels], dtype=float), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr_mat = np.corrcoef(ranks)
+    inds = {label : ind for ind, label in enumerate(labels)}
+
+    return {(l1, l2) : corr_mat[inds[l1], inds[l2]] for l1, l2 in pairs}
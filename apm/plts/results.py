@@ -1,14 +1,14 @@
 """Plots for the distributions of errors across methods."""
 
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
 from matplotlib import cm
 
-from mne.viz import plot_topomap
-
 from neurodsp.plts.utils import savefig
 
+from apm.plts.utils import get_ax
+from apm.plts.topo import get_topo_interp, draw_head
+
 ###################################################################################################
 ###################################################################################################
 
@@ -16,6 +16,8 @@ from neurodsp.plts.utils import savefig
 def plot_corr_matrix(corrs, **plt_kwargs):
     """Plot a correlation matrix, computed from the output of df.corr()."""
 
+    import seaborn as sns
+
     # Create mask, only for non 1D data
     mask = None
     if 1 not in corrs.shape:
@@ -40,7 +42,53 @@ def plot_corr_matrix(corrs, **plt_kwargs):
 
 
 @savefig
-def plot_topo(data, info, size=2, **plt_kwargs):
-    """Helper function for plotting topographies."""
+def plot_topo(data, info, size=2, vlim=(None, None), cmap=cm.viridis, res=64, contours=0,
+              sensors=True, sphere=None, image_interp='cubic', extrapolate='auto', axes=None,
+              **plt_kwargs):
+    """Helper function for plotting topographies.
+
+    Notes
+    -----
+    Topographies match `mne.viz.plot_topomap`, using MNE's sensor positions, head sphere and
+    interpolation setup, which are cached per montage and settings, with `get_topo_interp`,
+    such that repeated plots are a single matrix-vector product.
+    Sensors with NaN values are dropped from the interpolation.
+    Any other keyword arguments, such as `names` or `mask`, are passed to `plot_topomap`,
+    which is then used to plot the topography.
+    """
+
+    if plt_kwargs or image_interp not in ['cubic', 'linear']:
+        from mne.viz import plot_topomap
+        return plot_topomap(data, info, vlim=vlim, cmap=cmap, res=res, contours=contours,
+                            sensors=sensors, sphere=sphere, image_interp=image_interp,
+                            extrapolate=extrapolate, axes=axes, size=size, show=False,
+                            **plt_kwargs)
+
+    from mne.viz.topomap import _make_head_patch, _topomap_plot_sensors
+    from mne.viz.utils import _setup_vmin_vmax
+
+    extrapolate = 'head' if extrapolate == 'auto' else extrapolate
+    topo = get_topo_interp(info, res, image_interp, sphere, extrapolate)
+
+    data = np.asarray(data, dtype=float)
+    valid = data[~np.isnan(data)]
+    vmin, vmax = _setup_vmin_vmax(valid, vlim[0], vlim[1], norm=valid.min() >= 0)
+
+    ax = get_ax(axes, figsize=(size, size))
+    image_data = topo.interpolate(data, mask=False)
+    image = ax.imshow(image_data, origin='lower', aspect='equal', extent=topo.extent,
+                      cmap=cmap, vmin=vmin, vmax=vmax, interpolation='bilinear')
+    patch = _make_head_patch(topo.outlines, extrapolate, topo._grid, ax)
+    image.set_clip_path(patch)
+
+    if isinstance(contours, (list, np.ndarray)) or contours:
+        lines = ax.contour(topo.xx, topo.yy, image_data, contours, colors='k', linewidths=0.5)
+        lines.set_clip_path(patch)
+
+    draw_head(topo.outlines, ax=ax)
+    if sensors:
+        _topomap_plot_sensors(topo.pos[:, 0], topo.pos[:, 1], sensors, ax)
 
-    plot_topomap(data, info, cmap=cm.viridis, contours=0, size=size, show=False, **plt_kwargs)
+    ax.set_xlim(topo.extent[:2])
+    ax.set_ylim(topo.extent[2:])
+    ax.axis('off')
@@ -45,6 +45,14 @@ METHOD_COLORS = {
     'irasa' : IR_COLOR,
 }
 
+## SCATTER SETTINGS
+
+# Number of points above which scatter plots are rasterized, to keep vector figures small
+RASTER_THRESH = 2500
+
+# Default number of bins, per axis, for density plots
+DENSITY_BINS = 40
+
 ## SAVE SETTINGS
 
 # Save setting
@@ -0,0 +1,270 @@
+"""Cached interpolation of sensor values onto an image grid, for plotting topographies."""
+
+import numpy as np
+
+###################################################################################################
+###################################################################################################
+
+# Cache of interpolators, with a key per (positions, sphere, resolution, method, extrapolation)
+_TOPO_CACHE = {}
+
+###################################################################################################
+###################################################################################################
+
+class TopoInterp():
+    """Interpolation from sensor values to an image grid over the head, for a montage.
+
+    Parameters
+    ----------
+    pos : 2d array
+        Sensor positions, projected to 2D, as [n_sensors, 2], in meters.
+    sphere : 1d array
+        Head sphere, as (x, y, z, radius), in meters.
+    res : int, optional, default: 64
+        Resolution of the image grid, as the number of pixels along each side.
+    method : {'cubic', 'linear'}
+        Interpolation method, as Clough-Tocher or linear interpolation between sensors.
+    extrapolate : {'head', 'box', 'local'}
+        Extrapolation to points outside of the sensors, as in MNE.
+
+    Attributes
+    ----------
+    outlines : dict
+        Head outlines and clipping area, as in MNE.
+    extent : tuple of float
+        Extent of the image grid, as (left, right, bottom, top), in meters.
+    mask : 2d array of bool
+        Mask of the pixels inside the plotted head area, as [res, res].
+    matrix : 2d array
+        Interpolation matrix, as [res * res, n_sensors], computed on first access.
+
+    Notes
+    -----
+    The head outlines, image grid, triangulation and extrapolation points are set up with
+    MNE, as in `mne.viz.plot_topomap`. Extrapolation points are set to the average of their
+    neighbouring sensors, as MNE's default 'mean' border. As both the extrapolation and the
+    interpolation are linear in the sensor values, they are computed as a matrix, such that
+    each set of values is projected onto the grid with a single matrix-vector product.
+
+    The matrix is computed when more than one set of values is interpolated, such that a
+    single plot costs the same as in MNE. Sensors with NaN values are dropped, using an
+    interpolator across the other sensors, which is cached per set of dropped sensors.
+    """
+
+    def __init__(self, pos, sphere, res=64, method='cubic', extrapolate='head'):
+        """Initialize TopoInterp object."""
+
+        from mne.viz.topomap import _make_head_outlines, _setup_interp
+
+        self.pos = np.asarray(pos, dtype=float)
+        self.sphere = np.asarray(sphere, dtype=float)
+        self.res = res
+        self.method = method
+        self.extrapolate = extrapolate
+
+        self.outlines = _make_head_outlines(self.sphere, self.pos, 'head', (0., 0.))
+        self.extent, self.xx, self.yy, self._grid = _setup_interp(
+            self.pos, res, method, extrapolate, self.outlines, 'mean')
+
+        origin, radius = self.outlines['clip_origin'], self.outlines['clip_radius'][0]
+        self.mask = np.hypot(self.xx - origin[0], self.yy - origin[1]) <= radius
+
+        self._matrix = None
+        self._n_calls = 0
+        self._dropped = {}
+
+
+    @property
+    def matrix(self):
+        """Interpolation matrix, from sensors to the image grid."""
+
+        if self._matrix is None:
+            basis = np.vstack([np.eye(len(self.pos)), self._border_weights()])
+            interp = self._grid.interp(self._grid.tri, basis)
+            self._matrix = interp(self.xx, self.yy).reshape(self.res * self.res, -1)
+
+        return self._matrix
+
+
+    def interpolate(self, values, mask=True):
+        """Interpolate sensor values onto the image grid.
+
+        Parameters
+        ----------
+        values : 1d or 2d array
+            Values per sensor, as [n_sensors], or as [n_sensors, n_sets] for multiple sets.
+        mask : bool, optional, default: True
+            Whether to set pixels outside of the head area to NaN.
+
+        Returns
+        -------
+        image : 2d or 3d array
+            Interpolated values, as [res, res], or [res, res, n_sets].
+        """
+
+        values = np.asarray(values, dtype=float)
+        flat = values.reshape(len(values), -1)
+
+        # Interpolate each set of values, grouped by which sensors have NaN values
+        image = np.full([self.res * self.res, flat.shape[1]], np.nan)
+        nans = np.isnan(flat)
+        for pattern in np.unique(nans, axis=1).T:
+            cols = np.all(nans == pattern[:, np.newaxis], axis=0)
+            if pattern.all():
+                continue
+            if pattern.any():
+                sub = self._get_dropped(~pattern)
+                image[:, cols] = sub.interpolate(flat[~pattern][:, cols], mask=False) \
+                    .reshape(self.res * self.res, -1)
+            else:
+                image[:, cols] = self._apply(flat[:, cols])
+
+        image = image.reshape((self.res, self.res) + values.shape[1:])
+        if mask:
+            image[~self.mask] = np.nan
+
+        return image
+
+
+    def _apply(self, values):
+        """Interpolate sets of values, as [n_sensors, n_sets], with no NaN values."""
+
+        self._n_calls += 1
+        if self._matrix is None and self._n_calls == 1 and values.shape[1] == 1:
+            self._grid.set_values(values[:, 0])
+            return self._grid(self.xx, self.yy).reshape(-1, 1)
+
+        return self.matrix @ values
+
+
+    def _border_weights(self):
+        """Get the weights of the sensors for each extrapolation point, for a 'mean' border."""
+
+        n_sensors = len(self.pos)
+        indices, indptr = self._grid.tri.vertex_neighbor_vertices
+
+        weights = np.zeros([self._grid.n_extra, n_sensors])
+        for ind in range(self._grid.n_extra):
+            neighbors = indptr[indices[n_sensors + ind]:indices[n_sensors + ind + 1]]
+            neighbors = neighbors[neighbors < n_sensors]
+            if len(neighbors):
+                weights[ind, neighbors] = 1. / len(neighbors)
+
+        # Points with no neighbouring sensors are set to the average of the other points
+        used = weights.any(axis=1)
+        if used.any():
+            weights[~used] = weights[used].mean(axis=0)
+
+        return weights
+
+
+    def _get_dropped(self, valid):
+        """Get the interpolator for a subset of valid sensors, computing it if needed."""
+
+        key = valid.tobytes()
+        if key not in self._dropped:
+            self._dropped[key] = TopoInterp(self.pos[valid], self.sphere, self.res,
+                                            self.method, self.extrapolate)
+
+        return self._dropped[key]
+
+###################################################################################################
+###################################################################################################
+
+def get_topo_pos(info, sphere=None):
+    """Get 2D sensor positions for plotting topographies, from a measurement info object.
+
+    Parameters
+    ----------
+    info : mne.Info
+        Measurement info, with a montage set.
+    sphere : float or array or str, optional
+        Head sphere, in any form accepted by MNE. Defaults to MNE's default head sphere.
+
+    Returns
+    -------
+    pos : 2d array
+        Sensor positions, as [n_sensors, 2], in meters.
+    sphere : 1d array
+        Head sphere, as (x, y, z, radius), in meters.
+
+    Notes
+    -----
+    Positions and the head sphere are computed by MNE, as in `mne.viz.plot_topomap`.
+    """
+
+    from mne.utils.check import _check_sphere
+    from mne.channels.layout import _find_topomap_coords
+
+    sphere = _check_sphere(sphere, info)
+    pos = _find_topomap_coords(info, picks=None, sphere=sphere)
+
+    return pos, sphere
+
+
+def get_topo_interp(info, res=64, method='cubic', sphere=None, extrapolate='head'):
+    """Get the topography interpolator for a montage, computing and caching it if needed.
+
+    Parameters
+    ----------
+    info : mne.Info or 2d array
+        Measurement info, with a montage set, or 2D sensor positions, as [n_sensors, 2].
+    res : int, optional, default: 64
+        Resolution of the image grid, as the number of pixels along each side.
+    method : {'cubic', 'linear'}
+        Interpolation method.
+    sphere : float or array or str, optional
+        Head sphere, in any form accepted by MNE. Defaults to MNE's default head sphere.
+    extrapolate : {'head', 'box', 'local'}
+        Extrapolation to points outside of the sensors.
+
+    Returns
+    -------
+    TopoInterp
+        Topography interpolator.
+
+    Notes
+    -----
+    Interpolators are cached by the sensor positions, head sphere, resolution, method and
+    extrapolation, such that plotting many measures, or subjects, with the same montage,
+    sets up the interpolation only once.
+    """
+
+    from mne.utils.check import _check_sphere
+
+    if isinstance(info, np.ndarray):
+        pos, sphere = np.asarray(info, dtype=float), _check_sphere(sphere)
+    else:
+        pos, sphere = get_topo_pos(info, sphere)
+
+    key = (pos.round(6).tobytes(), sphere.round(6).tobytes(), res, method, extrapolate)
+    if key not in _TOPO_CACHE:
+        _TOPO_CACHE[key] = TopoInterp(pos, sphere, res, method, extrapolate)
+
+    return _TOPO_CACHE[key]
+
+
+def clear_topo_cache():
+    """Clear the cache of topography interpolators."""
+
+    _TOPO_CACHE.clear()
+
+
+def draw_head(outlines, ax=None, **plt_kwargs):
+    """Draw a head outline, with a nose and ears, onto an axis.
+
+    Parameters
+    ----------
+    outlines : dict
+        Head outlines, such as from `TopoInterp.outlines`.
+    ax : matplotlib.Axes, optional
+        Figure axes upon which to plot.
+    **plt_kwargs
+        Keyword arguments for the line plots.
+    """
+
+    plt_kwargs.setdefault('color', 'k')
+    plt_kwargs.setdefault('lw', 1)
+
+    for label in ['head', 'nose', 'ear_left', 'ear_right']:
+        ax.plot(*outlines[label], **plt_kwargs)
@@ -1,4 +1,8 @@
 """Code for running method estimations for the Aperiodic Methods project."""
 
-from .sims import run_sims, run_sims_load, run_sims_parallel, run_comparisons
-from .data import run_measures, run_group_measures
+from .sims import (run_sims, run_sims_load, run_sims_parallel, run_sims_parallel_multi,
+                   run_comparisons)
+from .data import run_measures, run_group_measures, run_windowed_measures
+from .monitor import RunMonitor
+from .parallel import close_pool
+from .stream import replay_data, run_stream
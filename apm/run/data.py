@@ -43,8 +43,10 @@ def run_group_measures(group_data, measures, warnings_action='ignore'):
 
     Parameters
     ----------
-    group_data : 3d array
+    group_data : 3d array or LazyStack
         Data to run measures on, organized as [subjects, channels, timepoints].
+        Data are accessed one subject at a time, such that memory-mapped data
+        only needs to load the data for one subject into memory at a time.
     measures : dict
         Functions to apply to the data.
         The keys should be functions to apply to the data.
@@ -55,8 +57,67 @@ def run_group_measures(group_data, measures, warnings_action='ignore'):
     group_results = {func.__name__ : np.zeros([n_subjs, n_chs]) for func in measures.keys()}
 
     for ind in range(n_subjs):
-        subj_measures = run_measures(np.squeeze(group_data[ind, :, :]), measures, warnings_action)
+        subj_data = np.squeeze(np.asarray(group_data[ind, :, :]))
+        subj_measures = run_measures(subj_data, measures, warnings_action)
         for label in subj_measures:
             group_results[label][ind, :] = subj_measures[label]
 
     return group_results
+
+
+def run_windowed_measures(data, measures, win_len, step, batch_measures=None,
+                          warnings_action='ignore'):
+    """Compute multiple measures across sliding windows of empirical recordings.
+
+    Parameters
+    ----------
+    data : 1d or 2d array
+        Data to run measures on, organized as [channels, timepoints].
+    measures : dict
+        Functions to apply to the data.
+        The keys should be functions to apply to the data.
+        The values should be a dictionary of parameters to use for the method.
+    win_len : int
+        Window length, in samples.
+    step : int
+        Step between the starts of consecutive windows, in samples.
+    batch_measures : list of callable, optional
+        Measures from `measures` that can be applied to all windows of a channel in one call.
+        These are passed a 2d array of [n_windows, win_len], and should return one value
+        per window. All other measures are applied to each window separately.
+    warnings_action : {'ignore', 'error', 'always', 'default', 'module, 'once'}
+        Filter action for warnings.
+
+    Returns
+    -------
+    results : dict
+        Output measures.
+        The keys are labels for each applied method.
+        The values are the computed measures for each method, as [channels, n_windows].
+
+    Notes
+    -----
+    Windows are created as strided, read-only views of the data, and are not copied.
+    Window `ind` starts at sample `ind * step`.
+    """
+
+    from apm.utils.data import make_windows
+
+    data = np.atleast_2d(data)
+    windows = make_windows(data, win_len, step)
+    n_chs, n_windows = windows.shape[:2]
+
+    batch_measures = batch_measures if batch_measures else []
+    results = {func.__name__ : np.zeros([n_chs, n_windows]) for func in measures.keys()}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter(warnings_action)
+        for ind, ch_windows in enumerate(windows):
+            for measure, params in measures.items():
+                if measure in batch_measures:
+                    results[measure.__name__][ind] = measure(ch_windows, **params)
+                else:
+                    for w_ind, sig in enumerate(ch_windows):
+                        results[measure.__name__][ind, w_ind] = measure(sig, **params)
+
+    return results
@@ -0,0 +1,343 @@
+"""Progress, timing and failure monitoring for running simulations and measures."""
+
+import os
+import json
+from time import perf_counter
+
+import numpy as np
+
+###################################################################################################
+###################################################################################################
+
+class RunMonitor():
+    """Collect per-task timing and failure information across runs.
+
+    Parameters
+    ----------
+    log_file : str or Path, optional
+        If provided, each task record is appended to this file, as a line of JSON.
+    catch_errors : bool, optional, default: True
+        Whether to catch errors raised by measure functions.
+        If True, errors are recorded, and the result for the failed measure is set to NaN.
+        If False, errors are raised as usual.
+
+    Attributes
+    ----------
+    records : list of dict
+        Collected task records. Each record includes:
+
+        - 'run' : the name of the run function that created the record
+        - 'value_ind' : the index of the simulation parameter value
+        - 'sim_ind' : the index of the simulation, within the parameter value
+        - 'worker' : the process ID of the worker that ran the task
+        - 'sim_time' : time taken to simulate (or load) the signal, in seconds
+        - 'measure_times' : time taken per measure, in seconds
+        - 'errors' : error messages for any measures that failed
+        - 'params' : simulation parameters, only for runs with sampled parameters
+
+    Notes
+    -----
+    In parallel runs, records are created in the worker processes and are sent back to
+    the main process together with the task results, through the pool's result queue.
+    Records are only ever stored and written to file from the main process.
+    """
+
+    def __init__(self, log_file=None, catch_errors=True):
+        """Initialize RunMonitor object."""
+
+        self.log_file = log_file
+        self.catch_errors = catch_errors
+        self.records = []
+
+
+    def add_record(self, record):
+        """Add a task record to the monitor, and to the log file, if defined."""
+
+        self.records.append(record)
+
+        if self.log_file:
+            with open(self.log_file, 'a') as log_file:
+                log_file.write(json.dumps(record, default=_to_json) + '\n')
+
+
+    def clear(self):
+        """Clear all collected records."""
+
+        self.records = []
+
+
+    def summary(self):
+        """Summarize the collected records.
+
+        Returns
+        -------
+        RunSummary
+            Summary of collected timing and failure information.
+        """
+
+        return RunSummary(self.records)
+
+
+class RunSummary():
+    """Summary of timing and failure information collected across a set of tasks.
+
+    Attributes
+    ----------
+    n_tasks : int
+        The number of tasks.
+    n_failed : int
+        The number of tasks in which at least one measure failed.
+    sim_time : float
+        Total time spent simulating or loading signals, in seconds.
+    measure_times : dict
+        Total time spent per measure, in seconds.
+    task_times : 1d array
+        Total time per task, in seconds.
+    workers : dict
+        Number of tasks run per worker process ID.
+    failures : list of dict
+        Records of all tasks with at least one failed measure.
+    """
+
+    def __init__(self, records):
+        """Initialize RunSummary object."""
+
+        self.records = records
+
+        self.n_tasks = len(records)
+        self.failures = [record for record in records if record['errors']]
+        self.n_failed = len(self.failures)
+
+        self.sim_time = sum(record['sim_time'] for record in records)
+        self.task_times = np.array([get_task_time(record) for record in records])
+
+        self.measure_times = {}
+        self.workers = {}
+        for record in records:
+            for label, m_time in record['measure_times'].items():
+                self.measure_times[label] = self.measure_times.get(label, 0.) + m_time
+            self.workers[record['worker']] = self.workers.get(record['worker'], 0) + 1
+
+
+    def __repr__(self):
+        """Define the string representation as a printed summary."""
+
+        lines = ['Run summary: {} tasks, {} failed, across {} worker(s)'.format(\
+                     self.n_tasks, self.n_failed, len(self.workers)),
+                 '  {:25s} {:10.3f} s'.format('simulation', self.sim_time)]
+        for label, m_time in self.measure_times.items():
+            lines.append('  {:25s} {:10.3f} s'.format(label, m_time))
+
+        return '\n'.join(lines)
+
+
+    @property
+    def total_time(self):
+        """Total compute time summed across all tasks, in seconds."""
+
+        return float(np.sum(self.task_times))
+
+
+    def time_per_value(self, measure=None, avg_func=np.mean):
+        """Compute the average task time per simulation parameter value.
+
+        Parameters
+        ----------
+        measure : str, optional
+            If provided, only use the time for this measure. Otherwise, uses total task time.
+        avg_func : callable, optional, default: np.mean
+            Function to compute the average time per value.
+
+        Returns
+        -------
+        value_times : 1d array
+            Average time per parameter value, indexed by value index.
+        """
+
+        value_inds = np.array([record['value_ind'] for record in self.records])
+        times = self.task_times if measure is None else \
+            np.array([record['measure_times'].get(measure, np.nan) for record in self.records])
+
+        value_times = np.full(value_inds.max() + 1 if self.n_tasks else 0, np.nan)
+        for ind in np.unique(value_inds):
+            value_times[ind] = avg_func(times[value_inds == ind])
+
+        return value_times
+
+
+    def slowest(self, n_tasks=5, measure=None):
+        """Get the records for the slowest tasks.
+
+        Parameters
+        ----------
+        n_tasks : int, optional, default: 5
+            Number of records to return.
+        measure : str, optional
+            If provided, sorts by the time for this measure. Otherwise, sorts by total task time.
+
+        Returns
+        -------
+        list of dict
+            Task records, sorted from slowest.
+        """
+
+        times = self.task_times if measure is None else \
+            np.array([record['measure_times'].get(measure, 0.) for record in self.records])
+
+        return [self.records[ind] for ind in np.argsort(times)[::-1][:n_tasks]]
+
+###################################################################################################
+###################################################################################################
+
+def make_record(run, value_ind=None, sim_ind=None, sim_time=0., params=None):
+    """Create a task record.
+
+    Parameters
+    ----------
+    run : str
+        Name of the run function creating the record.
+    value_ind, sim_ind : int, optional
+        Indices of the simulation parameter value, and the simulation within the value.
+    sim_time : float, optional
+        Time taken to simulate or load the signal, in seconds.
+    params : dict, optional
+        Simulation parameters for the task, if they vary per task.
+
+    Returns
+    -------
+    record : dict
+        Task record.
+    """
+
+    record = {'run' : run, 'value_ind' : value_ind, 'sim_ind' : sim_ind, 'worker' : os.getpid(),
+              'sim_time' : sim_time, 'measure_times' : {}, 'errors' : {}}
+
+    if params is not None:
+        record['params'] = params
+
+    return record
+
+
+def apply_measures(sig, measures, record, catch_errors=False, shapes=None):
+    """Apply a set of measures to a signal, timing each measure.
+
+    Parameters
+    ----------
+    sig : 1d array
+        Signal to apply measures to.
+    measures : dict
+        Functions to apply to the data.
+        The keys should be functions to apply to the data.
+        The values should be a dictionary of parameters to use for the method.
+    record : dict
+        Task record, which is updated in place with measure times and errors.
+    catch_errors : bool, optional, default: False
+        Whether to catch errors raised by measures, setting the result to NaN.
+    shapes : dict, optional
+        Output shape of each measure, as {measure : shape}, used to fill the result of a
+        failed measure with NaN values. Updated in place with the shape of each output,
+        such that the output shapes of prior calls are used. If a measure has no known
+        shape, the result of a failure is a single NaN value.
+
+    Returns
+    -------
+    outputs : list
+        Results of each measure applied to the signal.
+    """
+
+    shapes = {} if shapes is None else shapes
+
+    outputs = []
+    for measure, params in measures.items():
+
+        start = perf_counter()
+        try:
+            outputs.append(measure(sig, **params))
+            shapes[measure] = np.shape(outputs[-1])
+        except Exception as error:
+            if not catch_errors:
+                raise
+            record['errors'][measure.__name__] = repr(error)
+            outputs.append(fill_nan(shapes.get(measure, ())))
+        record['measure_times'][measure.__name__] = perf_counter() - start
+
+    return outputs
+
+
+def fill_nan(shape):
+    """Make a result of NaN values, used for failed measures.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the result. If empty, the result is a single NaN value.
+
+    Returns
+    -------
+    float or array
+        Result of NaN values.
+    """
+
+    return np.full(shape, np.nan) if shape else np.nan
+
+
+def timed_iter(iterable):
+    """Iterate across an iterable, also returning the time taken to produce each element.
+
+    Parameters
+    ----------
+    iterable : iterable
+        Iterable to step through, such as a simulation generator.
+
+    Yields
+    ------
+    item : obj
+        Next element from the iterable.
+    item_time : float
+        Time taken to produce the element, in seconds.
+    """
+
+    iterator = iter(iterable)
+    while True:
+        start = perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        yield item, perf_counter() - start
+
+
+def get_pbar(iterable, **kwargs):
+    """Wrap an iterable with a progress bar, using a notebook or terminal display as appropriate.
+
+    Parameters
+    ----------
+    iterable : iterable
+        Iterable to wrap with a progress bar.
+    **kwargs
+        Keyword arguments for `tqdm`.
+
+    Returns
+    -------
+    iterable or tqdm
+        Iterable wrapped in a progress bar, or the input iterable if the bar is disabled.
+    """
+
+    if kwargs.get('disable', False):
+        return iterable
+
+    from tqdm.auto import tqdm
+
+    return tqdm(iterable, **kwargs)
+
+
+def get_task_time(record):
+    """Compute the total time for a task record, in seconds."""
+
+    return record['sim_time'] + sum(record['measure_times'].values())
+
+
+def _to_json(obj):
+    """Convert objects that are not JSON serializable, such as numpy values, for logging."""
+
+    return obj.tolist() if hasattr(obj, 'tolist') else str(obj)
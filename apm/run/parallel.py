@@ -0,0 +1,303 @@
+"""Code for dispatching simulation tasks in parallel, in chunked blocks across a reusable pool."""
+
+import atexit
+import warnings
+from math import ceil
+from functools import partial
+from time import perf_counter
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from apm.run.monitor import make_record, apply_measures, fill_nan, get_task_time, get_pbar
+
+###################################################################################################
+###################################################################################################
+
+# Target compute time per block of tasks, in seconds, when picking a chunk size
+TARGET_BLOCK_TIME = 0.5
+
+# Minimum number of blocks per job, to keep load balanced across workers
+MIN_BLOCKS_PER_JOB = 4
+
+# Shared pool, reused across calls
+_POOL = None
+_POOL_N_JOBS = None
+
+###################################################################################################
+###################################################################################################
+
+def get_pool(n_jobs=4):
+    """Get a process pool, reusing the existing pool if it has the requested number of jobs.
+
+    Parameters
+    ----------
+    n_jobs : int, optional, default: 4
+        Number of jobs to run in parallel. If -1, uses all available cores.
+
+    Returns
+    -------
+    Pool
+        Process pool.
+    """
+
+    global _POOL, _POOL_N_JOBS
+
+    n_jobs = cpu_count() if n_jobs == -1 else n_jobs
+
+    if _POOL is None or _POOL_N_JOBS != n_jobs:
+        close_pool()
+        _POOL = Pool(processes=n_jobs)
+        _POOL_N_JOBS = n_jobs
+
+    return _POOL
+
+
+def close_pool():
+    """Close the shared process pool, if one is open."""
+
+    global _POOL, _POOL_N_JOBS
+
+    if _POOL is not None:
+        _POOL.close()
+        _POOL.join()
+        _POOL, _POOL_N_JOBS = None, None
+
+
+atexit.register(close_pool)
+
+
+def run_blocks(sim_func, sim_params, measures, n_sims, n_jobs=4, chunksize=None,
+               pbar=False, warnings_action='ignore', monitor=None, run=None):
+    """Run simulations and measures across a pool, dispatching tasks in contiguous blocks.
+
+    Parameters
+    ----------
+    sim_func : callable
+        A function to create the simulations from.
+    sim_params : list of dict
+        Simulation parameters for `sim_func`, one per value.
+    measures : dict
+        Functions to apply to the simulated data.
+        The keys should be functions to apply to the data.
+        The values should be a dictionary of parameters to use for the method.
+    n_sims : int
+        The number of iterations to simulate and calculate measures, per value.
+    n_jobs : int, optional, default: 4
+        Number of jobs to run in parallel. If -1, uses all available cores.
+    chunksize : int, optional
+        Number of tasks per block. If None, picked based on the timing of a pilot batch.
+        The pilot runs two tasks per block, and times the second task of each block, such
+        that start-up costs in new workers, such as imports and compilation, are excluded.
+    pbar : bool, optional, default: False
+        Whether to display a progress bar.
+    warnings_action : {'ignore', 'error', 'always', 'default', 'module, 'once'}
+        Filter action for warnings.
+    monitor : RunMonitor, optional
+        If provided, collects per-task timing and failure information.
+    run : str, optional
+        Name of the run function, to label task records.
+
+    Returns
+    -------
+    outputs : list of array
+        Results for each measure, with the first dimension as tasks, ordered by [values, sims].
+
+    Notes
+    -----
+    Tasks are indexed as a flat range across values and simulations. Each block is a
+    contiguous range of task indices, which a worker simulates and measures locally,
+    returning results packed into arrays, which minimizes inter-process communication.
+    Each block is only sent the simulation parameters for the values it covers.
+
+    The pool is reused across calls, and can be closed with `close_pool`. If any of the
+    functions are defined in `__main__`, a new pool is used, as an existing pool may not
+    be able to access functions that were defined after it was created.
+    """
+
+    n_jobs = cpu_count() if n_jobs == -1 else n_jobs
+    n_tasks = len(sim_params) * n_sims
+
+    if not n_tasks:
+        return [np.zeros(0) for _ in measures]
+
+    run_block = partial(_run_block, sim_func=sim_func, n_sims=n_sims, measures=measures,
+                        run=run, warnings_action=warnings_action,
+                        catch_errors=monitor.catch_errors if monitor else False)
+
+    reuse = not any(getattr(func, '__module__', None) == '__main__' \
+        for func in [sim_func, *measures.keys()])
+    pool = get_pool(n_jobs) if reuse else Pool(processes=n_jobs)
+
+    try:
+
+        blocks = []
+        if not chunksize:
+
+            # Run a pilot batch, with two tasks per block, and pick the chunksize from the
+            # second task of each block, as the first can include worker start-up costs
+            n_pilot = min(2 * n_jobs, n_tasks)
+            blocks = pool.map(run_block, [_make_task((ind, min(ind + 2, n_pilot)), sim_params,
+                                                     n_sims) for ind in range(0, n_pilot, 2)])
+            task_time = np.median([get_task_time(block[1][-1]) for block in blocks])
+            chunksize = pick_chunksize(task_time, n_tasks - n_pilot, n_jobs)
+
+        start = sum(len(block[1]) for block in blocks)
+        bounds = [(ind, min(ind + chunksize, n_tasks)) for ind in range(start, n_tasks, chunksize)]
+
+        tasks = (_make_task(block_bounds, sim_params, n_sims) for block_bounds in bounds)
+        mapping = pool.imap(run_block, tasks)
+        for block in get_pbar(mapping, desc="Running Simulations", total=len(bounds),
+                              unit='block', dynamic_ncols=True, disable=not pbar):
+            blocks.append(block)
+
+    finally:
+        if not reuse:
+            pool.close()
+            pool.join()
+
+    if monitor:
+        for _, records in blocks:
+            for record in records:
+                monitor.add_record(record)
+
+    outputs = [_stack_outputs([block[0][m_ind] for block in blocks], concat=True) \
+        for m_ind in range(len(measures))]
+
+    return outputs
+
+
+def pick_chunksize(task_time, n_tasks, n_jobs, target_time=TARGET_BLOCK_TIME,
+                   min_blocks=MIN_BLOCKS_PER_JOB):
+    """Pick the number of tasks per block, based on the expected time per task.
+
+    Parameters
+    ----------
+    task_time : float
+        Expected time per task, in seconds.
+    n_tasks : int
+        Number of tasks to dispatch.
+    n_jobs : int
+        Number of jobs running in parallel.
+    target_time : float, optional
+        Target compute time per block, in seconds.
+    min_blocks : int, optional
+        Minimum number of blocks per job, to keep load balanced across workers.
+
+    Returns
+    -------
+    chunksize : int
+        Number of tasks per block.
+    """
+
+    chunksize = int(target_time / max(task_time, 1e-6))
+    max_chunksize = ceil(n_tasks / (n_jobs * min_blocks))
+
+    return max(1, min(chunksize, max_chunksize))
+
+
+def _make_task(bounds, sim_params, n_sims):
+    """Make a block task, with the slice of simulation parameters used by the block.
+
+    Parameters
+    ----------
+    bounds : tuple of (int, int)
+        Start and stop indices of the block of tasks.
+    sim_params : list of dict
+        Simulation parameters, one per value.
+    n_sims : int
+        The number of simulations per value.
+
+    Returns
+    -------
+    task : tuple of (tuple of (int, int), int, list of dict)
+        Block bounds, index of the first value, and simulation parameters of the block.
+    """
+
+    first, last = bounds[0] // n_sims, (bounds[1] - 1) // n_sims
+
+    return bounds, first, sim_params[first:last + 1]
+
+
+def _run_block(task, sim_func=None, n_sims=None, measures=None,
+               run=None, warnings_action='ignore', catch_errors=False):
+    """Simulate and measure a contiguous block of tasks.
+
+    Parameters
+    ----------
+    task : tuple of (tuple of (int, int), int, list of dict)
+        Start and stop indices of the block of tasks, index of the first value of the block,
+        and simulation parameters for the values in the block, as from `_make_task`.
+
+    Returns
+    -------
+    outputs : list of array
+        Results for each measure, packed across the tasks in the block.
+    records : list of dict
+        Task records, with timing and failure information.
+    """
+
+    bounds, first, block_params = task
+
+    outputs, records, shapes = [], [], {}
+    for ind in range(*bounds):
+        value_ind, sim_ind = divmod(ind, n_sims)
+        task_outputs, record = _run_task(sim_func, block_params[value_ind - first], measures,
+                                         run, value_ind, sim_ind, warnings_action, catch_errors,
+                                         shapes)
+        outputs.append(task_outputs)
+        records.append(record)
+
+    outputs = [_stack_outputs([task_outputs[m_ind] for task_outputs in outputs]) \
+        for m_ind in range(len(measures))]
+
+    return outputs, records
+
+
+def _run_task(sim_func, sim_params, measures, run, value_ind, sim_ind,
+              warnings_action='ignore', catch_errors=False, shapes=None):
+    """Wrap simulation and measure functions together, timing each step."""
+
+    start = perf_counter()
+    sig = sim_func(**sim_params)
+    record = make_record(run, value_ind, sim_ind, perf_counter() - start)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter(warnings_action)
+        outputs = apply_measures(sig, measures, record, catch_errors, shapes)
+
+    return outputs, record
+
+
+def _stack_outputs(outputs, concat=False):
+    """Stack the outputs of a measure, filling failed outputs to the shape of the others.
+
+    Parameters
+    ----------
+    outputs : list of float or array
+        Outputs of a measure, per task, or, if `concat` is True, per block of tasks.
+    concat : bool, optional, default: False
+        Whether to concatenate blocks of outputs, rather than stacking outputs per task.
+
+    Returns
+    -------
+    array
+        Stacked outputs, with the first dimension as tasks.
+
+    Notes
+    -----
+    Failed measures give a single NaN value, unless the output shape is known from a prior
+    task in the same block. Failed outputs with fewer dimensions than the others, such as
+    those before the first successful task, or in blocks in which all tasks failed,
+    are filled with NaN values to the output shape.
+    """
+
+    n_dims = max(np.ndim(output) for output in outputs)
+    shape = next(np.shape(output) for output in outputs if np.ndim(output) == n_dims)
+
+    if concat:
+        return np.concatenate([output if np.ndim(output) == n_dims else \
+            fill_nan((len(output),) + shape[1:]) for output in outputs])
+
+    return np.array([output if np.ndim(output) == n_dims else fill_nan(shape) \
+        for output in outputs])
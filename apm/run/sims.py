@@ -2,24 +2,19 @@
 
 import warnings
 from copy import deepcopy
-from functools import partial
-from multiprocessing import Pool, cpu_count
 
 import numpy as np
-import pandas as pd
-from tqdm.notebook import tqdm
-
-from neurodsp.sim.io import load_sims
-from neurodsp.sim.multi import sig_yielder, sig_sampler
 
 from apm.io.db import APMDB
 from apm.run.utils import unpack_param_dict
+from apm.run.monitor import make_record, apply_measures, timed_iter
+from apm.run.parallel import run_blocks
 
 ###################################################################################################
 ###################################################################################################
 
 def run_sims(sim_func, sim_params, measure_func, measure_params, n_sims,
-             return_params=False, outsize=1, warnings_action='ignore'):
+             return_params=False, outsize=1, warnings_action='ignore', monitor=None):
     """Compute a measure of interest across a set of simulations.
 
     Parameters
@@ -37,9 +32,12 @@ def run_sims(sim_func, sim_params, measure_func, measure_params, n_sims,
     return_params : bool, default: False
         Whether to collect and return the parameters for the generated simulations.
     outsize : int, optional, default: 1
-        Expected size of the measure results.
+        Expected size of the measure results. Also used as the size of the NaN results of
+        failed measures, if errors are caught by the monitor.
     warnings_action : {'ignore', 'error', 'always', 'default', 'module, 'once'}
         Filter action for warnings.
+    monitor : RunMonitor, optional
+        If provided, collects per-task timing and failure information.
 
     Returns
     -------
@@ -47,12 +45,18 @@ def run_sims(sim_func, sim_params, measure_func, measure_params, n_sims,
         The results of the measures applied to the set of simulations.
     """
 
+    from neurodsp.sim.multi import sig_yielder
+
     results = np.zeros([len(sim_params), n_sims, outsize]) if outsize > 1 \
         else np.zeros([len(sim_params), n_sims])
 
     if return_params:
         all_sim_params = []
 
+    measures = {measure_func : measure_params}
+    shapes = {measure_func : (outsize,)} if outsize > 1 else {}
+    catch_errors = monitor.catch_errors if monitor else False
+
     with warnings.catch_warnings():
         warnings.simplefilter(warnings_action)
 
@@ -61,8 +65,15 @@ def run_sims(sim_func, sim_params, measure_func, measure_params, n_sims,
             if return_params:
                 all_sim_params.append(deepcopy(cur_sim_params))
 
-            for s_ind, sig in enumerate(sig_yielder(sim_func, cur_sim_params, n_sims)):
-                results[p_ind, s_ind] = measure_func(sig, **measure_params)
+            for s_ind, (sig, sim_time) in \
+                enumerate(timed_iter(sig_yielder(sim_func, cur_sim_params, n_sims))):
+
+                record = make_record('run_sims', p_ind, s_ind, sim_time)
+                results[p_ind, s_ind] = apply_measures(sig, measures, record, catch_errors,
+                                                       shapes)[0]
+
+                if monitor:
+                    monitor.add_record(record)
 
     if return_params:
         return results, all_sim_params
@@ -71,7 +82,7 @@ def run_sims(sim_func, sim_params, measure_func, measure_params, n_sims,
 
 
 def run_sims_load(sims_file, measure_func, measure_params, n_sims=None,
-                  outsize=1, warnings_action='ignore'):
+                  outsize=1, warnings_action='ignore', monitor=None):
     """Run measures across a set of simulations loaded from file.
 
     Notes
@@ -80,6 +91,8 @@ def run_sims_load(sims_file, measure_func, measure_params, n_sims=None,
     replacing `sims_files` for sim_func, sim_params.
     """
 
+    from neurodsp.sim.io import load_sims
+
     # Load saved out simulations file and collect info of interest
     sigs = load_sims(sims_file, APMDB().sims_path / 'time_series')
     values = sigs.values
@@ -94,48 +107,48 @@ def run_sims_load(sims_file, measure_func, measure_params, n_sims=None,
     results = np.zeros([n_params, n_sims, outsize]) if outsize > 1 \
         else np.zeros([n_params, n_sims])
 
+    measures = {measure_func : measure_params}
+    shapes = {measure_func : (outsize,)} if outsize > 1 else {}
+    catch_errors = monitor.catch_errors if monitor else False
+
     with warnings.catch_warnings():
         warnings.simplefilter(warnings_action)
 
         for sp_ind, value in enumerate(values):
 
-            for s_ind, sig in enumerate(sigs[sp_ind]):
-                results[sp_ind, s_ind] = measure_func(sig, **measure_params)
+            for s_ind, (sig, load_time) in enumerate(timed_iter(sigs[sp_ind])):
+
+                record = make_record('run_sims_load', sp_ind, s_ind, load_time)
+                results[sp_ind, s_ind] = apply_measures(sig, measures, record, catch_errors,
+                                                        shapes)[0]
+
+                if monitor:
+                    monitor.add_record(record)
 
     return results
 
 
-def run_sims_parallel(sim_func, sim_params, measure_func, measure_params, n_sims,
-                      n_jobs=4, pbar=False, warnings_action='ignore'):
+def run_sims_parallel(sim_func, sim_params, measure_func, measure_params, n_sims, n_jobs=4,
+                      chunksize=None, pbar=False, warnings_action='ignore', monitor=None):
     """Compute a set of measures across simulations, in parallel.
 
     Notes
     -----
-    This function has the same call signature as `run_sims`, with the addition of `n_jobs`.
+    This function has the same call signature as `run_sims`, with the addition of `n_jobs`,
+    and `chunksize`, which sets the number of simulations dispatched to a worker at a time.
+    If `chunksize` is None, it is picked based on the timing of a small pilot batch.
+    The process pool is reused across calls, and can be closed with `close_pool`.
     """
 
-    n_jobs = cpu_count() if n_jobs == -1 else n_jobs
-
     # Typecast generator to list & get the set of iterated values
     sim_params = list(sim_params)
     values = sim_params.values if hasattr(sim_params, 'values') \
         else list(range(len(sim_params)))
 
-    # Duplicate sims to equal length of n_sims
-    sim_params = [pii for pi in range(len(sim_params)) for pii in [sim_params[pi]] * n_sims]
-
-    with warnings.catch_warnings():
-        warnings.simplefilter(warnings_action)
-        with Pool(processes=n_jobs) as pool:
-
-            mapping = pool.imap(partial(_proxy, sim_func=sim_func, measure_func=measure_func,
-                                        measure_params=measure_params), sim_params)
-
-            results = list(tqdm(mapping, desc="Running Simulations",
-                                total=len(sim_params), dynamic_ncols=True, disable=not pbar))
-
-    results = np.array(results)
-    remainder = int(results.size / (len(values) * n_sims))
+    results = run_blocks(sim_func, sim_params, {measure_func : measure_params}, n_sims,
+                         n_jobs, chunksize, pbar, warnings_action, monitor,
+                         run='run_sims_parallel')[0]
+    remainder = int(results.size / (len(values) * n_sims)) if results.size else 1
 
     if remainder == 1:
         # Cases when measure_func returns a single value
@@ -150,14 +163,70 @@ def run_sims_parallel(sim_func, sim_params, measure_func, measure_params, n_sims
     return results
 
 
-def _proxy(sim_params, sim_func=None, measure_func=None, measure_params=None):
-    """Wrap simulation and measure functions together."""
+def run_sims_parallel_multi(sim_func, sim_params, measures, n_sims, n_jobs=4, chunksize=None,
+                            pbar=False, warnings_action='ignore', monitor=None):
+    """Compute multiple measures across simulations, in parallel, simulating each signal once.
+
+    Parameters
+    ----------
+    sim_func : callable
+        A function to create the simulations from.
+    sim_params : iterable or list of dict
+        Simulation parameters for `sim_func`.
+    measures : dict
+        Functions to apply to the simulated data.
+        The keys should be functions to apply to the data.
+        The values should be a dictionary of parameters to use for the method.
+    n_sims : int
+        The number of iterations to simulate and calculate measures, per value.
+    n_jobs : int, optional, default: 4
+        Number of jobs to run in parallel. If -1, uses all available cores.
+    chunksize : int, optional
+        Number of simulations dispatched to a worker at a time.
+        If None, picked based on the timing of a small pilot batch.
+    pbar : bool, optional, default: False
+        Whether to display a progress bar.
+    warnings_action : {'ignore', 'error', 'always', 'default', 'module, 'once'}
+        Filter action for warnings.
+    monitor : RunMonitor, optional
+        If provided, collects per-task timing and failure information.
+
+    Returns
+    -------
+    results : dict
+        Computed results for each measure across the set of simulations.
+        Each value is an array of shape [n_values, n_sims], or
+        [n_values, n_sims, outsize] for measures that return more than one value.
+
+    Notes
+    -----
+    Each simulated signal is generated once, and all measures are applied to it,
+    such that the simulation cost does not scale with the number of measures.
+    The process pool is reused across calls, and can be closed with `close_pool`.
+    """
+
+    # Typecast generator to list
+    sim_params = list(sim_params)
+    n_values = len(sim_params)
+
+    outputs = run_blocks(sim_func, sim_params, measures, n_sims, n_jobs, chunksize,
+                         pbar, warnings_action, monitor, run='run_sims_parallel_multi')
+
+    results = {}
+    for measure, m_results in zip(measures.keys(), outputs):
+
+        if m_results.ndim == 1:
+            # Cases when measure returns a single value
+            results[measure.__name__] = np.reshape(m_results, (n_values, n_sims))
+        else:
+            # Cases when measure returns >1 value
+            results[measure.__name__] = np.reshape(m_results, (n_values, n_sims, -1))
 
-    return measure_func(sim_func(**sim_params), **measure_params)
+    return results
 
 
-def run_comparisons(sim_func, sim_params, measures, n_sims=None,
-                    return_params=False, verbose=False, warnings_action='ignore'):
+def run_comparisons(sim_func, sim_params, measures, n_sims=None, return_params=False,
+                    verbose=False, warnings_action='ignore', monitor=None):
     """Compute multiple measures of interest across the same set of simulations.
 
     Parameters
@@ -179,6 +248,9 @@ def run_comparisons(sim_func, sim_params, measures, n_sims=None,
         Used for checking simulations / debugging.
     warnings_action : {'ignore', 'error', 'always', 'default', 'module, 'once'}
         Filter action for warnings.
+    monitor : RunMonitor, optional
+        If provided, collects per-task timing and failure information.
+        Each sampled simulation is recorded as its own value, including its parameters.
 
     Returns
     -------
@@ -189,6 +261,8 @@ def run_comparisons(sim_func, sim_params, measures, n_sims=None,
         Only returned if `return_params` is True.
     """
 
+    from neurodsp.sim.multi import sig_sampler
+
     if not n_sims:
         n_sims = len(sim_params)
 
@@ -197,11 +271,13 @@ def run_comparisons(sim_func, sim_params, measures, n_sims=None,
     if return_params:
         all_sim_params = [None] * n_sims
 
+    catch_errors = monitor.catch_errors if monitor else False
+
     with warnings.catch_warnings():
         warnings.simplefilter(warnings_action)
 
-        for s_ind, (sig, sample_params) in \
-            enumerate(sig_sampler(sim_func, sim_params, True, n_sims)):
+        for s_ind, ((sig, sample_params), sim_time) in \
+            enumerate(timed_iter(sig_sampler(sim_func, sim_params, True, n_sims))):
 
             if verbose:
                 print(sample_params)
@@ -209,10 +285,17 @@ def run_comparisons(sim_func, sim_params, measures, n_sims=None,
             if return_params:
                 all_sim_params[s_ind] = unpack_param_dict(sample_params)
 
-            for measure, params in measures.items():
-                results[measure.__name__][s_ind] = measure(sig, **params)
+            record = make_record('run_comparisons', s_ind, 0, sim_time,
+                                 unpack_param_dict(sample_params) if monitor else None)
+            outputs = apply_measures(sig, measures, record, catch_errors)
+            for measure, output in zip(measures.keys(), outputs):
+                results[measure.__name__][s_ind] = output
+
+            if monitor:
+                monitor.add_record(record)
 
     if return_params:
+        import pandas as pd
         all_sim_params = pd.DataFrame(all_sim_params)
         # If relevant, set a marker for yes / no if signal has an oscillation
         if 'var_pe' in all_sim_params.columns:
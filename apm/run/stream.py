@@ -0,0 +1,71 @@
+"""Code for running streaming estimators across blocks of incoming data."""
+
+import numpy as np
+
+###################################################################################################
+###################################################################################################
+
+def replay_data(data, block_size, max_blocks=None):
+    """Replay data from an array or file, as a stream of sample blocks.
+
+    Parameters
+    ----------
+    data : 2d array or str or Path
+        Data to replay, organized as [channels, timepoints], or a path to a `.npy` file of data,
+        which is memory-mapped, such that only the current block is loaded into memory.
+    block_size : int
+        Number of samples per block.
+    max_blocks : int, optional
+        Maximum number of blocks to replay. If not provided, replays all complete blocks.
+
+    Yields
+    ------
+    block : 2d array
+        Block of data, organized as [channels, block_size].
+
+    Notes
+    -----
+    This is a stand-in for a live acquisition source, which yields blocks of the same form.
+    """
+
+    if not isinstance(data, np.ndarray):
+        data = np.load(data, mmap_mode='r')
+    data = np.atleast_2d(data)
+
+    n_blocks = data.shape[1] // block_size
+    if max_blocks is not None:
+        n_blocks = min(n_blocks, max_blocks)
+
+    for ind in range(n_blocks):
+        yield np.array(data[:, ind * block_size : (ind + 1) * block_size])
+
+
+def run_stream(source, estimators, estimate_every=1):
+    """Run streaming estimators across blocks of data from a source.
+
+    Parameters
+    ----------
+    source : iterable of 2d array
+        Source of data blocks, each organized as [channels, samples], such as `replay_data`.
+    estimators : dict
+        Streaming estimators to update, with labels as keys, and estimator objects as values.
+        Each estimator should have `update` and `estimate` methods.
+    estimate_every : int, optional, default: 1
+        Number of blocks between computing estimates.
+
+    Returns
+    -------
+    results : dict
+        Estimates for each estimator, with the first dimension as each estimate.
+        The keys are the labels for each estimator.
+    """
+
+    results = {label : [] for label in estimators}
+
+    for ind, block in enumerate(source):
+        for label, estimator in estimators.items():
+            estimator.update(block)
+            if (ind + 1) % estimate_every == 0:
+                results[label].append(estimator.estimate())
+
+    return {label : np.array(estimates) for label, estimates in results.items()}
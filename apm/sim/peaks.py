@@ -67,6 +67,93 @@ def gen_peak_def(n_peaks=None):
         yield peaks
 
 
+def gen_peak_defs(n_spectra, n_peaks=None, window=1, rng=None):
+    """Generate plausible peak distributions for a batch of simulated power spectra.
+
+    Parameters
+    ----------
+    n_spectra : int
+        Number of power spectra to generate peak definitions for.
+    n_peaks : int, optional, default: None
+        Number of peaks to generate per spectrum. If None, picked at random per spectrum.
+    window : int, optional, default: 1
+        Window around each chosen center frequency, within which other centers are excluded.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+
+    Returns
+    -------
+    peaks : 3d array
+        Peak definitions, organized as [n_spectra, max_peaks, 3], with the last dimension as
+        [center frequency, power, bandwidth]. Entries beyond the number of peaks are NaN.
+    counts : 1d array
+        Number of peaks for each spectrum.
+
+    Notes
+    -----
+    This function samples from the same distributions as `gen_peak_def`.
+    Rather than re-sampling duplicate center frequencies, each center frequency is drawn
+    from the center frequency distribution with already-chosen centers masked out, which
+    is equivalent to rejection sampling, and is vectorized across spectra.
+
+    If all center frequencies are masked out before a spectrum has all of its peaks, which
+    can happen for large numbers of peaks or windows, a ValueError is raised.
+    """
+
+    rng = np.random.default_rng(rng)
+
+    if n_peaks is None:
+        counts = rng.choice(N_PEAK_OPTS, size=n_spectra, p=N_PEAK_PROBS)
+        max_peaks = max(N_PEAK_OPTS)
+    else:
+        counts = np.full(n_spectra, n_peaks)
+        max_peaks = n_peaks
+
+    cfs = np.zeros([n_spectra, max_peaks])
+    allowed = np.ones([n_spectra, len(CF_OPTS)], dtype=bool)
+    for ind in range(max_peaks):
+
+        exhausted = (ind < counts) & ~np.any(allowed & (CF_PROBS > 0), axis=1)
+        if np.any(exhausted):
+            msg = 'No center frequencies left to sample peak {} of {}, with a window of {}.'
+            raise ValueError(msg.format(ind + 1, counts[exhausted].max(), window))
+
+        # Sample center frequencies from the distribution, restricted to allowed values
+        cum_probs = np.cumsum(CF_PROBS * allowed, axis=1)
+        draws = rng.random(n_spectra) * cum_probs[:, -1]
+        cf_inds = np.minimum((cum_probs <= draws[:, np.newaxis]).sum(1), len(CF_OPTS) - 1)
+        cfs[:, ind] = CF_OPTS[cf_inds]
+
+        # Exclude values within the window of the chosen center frequencies
+        allowed &= np.abs(CF_OPTS[np.newaxis, :] - cfs[:, ind, np.newaxis]) > window
+
+    peaks = np.stack([cfs,
+                      rng.choice(PW_OPTS, size=[n_spectra, max_peaks], p=PW_PROBS),
+                      rng.choice(BW_OPTS, size=[n_spectra, max_peaks], p=BW_PROBS)], axis=-1)
+    peaks[np.arange(max_peaks)[np.newaxis, :] >= counts[:, np.newaxis]] = np.nan
+
+    return peaks, counts
+
+
+def unpack_peak_defs(peaks, counts):
+    """Unpack a batch of peak definitions into lists, one per spectrum.
+
+    Parameters
+    ----------
+    peaks : 3d array
+        Peak definitions, organized as [n_spectra, max_peaks, 3].
+    counts : 1d array
+        Number of peaks for each spectrum.
+
+    Returns
+    -------
+    list of list of [float, float, float]
+        Peak definitions per spectrum, in the same format as yielded from `gen_peak_def`.
+    """
+
+    return [cur_peaks[:count].tolist() for cur_peaks, count in zip(peaks, counts)]
+
+
 def _check_duplicate(cur_cf, all_cfs, window=1):
     """Check if a candidate center frequency has already been chosen.
 
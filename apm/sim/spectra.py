@@ -0,0 +1,99 @@
+"""Code for simulating batches of power spectra."""
+
+import numpy as np
+
+from apm.sim.peaks import gen_peak_defs
+
+###################################################################################################
+###################################################################################################
+
+def sim_spectra(n_spectra, f_range, exps, offsets=0, knees=None, aperiodic_mode='fixed',
+                peaks=None, n_peaks=None, nlv=0., freq_res=0.5, return_peaks=False, rng=None):
+    """Simulate a batch of power spectra, with aperiodic and periodic components and noise.
+
+    Parameters
+    ----------
+    n_spectra : int
+        Number of power spectra to simulate.
+    f_range : list of [float, float]
+        Frequency range to simulate across, inclusive.
+    exps : float or 1d array
+        Aperiodic exponent(s). If an array, should have one value per spectrum.
+    offsets : float or 1d array, optional, default: 0
+        Aperiodic offset(s). If an array, should have one value per spectrum.
+    knees : float or 1d array, optional
+        Aperiodic knee(s). Only used if `aperiodic_mode` is 'knee'.
+    aperiodic_mode : {'fixed', 'knee'}
+        Which mode to use for the aperiodic component.
+    peaks : 3d array, optional
+        Peak definitions, as [n_spectra, max_peaks, 3], with NaN entries for no peak.
+        If not provided, peak definitions are sampled with `gen_peak_defs`.
+    n_peaks : int, optional
+        Number of peaks per spectrum, if sampling peaks. If None, picked at random.
+    nlv : float, optional, default: 0.
+        Noise level, as the standard deviation of white noise added to log power values.
+    freq_res : float, optional, default: 0.5
+        Frequency resolution.
+    return_peaks : bool, optional, default: False
+        Whether to return the peak definitions.
+    rng : int or np.random.Generator, optional
+        Random number generator, or a seed to initialize one with.
+
+    Returns
+    -------
+    freqs : 1d array
+        Frequency values, in linear spacing.
+    powers : 2d array
+        Power values, in linear spacing, organized as [n_spectra, n_freqs].
+    exps : 1d array
+        Aperiodic exponent for each spectrum.
+    peaks : 3d array
+        Peak definitions for each spectrum. Only returned if `return_peaks` is True.
+
+    Notes
+    -----
+    This follows the simulation approach of `fooof.sim.gen_power_spectrum`, with exponents
+    as positive values, and peak bandwidths as the standard deviation of the gaussians,
+    but computes the whole batch of spectra together, as arrays.
+    The returned exponents are aligned to the rows of `powers`, as used by `fit_spectra`.
+    """
+
+    rng = np.random.default_rng(rng)
+
+    freqs = np.arange(f_range[0], f_range[1] + (0.5 * freq_res), freq_res)
+
+    exps = np.broadcast_to(np.asarray(exps, dtype=float), n_spectra).copy()
+    offsets = np.broadcast_to(np.asarray(offsets, dtype=float), n_spectra)
+
+    # Compute aperiodic component, in log10 spacing
+    if aperiodic_mode == 'fixed':
+        log_powers = offsets[:, np.newaxis] - exps[:, np.newaxis] * np.log10(freqs)
+    elif aperiodic_mode == 'knee':
+        knees = np.broadcast_to(np.asarray(knees, dtype=float), n_spectra)
+        log_powers = offsets[:, np.newaxis] - \
+            np.log10(knees[:, np.newaxis] + freqs[np.newaxis, :] ** exps[:, np.newaxis])
+    else:
+        raise ValueError('Aperiodic mode not understood.')
+
+    # Sample peak definitions, if not provided
+    if peaks is None:
+        peaks, _ = gen_peak_defs(n_spectra, n_peaks, rng=rng)
+
+    # Add periodic component, in log10 spacing, stepping across peak slots
+    #   Missing peaks (NaN) are set to have zero power, with a placeholder bandwidth
+    for ind in range(peaks.shape[1]):
+        cfs = np.nan_to_num(peaks[:, ind, 0])[:, np.newaxis]
+        pws = np.nan_to_num(peaks[:, ind, 1])[:, np.newaxis]
+        bws = np.nan_to_num(peaks[:, ind, 2], nan=1.)[:, np.newaxis]
+        log_powers += pws * np.exp(-(freqs - cfs) ** 2 / (2 * bws ** 2))
+
+    # Add noise
+    if nlv:
+        log_powers += rng.normal(0, nlv, log_powers.shape)
+
+    powers = np.power(10, log_powers)
+
+    if return_peaks:
+        return freqs, powers, exps, peaks
+    else:
+        return freqs, powers, exps
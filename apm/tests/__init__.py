@@ -0,0 +1 @@
+"""Tests for the aperiodic methods project."""
@@ -0,0 +1,90 @@
+"""Tests for the cache of computed artifacts."""
+
+import os
+
+import numpy as np
+
+from apm.io.cache import ArtifactCache, hash_data
+
+###################################################################################################
+###################################################################################################
+
+def test_hash_data_arrays():
+
+    data = np.arange(10, dtype=float)
+
+    assert hash_data(data) == hash_data(data.copy())
+    assert hash_data(data) != hash_data(data.astype(int))
+    assert hash_data(data) != hash_data(data.reshape(2, 5))
+    assert hash_data(data[::2]) == hash_data(np.ascontiguousarray(data[::2]))
+
+
+def test_hash_data_object_arrays():
+
+    # Equal elements, stored as different objects, hash the same
+    arr1 = np.array([np.arange(3), 'label', None], dtype=object)
+    arr2 = np.array([np.arange(3), 'label', None], dtype=object)
+    assert hash_data(arr1) == hash_data(arr2)
+
+    arr2[0] = np.arange(1, 4)
+    assert hash_data(arr1) != hash_data(arr2)
+
+
+def test_hash_data_containers():
+
+    assert hash_data([1, 2]) == hash_data([1, 2])
+    assert hash_data([1, 2]) != hash_data((1, 2))
+    assert hash_data([1, 2]) != hash_data([2, 1])
+    assert hash_data({'a' : 1, 'b' : 2}) == hash_data({'b' : 2, 'a' : 1})
+    assert hash_data({1 : 'a'}) != hash_data({'1' : 'a'})
+    assert hash_data({'a' : [1]}) != hash_data({'a' : (1,)})
+
+
+def test_hash_data_files(tmp_path):
+
+    file_path = tmp_path / 'data.txt'
+    file_path.write_text('data')
+    hashed = hash_data(file_path)
+
+    assert hash_data(str(file_path)) == hashed
+
+    file_path.write_text('changed data')
+    assert hash_data(file_path) != hashed
+
+
+def test_artifact_cache(tmp_path):
+
+    cache = ArtifactCache(tmp_path / 'cache')
+    calls = []
+    def compute(data, scale=1):
+        calls.append(scale)
+        return data * scale
+
+    data = np.arange(5)
+    assert np.array_equal(cache.compute(compute, data, {'scale' : 2}), data * 2)
+    assert np.array_equal(cache.compute(compute, data, {'scale' : 2}), data * 2)
+    assert np.array_equal(cache.compute(compute, data, {'scale' : 3}), data * 3)
+    assert calls == [2, 3]
+
+    key = cache.make_key(data, 'compute', {'scale' : 2})
+    assert key in cache
+    cache.remove(key)
+    assert key not in cache
+    assert cache.get(key) is None
+
+
+def test_artifact_cache_evict(tmp_path):
+
+    cache = ArtifactCache(tmp_path / 'cache')
+    for ind in range(3):
+        cache.put('entry-' + str(ind), np.zeros(100))
+        os.utime(cache._get_file('entry-' + str(ind)), (ind, ind))
+
+    size = cache.entries()[0]['size']
+    removed = cache.evict(2 * size)
+
+    assert removed == ['entry-0']
+    assert [entry['key'] for entry in cache.entries()] == ['entry-1', 'entry-2']
+
+    cache.clear()
+    assert cache.size == 0
@@ -0,0 +1,61 @@
+"""Tests for the array-backed container for correlation results."""
+
+import numpy as np
+import pytest
+
+from apm.analysis.corrs import unpack_corrs
+from apm.analysis.corr_results import CorrResults
+
+###################################################################################################
+###################################################################################################
+
+LABELS = ['m1', 'm2', 'm3']
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture
+def arrays():
+
+    rng = np.random.default_rng(0)
+    r_vals = rng.uniform(-1, 1, [3, 3])
+    p_vals = rng.uniform(0, 1, [3, 3])
+    cis = np.stack([r_vals - 0.1, r_vals + 0.1])
+
+    return r_vals, p_vals, cis
+
+
+def test_corr_results(arrays):
+
+    corrs = CorrResults(LABELS, *arrays)
+    r_vals, p_vals, cis = arrays
+
+    assert list(corrs) == LABELS and list(corrs['m1']) == ['m2', 'm3']
+    assert 'm1' not in corrs['m1']
+    assert corrs['m1']['m3'] == (r_vals[0, 2], p_vals[0, 2], (cis[0, 0, 2], cis[1, 0, 2]))
+
+    selected = corrs.select(['m3', 'm1'])
+    assert selected['m3']['m1'] == corrs['m3']['m1']
+
+
+def test_corr_results_copies(arrays):
+
+    inputs = [array.copy() for array in arrays]
+    corrs = CorrResults(LABELS, *inputs)
+
+    # Setting the diagonal does not change the inputs
+    for array, original in zip(inputs, arrays):
+        assert np.array_equal(array, original)
+    assert np.all(np.isnan(np.diag(corrs.r_vals)))
+
+    # Unpacked values are a copy, for both results forms
+    corrs_mat = unpack_corrs(corrs)
+    corrs_mat[0, 1] = 10.
+    assert corrs.r_vals[0, 1] == arrays[0][0, 1]
+
+    as_dict = {m1 : {m2 : corrs[m1][m2] for m2 in corrs[m1]} for m1 in corrs}
+    assert np.array_equal(unpack_corrs(as_dict), unpack_corrs(corrs), equal_nan=True)
+
+    corrected = corrs.correct_pvals('bonferroni')
+    corrected.r_vals[0, 1] = 10.
+    assert corrs.r_vals[0, 1] == arrays[0][0, 1]
@@ -0,0 +1,197 @@
+"""Tests for correlations between measures."""
+
+import numpy as np
+import pytest
+
+from scipy.stats import spearmanr
+from sklearn.linear_model import LinearRegression
+
+import apm.analysis.corrs as corrs
+from apm.analysis.corrs import (compute_all_corrs, compute_diffs_to_feature,
+                                bootstrap_corr_matrix, bootstrap_diff_matrix, compute_reg_var,
+                                _sort_groups, _corrs_block)
+
+###################################################################################################
+###################################################################################################
+
+N_OBS = 40
+N_MEAS = 4
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture(scope='module')
+def data():
+
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal([N_OBS, N_MEAS]) + rng.standard_normal([N_OBS, 1])
+
+    # Include ties, in one of the measures
+    data[:, 1] = np.round(data[:, 1])
+
+    return data
+
+
+def _off_diag(values):
+    """Select the values that are not on the diagonal of the last two dimensions."""
+
+    return values[..., ~np.eye(values.shape[-1], dtype=bool)]
+
+
+def _record_resamples(monkeypatch, block_name):
+    """Record the resamples that are passed to a block function."""
+
+    recorded = []
+    block_func = getattr(corrs, block_name)
+    def record_block(resamples, active, **kwargs):
+        recorded.append(resamples)
+        return block_func(resamples, active, **kwargs)
+    monkeypatch.setattr(corrs, block_name, record_block)
+
+    return recorded
+
+
+def test_corrs_block(data):
+
+    resamples = np.random.default_rng(1).integers(0, N_OBS, [20, N_OBS])
+    active = np.ones([N_MEAS, N_MEAS], dtype=bool)
+    sorts = [_sort_groups(data[:, ind]) for ind in range(N_MEAS)]
+
+    block = _corrs_block(resamples, active, sorts=sorts, skip=np.zeros(N_MEAS, dtype=bool))
+    for resample, block_corrs in zip(resamples, block):
+        assert np.allclose(_off_diag(block_corrs), _off_diag(spearmanr(data[resample])[0]))
+
+
+def test_bootstrap_corr_matrix(data, monkeypatch):
+
+    recorded = _record_resamples(monkeypatch, '_corrs_block')
+    r_vals, p_vals, cis = bootstrap_corr_matrix(data, n_bootstraps=200, rng=0)
+
+    exp_r_vals, exp_p_vals = spearmanr(data)
+    assert np.allclose(_off_diag(r_vals), _off_diag(exp_r_vals))
+    assert np.allclose(_off_diag(p_vals), _off_diag(exp_p_vals))
+
+    # Confidence intervals are percentiles of Spearman correlations across the resamples
+    boots = np.array([spearmanr(data[resample])[0] for resample in np.concatenate(recorded)])
+    assert len(boots) == 200
+    assert np.allclose(_off_diag(cis), _off_diag(np.percentile(boots, [2.5, 97.5], axis=0)))
+
+
+def test_bootstrap_corr_matrix_nans(data):
+
+    nan_data = data.copy()
+    nan_data[3, 2] = np.nan
+
+    r_vals, p_vals, cis = bootstrap_corr_matrix(nan_data, n_bootstraps=100, rng=0)
+
+    assert np.all(np.isnan(r_vals[2])) and np.all(np.isnan(r_vals[:, 2]))
+    assert np.all(np.isnan(cis[:, 2])) and np.all(np.isnan(p_vals[:, 2]))
+
+    valid = [0, 1, 3]
+    assert np.allclose(_off_diag(r_vals[np.ix_(valid, valid)]),
+                       _off_diag(spearmanr(data[:, valid])[0]))
+
+
+def test_compute_all_corrs(data):
+
+    results = {'m' + str(ind) : data[:, ind] for ind in range(N_MEAS)}
+
+    all_corrs = compute_all_corrs(results, n_bootstraps=100, rng=0)
+    r_val, p_val = spearmanr(data[:, 0], data[:, 2])
+    assert np.isclose(all_corrs['m0']['m2'][0], r_val)
+    assert np.isclose(all_corrs['m2']['m0'][1], p_val)
+
+    all_corrs = compute_all_corrs(results, corr_func=spearmanr)
+    assert isinstance(all_corrs, dict)
+    assert np.isclose(all_corrs['m0']['m2'][0], r_val)
+
+
+def _spearman_diffs(data, feature):
+    """Compute differences between the Spearman correlations of each measure to a feature."""
+
+    r_vals = np.array([spearmanr(vals, feature)[0] for vals in data.T])
+
+    return r_vals[:, np.newaxis] - r_vals[np.newaxis, :]
+
+
+def test_bootstrap_diff_matrix(data, monkeypatch):
+
+    feature = data.sum(axis=1) + np.random.default_rng(1).standard_normal(N_OBS)
+
+    recorded = _record_resamples(monkeypatch, '_diffs_block')
+    diffs, p_vals, cis = bootstrap_diff_matrix(data, feature, n_bootstraps=200, rng=0)
+
+    assert np.allclose(diffs, _spearman_diffs(data, feature))
+
+    # Confidence intervals are percentiles of the differences across the resamples
+    boots = np.array([_spearman_diffs(data[resample], feature[resample]) \
+        for resample in np.concatenate(recorded)])
+    assert np.allclose(_off_diag(cis), _off_diag(np.percentile(boots, [2.5, 97.5], axis=0)))
+
+    # Results are antisymmetric, with the row measure minus the column measure
+    assert np.allclose(diffs, -diffs.T)
+    assert np.allclose(cis[0], -cis[1].T, equal_nan=True)
+    assert np.allclose(p_vals, p_vals.T, equal_nan=True)
+
+
+def test_compute_diffs_to_feature(data):
+
+    feature = data.sum(axis=1)
+    results = {'m' + str(ind) : data[:, ind] for ind in range(N_MEAS)}
+
+    all_diffs = compute_diffs_to_feature(results, feature, n_bootstraps=100, rng=0)
+    expected = spearmanr(data[:, 0], feature)[0] - spearmanr(data[:, 2], feature)[0]
+    assert np.isclose(all_diffs['m0']['m2'][0], expected)
+    assert np.isclose(all_diffs['m2']['m0'][0], -expected)
+
+    ci_low, ci_high = all_diffs['m0']['m2'][2]
+    assert np.allclose(all_diffs['m2']['m0'][2], (-ci_high, -ci_low))
+
+
+def _reg_var_sklearn(var, control):
+    """Compute residuals with LinearRegression, as in the original `compute_reg_var`."""
+
+    vals = var.reshape(len(var), -1)
+    cont = control.reshape(len(control), -1)
+
+    return vals - LinearRegression().fit(cont, vals).predict(cont)
+
+
+@pytest.mark.parametrize('n_obs, n_conts', [(50, 1), (50, 3), (3, 5)])
+def test_compute_reg_var(n_obs, n_conts):
+
+    rng = np.random.default_rng(0)
+    var = rng.standard_normal([n_obs, 2])
+    control = rng.standard_normal([n_obs, n_conts])
+
+    assert np.allclose(compute_reg_var(var, control), _reg_var_sklearn(var, control))
+    assert np.allclose(compute_reg_var(var[:, 0], control[:, 0]),
+                       _reg_var_sklearn(var[:, 0], control[:, 0]))
+
+
+def test_compute_reg_var_rank_deficient():
+
+    vals = np.arange(10, dtype=float)
+
+    # A constant control is collinear with the intercept, so only the mean is removed
+    residuals = compute_reg_var(vals, np.ones(10))
+    assert np.allclose(residuals[:, 0], vals - vals.mean())
+
+    control = np.column_stack([np.linspace(0, 1, 10) ** 2, np.ones(10)])
+    assert np.allclose(compute_reg_var(vals, control), _reg_var_sklearn(vals, control))
+
+
+def test_compute_reg_var_nans():
+
+    rng = np.random.default_rng(0)
+    var = rng.standard_normal([20, 2])
+    control = rng.standard_normal(20)
+    var[3, 0], control[7] = np.nan, np.nan
+
+    residuals = compute_reg_var(var, control)
+
+    for ind in range(var.shape[1]):
+        mask = ~np.isnan(var[:, ind]) & ~np.isnan(control)
+        assert np.all(np.isnan(residuals[~mask, ind]))
+        assert np.allclose(residuals[mask, ind],
+                           _reg_var_sklearn(var[mask, ind], control[mask])[:, 0])
@@ -0,0 +1,98 @@
+"""Tests for loading empirical data."""
+
+import numpy as np
+import pytest
+
+from scipy.io import savemat
+
+from apm.io.data import load_eeg_demo_data, get_patient_info
+
+###################################################################################################
+###################################################################################################
+
+def _save_files(folder, arrays):
+    """Save a set of arrays as .mat files, returning the file names."""
+
+    files = []
+    for ind, array in enumerate(arrays):
+        files.append('sub' + str(ind) + '.mat')
+        savemat(folder / files[-1], {'data' : array, 'other' : np.zeros(3)})
+
+    return files
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+@pytest.mark.parametrize('source', ['float64', 'float32', 'int16'])
+def test_load_eeg_demo_data(tmp_path, n_jobs, source):
+
+    arrays = [np.arange(12).reshape(3, 4).astype(source) + ind for ind in range(3)]
+    files = _save_files(tmp_path, arrays)
+
+    data = load_eeg_demo_data(files, tmp_path, 'data', n_jobs=n_jobs)
+    assert data.dtype == source
+    assert np.array_equal(data, np.stack(arrays))
+
+    data = load_eeg_demo_data(files, tmp_path, 'data', n_jobs=n_jobs, dtype='float64')
+    assert data.dtype == 'float64'
+    assert np.array_equal(data, np.stack(arrays))
+
+
+def test_load_eeg_demo_data_ragged(tmp_path):
+
+    arrays = [np.ones([2, 4], dtype='int16'), np.ones([2, 3], dtype='int16')]
+    files = _save_files(tmp_path, arrays)
+
+    # Padding with NaN promotes integer data to float
+    data = load_eeg_demo_data(files, tmp_path, 'data')
+    assert data.dtype == 'float32' and data.shape == (2, 2, 4)
+    assert np.all(np.isnan(data[1, :, 3])) and np.all(data[1, :, :3] == 1)
+
+    data = load_eeg_demo_data(files, tmp_path, 'data', pad=False)
+    assert [array.dtype for array in data] == ['int16', 'int16']
+    assert [array.shape for array in data] == [(2, 4), (2, 3)]
+
+
+def test_load_eeg_demo_data_field(tmp_path):
+
+    files = _save_files(tmp_path, [np.ones([2, 3])])
+
+    with pytest.raises(KeyError, match='missing'):
+        load_eeg_demo_data(files, tmp_path, 'missing')
+
+
+@pytest.fixture
+def ieeg_info():
+
+    pd = pytest.importorskip('pandas')
+
+    ch_info = pd.DataFrame({'Channel name' : ['A1', 'A2', 'B1', 'C1'],
+                            'Patient' : [1, 1, 2, 3]})
+    patient_info = pd.DataFrame({'ID' : [1, 2], 'Age at time of study' : [30., 45.]})
+
+    return ch_info, patient_info
+
+
+def test_get_patient_info(ieeg_info):
+
+    patients, ages = get_patient_info(['B1', 'A1', 'A2'], *ieeg_info)
+    assert patients.dtype == 'int64'
+    assert np.array_equal(patients, [2, 1, 1])
+    assert np.array_equal(ages, [45., 30., 30.])
+
+    with pytest.raises(ValueError, match='Channels'):
+        get_patient_info(['A1', 'D1'], *ieeg_info)
+    with pytest.raises(ValueError, match='Patients'):
+        get_patient_info(['A1', 'C1'], *ieeg_info)
+    with pytest.raises(ValueError, match='Missing'):
+        get_patient_info(['A1'], *ieeg_info, missing='skip')
+
+
+def test_get_patient_info_nan(ieeg_info):
+
+    patients, ages = get_patient_info(['B1', 'D1', 'C1'], *ieeg_info, missing='nan')
+
+    # Patient IDs are kept as integers, rather than being cast to float
+    assert patients.dtype == object
+    assert patients[0] == 2 and isinstance(patients[0], int)
+    assert patients[2] == 3 and np.isnan(patients[1])
+    assert ages[0] == 45. and np.all(np.isnan(ages[1:]))
@@ -0,0 +1,146 @@
+"""Tests for computing and comparing errors of aperiodic methods."""
+
+import numpy as np
+import pytest
+
+from scipy.stats import ranksums
+
+from apm.analysis.error import (ErrorAccumulator, calculate_errors, sqd_err,
+                                compute_error_metrics, compute_ranksums)
+from apm.analysis.results import cohens_d
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture(scope='module')
+def errors():
+
+    errors = np.random.default_rng(0).exponential(0.05, 1000)
+    errors[::50] = np.nan
+    errors[1::100] = 0.
+
+    return errors
+
+
+@pytest.mark.parametrize('error_func', [None, sqd_err])
+def test_calculate_errors(error_func):
+
+    rng = np.random.default_rng(0)
+    measures = {'m1' : rng.standard_normal(10), 'm2' : list(rng.standard_normal(10))}
+    kwargs = {'error_func' : error_func} if error_func else {}
+    error_func = error_func if error_func else (lambda vals, true: np.abs(vals - true))
+
+    errors = calculate_errors(measures, 0.5, **kwargs)
+    for label, values in measures.items():
+        assert np.allclose(errors[label], error_func(np.asarray(values), 0.5))
+
+    # Methods with different numbers of values are computed per method
+    measures['m3'] = rng.standard_normal(4)
+    errors = calculate_errors(measures, 0.5, **kwargs)
+    assert [len(vals) for vals in errors.values()] == [10, 10, 4]
+    for label, values in measures.items():
+        assert np.allclose(errors[label], error_func(np.asarray(values), 0.5))
+
+
+def test_compute_error_metrics(errors):
+
+    measured = np.stack([errors, errors[::-1] + 0.1])
+    metrics = compute_error_metrics(measured, 0.05)
+
+    for ind, values in enumerate(measured):
+        diffs = values[~np.isnan(values)] - 0.05
+        assert metrics['n'][ind] == len(diffs)
+        assert metrics['bias'][ind] == pytest.approx(np.mean(diffs))
+        assert metrics['mae'][ind] == pytest.approx(np.mean(np.abs(diffs)))
+        assert metrics['median_ae'][ind] == pytest.approx(np.median(np.abs(diffs)))
+        assert metrics['rmse'][ind] == pytest.approx(np.sqrt(np.mean(diffs ** 2)))
+
+
+def test_compute_ranksums():
+
+    rng = np.random.default_rng(0)
+    data = [rng.standard_normal(30), rng.standard_normal(25) + 0.5,
+            np.round(rng.standard_normal(40) * 2), np.full(10, np.nan)]
+    data[2][:3] = np.nan
+
+    stats, p_vals = compute_ranksums(data)
+
+    for ind1, vals1 in enumerate(data[:3]):
+        for ind2, vals2 in enumerate(data[:3]):
+            exp_stat, exp_p_val = ranksums(vals1, vals2, nan_policy='omit')
+            assert stats[ind1, ind2] == pytest.approx(exp_stat)
+            assert p_vals[ind1, ind2] == pytest.approx(exp_p_val)
+
+    # Distributions with no valid values give NaN results
+    assert np.all(np.isnan(stats[3])) and np.all(np.isnan(p_vals[:, 3]))
+
+
+def test_cohens_d():
+
+    rng = np.random.default_rng(0)
+    d1, d2 = rng.standard_normal([2, 3, 20])
+    d1[0, 4], d2[1, 7] = np.nan, np.nan
+
+    d_vals = cohens_d(d1, d2)
+    for row1, row2, d_val in zip(d1, d2, d_vals):
+        mask = ~np.isnan(row1) & ~np.isnan(row2)
+        row1, row2 = row1[mask], row2[mask]
+        expected = (row1.mean() - row2.mean()) / \
+            np.sqrt((row1.var(ddof=1) + row2.var(ddof=1)) / 2)
+        assert d_val == pytest.approx(expected)
+
+    assert np.isnan(cohens_d(d1, d2, nan_policy='propagate')[:2]).all()
+    with pytest.raises(ValueError):
+        cohens_d(d1, d2, nan_policy='raise')
+
+
+def test_error_accumulator(errors):
+
+    accumulator = ErrorAccumulator(thresholds=(0.025, 0.1)).add(errors)
+
+    assert accumulator.n_total == len(errors)
+    assert accumulator.count == np.sum(~np.isnan(errors))
+    assert accumulator.mean == pytest.approx(np.nanmean(errors))
+    assert accumulator.var == pytest.approx(np.nanvar(errors))
+    assert accumulator.std == pytest.approx(np.nanstd(errors))
+
+    for thresh in accumulator.thresholds:
+        assert accumulator.percent_threshold(thresh, 'below') == \
+            pytest.approx(np.sum(errors < thresh) / len(errors) * 100)
+        assert accumulator.percent_threshold(thresh, 'above') == \
+            pytest.approx(np.sum(errors > thresh) / len(errors) * 100)
+
+
+@pytest.mark.parametrize('quant', [0.1, 0.5, 0.9])
+def test_error_accumulator_quantile(errors, quant):
+
+    accumulator = ErrorAccumulator(rel_acc=0.01).add(errors)
+
+    # Estimates are within the relative accuracy of a value at the quantile's rank
+    valid = np.sort(errors[~np.isnan(errors)])
+    expected = valid[int(np.floor(quant * (len(valid) - 1)))]
+    assert accumulator.quantile(quant) == pytest.approx(expected, rel=0.01)
+
+
+def test_error_accumulator_merge(errors):
+
+    merged = ErrorAccumulator().add(errors[:300]) + ErrorAccumulator().add(errors[300:])
+    full = ErrorAccumulator().add(errors)
+
+    assert merged.n_total == full.n_total and merged.count == full.count
+    assert merged.mean == pytest.approx(full.mean)
+    assert merged.m2 == pytest.approx(full.m2)
+    assert merged.median() == full.median()
+    assert merged.n_below == full.n_below
+
+    with pytest.raises(ValueError):
+        ErrorAccumulator(thresholds=(0.1,)).merge(full)
+
+
+def test_error_accumulator_empty():
+
+    accumulator = ErrorAccumulator()
+
+    assert np.isnan(accumulator.var)
+    assert np.isnan(accumulator.median())
+    assert np.isnan(accumulator.percent_threshold(0.025))
@@ -0,0 +1,61 @@
+"""Tests for fitting power spectra with multiple methods."""
+
+import numpy as np
+import pytest
+
+from apm.methods.fit import SpectralFits
+
+###################################################################################################
+###################################################################################################
+
+def _make_fits(n_errors=50, keep_errors=True):
+    """Make a SpectralFits object, with random errors set for each method."""
+
+    fits = SpectralFits(keep_errors=keep_errors)
+    rng = np.random.default_rng(0)
+    fits.errors = {label : rng.exponential(0.05, n_errors) for label in fits.labels}
+
+    return fits
+
+
+def test_spectral_fits_errors_read_only():
+
+    fits = _make_fits()
+
+    with pytest.raises(ValueError):
+        fits.errors['OLS'][0] = 1.
+    with pytest.raises(TypeError):
+        fits.errors['OLS'] = np.zeros(10)
+
+    # Setting errors updates the summaries
+    errors = {label : np.full(10, 0.01) for label in fits.labels}
+    fits.errors = errors
+    assert fits.accumulators['OLS'].n_total == 10
+    assert fits.compute_avg_errors('mean')[0][0] == pytest.approx(0.01)
+
+    # Errors are copied when set, such that the input can still be changed
+    errors['OLS'][0] = 1.
+    assert fits.errors['OLS'][0] == 0.01
+
+
+def test_spectral_fits_merge():
+
+    fits1, fits2 = _make_fits(20), _make_fits(30)
+    merged = fits1 + fits2
+
+    assert len(merged) == 50
+    for label in merged.labels:
+        expected = np.concatenate([fits1.errors[label], fits2.errors[label]])
+        assert np.array_equal(merged.errors[label], expected)
+        assert merged.accumulators[label].mean == pytest.approx(np.mean(expected))
+        assert merged.accumulators[label].std == pytest.approx(np.std(expected))
+
+
+def test_spectral_fits_empty():
+
+    fits = SpectralFits()
+
+    assert len(fits) == 0
+    assert all(np.isnan(val) for val, _ in fits.compute_threshold(0.025))
+    assert all(np.isnan(val) for val, _ in fits.compute_threshold(0.1))
+    assert all(np.isnan(val) for val, _ in fits.compute_avg_errors('mean'))
@@ -0,0 +1,54 @@
+"""Tests for lazy loading of heavy dependencies, and of public names."""
+
+import ast
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+###################################################################################################
+###################################################################################################
+
+# Modules that should not be loaded by importing the sub-packages
+HEAVY_MODULES = ['antropy', 'neurokit2', 'fooof', 'mne', 'pandas', 'matplotlib']
+
+# Code to run in a fresh interpreter, reporting the loaded heavy modules
+IMPORT_CODE = """
+import sys, json
+import apm.run, apm.methods, apm.io, apm.plts
+print(json.dumps({{'loaded' : [mod for mod in {} if mod in sys.modules]}}))
+""".format(HEAVY_MODULES)
+
+###################################################################################################
+###################################################################################################
+
+def test_import_lazy():
+
+    output = subprocess.run([sys.executable, '-c', IMPORT_CODE], capture_output=True,
+                            text=True, check=True, cwd=Path(__file__).parents[2])
+    report = json.loads(output.stdout.strip().splitlines()[-1])
+
+    assert report['loaded'] == []
+
+
+def test_wrappers_names():
+
+    from apm.methods import _WRAPPERS
+    from apm.methods import wrappers
+
+    # Collect the public functions and constants defined in the wrappers module
+    with open(wrappers.__file__) as wrappers_file:
+        tree = ast.parse(wrappers_file.read())
+    names = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+    names += [target.id for node in tree.body if isinstance(node, ast.Assign) \
+        for target in node.targets if isinstance(target, ast.Name)]
+
+    assert sorted(_WRAPPERS) == sorted(name for name in names if not name.startswith('_'))
+
+
+def test_plts_names():
+
+    import apm.plts
+
+    for name in apm.plts.__all__:
+        assert callable(getattr(apm.plts, name))
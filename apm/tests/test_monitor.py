@@ -0,0 +1,68 @@
+"""Tests for monitoring of simulation runs."""
+
+import numpy as np
+import pytest
+
+from apm.run.monitor import RunMonitor, make_record, apply_measures
+from apm.run.sims import run_sims
+
+###################################################################################################
+###################################################################################################
+
+def _spectrum(sig, fail=False):
+    """Measure that returns more than one value, or fails."""
+
+    if fail or sig[0] > 0:
+        raise ValueError('Measure failed.')
+
+    return np.array([sig.mean(), sig.std(), sig.max()])
+
+
+def test_apply_measures():
+
+    record = make_record('test')
+    outputs = apply_measures(np.zeros(10), {np.mean : {}, _spectrum : {}}, record)
+    assert outputs[0] == 0. and np.array_equal(outputs[1], np.zeros(3))
+
+    with pytest.raises(ValueError):
+        apply_measures(np.zeros(10), {_spectrum : {'fail' : True}}, record)
+
+
+def test_apply_measures_errors():
+
+    # Without a known shape, a failed measure gives a single NaN
+    record = make_record('test')
+    output = apply_measures(np.zeros(10), {_spectrum : {'fail' : True}}, record, True)[0]
+    assert np.isnan(output) and np.ndim(output) == 0
+    assert '_spectrum' in record['errors'] and '_spectrum' in record['measure_times']
+
+    # With a known shape, from a prior call or as given, a failed measure is filled with NaN
+    shapes = {}
+    apply_measures(np.zeros(10), {_spectrum : {}}, make_record('test'), True, shapes)
+    output = apply_measures(np.ones(10), {_spectrum : {}}, make_record('test'), True, shapes)[0]
+    assert output.shape == (3,) and np.all(np.isnan(output))
+
+    output = apply_measures(np.ones(10), {_spectrum : {}}, make_record('test'), True,
+                            {_spectrum : (5,)})[0]
+    assert output.shape == (5,) and np.all(np.isnan(output))
+
+
+def _sim_step(n_seconds, fs, value):
+    """Simulate a constant signal."""
+
+    return np.full(int(n_seconds * fs), value, dtype=float)
+
+
+def test_run_sims_errors():
+
+    pytest.importorskip('neurodsp')
+
+    # Measures fail for positive values, including the first simulation
+    sim_params = [{'n_seconds' : 1, 'fs' : 10, 'value' : value} for value in [1., -1.]]
+    monitor = RunMonitor()
+    results = run_sims(_sim_step, sim_params, _spectrum, {}, n_sims=2, outsize=3,
+                       monitor=monitor)
+
+    assert results.shape == (2, 2, 3)
+    assert np.all(np.isnan(results[0])) and np.all(results[1] == [-1., 0., -1.])
+    assert len(monitor.records) == 4
@@ -0,0 +1,88 @@
+"""Tests for running simulations in parallel, in blocks across a pool."""
+
+from time import sleep
+
+import numpy as np
+
+import apm.run.parallel as parallel
+from apm.run.monitor import RunMonitor
+from apm.run.parallel import run_blocks, close_pool
+
+###################################################################################################
+###################################################################################################
+
+# Time, in seconds, of the first call of the simulation function in each process
+START_TIME = 0.5
+
+# Whether the simulation function has been called in the current process
+_STARTED = False
+
+###################################################################################################
+###################################################################################################
+
+def _sim_func(value):
+    """Simulate a signal, with a start-up cost on the first call in each process."""
+
+    global _STARTED
+
+    if not _STARTED:
+        sleep(START_TIME)
+        _STARTED = True
+
+    return np.full(10, value, dtype=float)
+
+
+def test_run_blocks(monkeypatch):
+
+    task_times = []
+    def pick_chunksize(task_time, n_tasks, n_jobs):
+        task_times.append(task_time)
+        return 3
+    monkeypatch.setattr(parallel, 'pick_chunksize', pick_chunksize)
+
+    close_pool()
+    sim_params = [{'value' : value} for value in range(4)]
+    outputs = run_blocks(_sim_func, sim_params, {np.mean : {}, np.sum : {}}, n_sims=5,
+                         n_jobs=2)
+    close_pool()
+
+    # The pilot timing excludes the start-up cost of each worker
+    assert task_times[0] < START_TIME / 2
+
+    expected = np.repeat(np.arange(4), 5)
+    assert np.array_equal(outputs[0], expected)
+    assert np.array_equal(outputs[1], 10 * expected)
+
+
+def test_run_blocks_empty():
+
+    outputs = run_blocks(_sim_func, [], {np.mean : {}}, n_sims=5, n_jobs=2)
+    assert len(outputs) == 1 and outputs[0].size == 0
+
+
+def _sim_value(value):
+    """Simulate a constant signal."""
+
+    return np.full(10, value, dtype=float)
+
+
+def _multi_measure(sig):
+    """Measure that returns more than one value, and fails for positive values."""
+
+    if sig[0] > 0:
+        raise ValueError('Measure failed.')
+
+    return np.array([sig[0], 2 * sig[0]])
+
+
+def test_run_blocks_errors():
+
+    # Failures occur before the first success in a block, and across whole blocks
+    sim_params = [{'value' : value} for value in [1., 1., -1., 1., -2.]]
+    outputs = run_blocks(_sim_value, sim_params, {_multi_measure : {}, np.mean : {}}, n_sims=2,
+                         n_jobs=2, chunksize=3, monitor=RunMonitor())
+
+    assert outputs[0].shape == (10, 2) and outputs[1].shape == (10,)
+    assert np.all(np.isnan(outputs[0][[0, 1, 2, 3, 6, 7]]))
+    assert np.array_equal(outputs[0][[4, 5, 8, 9], 0], [-1., -1., -2., -2.])
+    assert np.array_equal(outputs[1], np.repeat([1., 1., -1., 1., -2.], 2))
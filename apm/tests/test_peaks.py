@@ -0,0 +1,44 @@
+"""Tests for simulating peaks."""
+
+import numpy as np
+import pytest
+
+from apm.sim.peaks import gen_peak_defs, unpack_peak_defs, CF_OPTS, PW_OPTS, BW_OPTS
+
+###################################################################################################
+###################################################################################################
+
+@pytest.mark.parametrize('n_peaks', [None, 0, 3])
+@pytest.mark.parametrize('window', [1, 4])
+def test_gen_peak_defs(n_peaks, window):
+
+    peaks, counts = gen_peak_defs(200, n_peaks, window=window, rng=0)
+
+    if n_peaks is not None:
+        assert np.all(counts == n_peaks)
+    assert peaks.shape == (200, counts.max(initial=0), 3)
+
+    for cur_peaks in unpack_peak_defs(peaks, counts):
+        cfs = np.array([peak[0] for peak in cur_peaks])
+        assert np.all(np.isin(cfs, CF_OPTS))
+        assert np.all(np.isin([peak[1] for peak in cur_peaks], PW_OPTS))
+        assert np.all(np.isin([peak[2] for peak in cur_peaks], BW_OPTS))
+
+        # Center frequencies are spaced by more than the window
+        diffs = np.abs(cfs[:, np.newaxis] - cfs[np.newaxis, :])
+        assert np.all(diffs[~np.eye(len(cfs), dtype=bool)] > window)
+
+    assert np.all(np.isnan(peaks[np.arange(peaks.shape[1]) >= counts[:, np.newaxis]]))
+
+
+def test_gen_peak_defs_exhausted():
+
+    # A window larger than the range of center frequencies only allows one peak
+    window = CF_OPTS.max() - CF_OPTS.min()
+    peaks, counts = gen_peak_defs(10, 1, window=window, rng=0)
+    assert np.all(counts == 1) and not np.any(np.isnan(peaks))
+
+    with pytest.raises(ValueError):
+        gen_peak_defs(10, 2, window=window, rng=0)
+    with pytest.raises(ValueError):
+        gen_peak_defs(100, None, window=window, rng=0)
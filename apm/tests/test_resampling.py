@@ -0,0 +1,100 @@
+"""Tests for the block-based resampling engine."""
+
+from functools import partial
+
+import numpy as np
+import pytest
+
+from apm.run.parallel import close_pool
+from apm.analysis.resampling import run_resamples
+
+###################################################################################################
+###################################################################################################
+
+N_OBS = 30
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture(scope='module')
+def data():
+
+    rng = np.random.default_rng(0)
+
+    # Measures with a clear positive effect, a borderline effect, and no effect
+    return rng.standard_normal([N_OBS, 3]) + np.array([2., 0.4, 0.])
+
+
+def _mean_block(resamples, active, data=None, recorded=None):
+    """Compute the mean of each measure, for each resample in a block."""
+
+    if recorded is not None:
+        recorded.append(resamples)
+
+    return data[resamples].mean(axis=1)
+
+
+def test_run_resamples_bootstrap(data):
+
+    recorded = []
+    block_func = partial(_mean_block, data=data, recorded=recorded)
+    results = run_resamples(block_func, N_OBS, (3,), n_resamples=500, block_size=64, rng=0)
+
+    resamples = np.concatenate(recorded)
+    assert resamples.shape == (500, N_OBS)
+    assert np.all(results['n_resamples'] == 500)
+
+    # Results match percentiles and tail fractions across the recorded resamples
+    stats = data[resamples].mean(axis=1)
+    assert np.allclose(results['cis'], np.percentile(stats, [2.5, 97.5], axis=0))
+    expected = np.minimum(2 * np.minimum(np.mean(stats <= 0, 0), np.mean(stats >= 0, 0)), 1)
+    assert np.allclose(results['p_vals'], expected)
+    assert np.all(results['ci_errors'] >= 0) and np.all(results['p_errors'] > 0)
+
+
+def test_run_resamples_permutation(data):
+
+    recorded = []
+    block_func = partial(_mean_block, data=data - data.mean(axis=0), recorded=recorded)
+    observed = np.array([1., 0.1, 0.])
+    results = run_resamples(block_func, N_OBS, (3,), kind='permutation', observed=observed,
+                            n_resamples=200, block_size=64, rng=0)
+
+    # Each resample is a permutation of the observations
+    resamples = np.concatenate(recorded)
+    assert np.all(np.sort(resamples, axis=1) == np.arange(N_OBS))
+
+    stats = (data - data.mean(axis=0))[resamples].mean(axis=1)
+    expected = (np.sum(np.abs(stats) >= np.abs(observed), axis=0) + 1) / (len(stats) + 1)
+    assert np.allclose(results['p_vals'], expected)
+    assert results['cis'] is None and results['ci_errors'] is None
+
+    with pytest.raises(ValueError):
+        run_resamples(block_func, N_OBS, (3,), kind='permutation')
+    with pytest.raises(ValueError):
+        run_resamples(block_func, N_OBS, (3,), kind='jackknife')
+
+
+def test_run_resamples_n_jobs(data):
+
+    block_func = partial(_mean_block, data=data)
+    results = run_resamples(block_func, N_OBS, (3,), n_resamples=300, block_size=50, rng=0)
+    results_par = run_resamples(block_func, N_OBS, (3,), n_resamples=300, block_size=50,
+                                n_jobs=2, rng=0)
+    close_pool()
+
+    for label in ['p_vals', 'cis', 'n_resamples']:
+        assert np.array_equal(results[label], results_par[label])
+
+
+def test_run_resamples_early_stop(data):
+
+    block_func = partial(_mean_block, data=data)
+    full = run_resamples(block_func, N_OBS, (3,), n_resamples=2000, block_size=100, rng=0)
+    results = run_resamples(block_func, N_OBS, (3,), n_resamples=2000, block_size=100,
+                            early_stop=True, rng=0)
+
+    # The clear effect stops at the minimum number of resamples, and decisions match
+    assert results['n_resamples'][0] == 100
+    assert np.all(results['n_resamples'] <= 2000)
+    assert np.array_equal(results['p_vals'] < 0.05, full['p_vals'] < 0.05)
@@ -0,0 +1,64 @@
+"""Tests for the chunked results store."""
+
+import numpy as np
+import pytest
+
+from apm.io.store import ResultsStore, ResultsRef, save_results, load_results
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture
+def results():
+
+    rng = np.random.default_rng(0)
+
+    return {'exp' : rng.standard_normal([6, 4]), 'lz' : rng.standard_normal(6)}
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_results_store(tmp_path, results, compress):
+
+    store = save_results(results, 'store', tmp_path, compress=compress, metadata={'fs' : 500})
+    store.append({label : values[:2] for label, values in results.items()}, compress=compress)
+
+    loaded = load_results('store', tmp_path)
+    assert store.measures == ['exp', 'lz']
+    assert store.shape('exp') == (8, 4)
+    assert store.metadata == {'fs' : 500}
+    for label, values in results.items():
+        assert np.array_equal(loaded[label], np.concatenate([values, values[:2]]))
+
+    # Selections can span chunks, and keep the order of the selected indices
+    inds = np.array([7, 0, 5, 6])
+    expected = np.concatenate([results['exp'], results['exp'][:2]])[inds, 1]
+    assert np.array_equal(store.load_measure('exp', (inds, 1)), expected)
+    assert np.array_equal(store.load_measure('exp', 3), results['exp'][3])
+    assert store.load_measure('lz', slice(0, 0)).shape == (0,)
+
+
+def test_results_store_append_mismatch(tmp_path, results):
+
+    store = save_results(results, 'store', tmp_path)
+    index = store.path.joinpath('index.json').read_text()
+    files = sorted(store.path.rglob('*'))
+
+    # A mismatched measure raises before any measure is written
+    with pytest.raises(ValueError):
+        store.append({'new' : np.zeros(2), 'lz' : np.zeros(2), 'exp' : np.zeros([2, 3])})
+
+    assert sorted(store.path.rglob('*')) == files
+    assert store.path.joinpath('index.json').read_text() == index
+    assert 'new' not in ResultsStore(store.path) and 'new' not in store
+
+
+def test_results_ref(tmp_path, results):
+
+    store = save_results(results, 'store', tmp_path)
+
+    ref = store.ref('exp', select=2)
+    assert isinstance(ref, ResultsRef)
+    assert np.array_equal(ref.load(), results['exp'][2])
+
+    loaded = store.ref(['exp', 'lz'], select=slice(1, 3)).load()
+    assert np.array_equal(loaded['lz'], results['lz'][1:3])
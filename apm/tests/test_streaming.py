@@ -0,0 +1,82 @@
+"""Tests for streaming estimators, against the batch wrappers applied to all samples."""
+
+import numpy as np
+import pytest
+
+from scipy.signal import welch
+
+from apm.methods.wrappers import autocorr
+from apm.methods.streaming import StreamAutocorr, StreamExponent, StreamPermEntropy
+
+###################################################################################################
+###################################################################################################
+
+N_CHS = 2
+N_SAMPLES = 600
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture(scope='module')
+def sigs():
+
+    return np.cumsum(np.random.default_rng(0).standard_normal([N_CHS, N_SAMPLES]), axis=1)
+
+
+def _stream(estimator, sigs, block_size):
+    """Update a streaming estimator with a signal, in blocks."""
+
+    for start in range(0, sigs.shape[1], block_size):
+        estimator.update(sigs[:, start:start + block_size])
+
+    return estimator
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 50, N_SAMPLES])
+@pytest.mark.parametrize('max_lag, lag_step', [(0, 1), (20, 1), (30, 3)])
+def test_stream_autocorr(sigs, block_size, max_lag, lag_step):
+
+    estimator = _stream(StreamAutocorr(N_CHS, max_lag, lag_step), sigs, block_size)
+
+    expected = [autocorr(sig, max_lag=max_lag, lag_step=lag_step) for sig in sigs]
+    assert np.allclose(estimator.estimate(), expected)
+
+
+def test_stream_autocorr_short():
+
+    estimator = StreamAutocorr(N_CHS, max_lag=10)
+    estimator.update(np.ones([N_CHS, 5]))
+    assert np.all(np.isnan(estimator.estimate()))
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 4, 50, N_SAMPLES])
+@pytest.mark.parametrize('order, delay', [(3, 1), (3, 2), (4, 3)])
+@pytest.mark.parametrize('normalize', [False, True])
+def test_stream_perm_entropy(sigs, block_size, order, delay, normalize):
+
+    from antropy import perm_entropy
+
+    estimator = StreamPermEntropy(N_CHS, order, delay, normalize)
+    estimator = _stream(estimator, sigs, block_size)
+
+    expected = [perm_entropy(sig, order=order, delay=delay, normalize=normalize) \
+        for sig in sigs]
+    assert np.allclose(estimator.estimate(), expected)
+
+
+@pytest.mark.parametrize('block_size', [13, 100, N_SAMPLES])
+def test_stream_exponent(sigs, block_size):
+
+    fs = 100
+    estimator = _stream(StreamExponent(N_CHS, fs, [2, 40]), sigs, block_size)
+
+    freqs, powers = estimator.spectrum()
+    exp_freqs, exp_powers = welch(sigs, fs, nperseg=fs, noverlap=fs // 8, axis=-1)
+    assert np.allclose(freqs, exp_freqs)
+    assert np.allclose(powers, exp_powers)
+
+    # Exponents match a line fit in log-log space, with the sign flipped
+    f_mask = (freqs >= 2) & (freqs <= 40)
+    expected = [-np.polyfit(np.log10(freqs[f_mask]), np.log10(pows[f_mask]), 1)[0] \
+        for pows in exp_powers]
+    assert np.allclose(estimator.estimate(), expected)
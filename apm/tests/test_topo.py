@@ -0,0 +1,91 @@
+"""Tests for topography interpolation, against MNE."""
+
+import warnings
+
+import numpy as np
+import pytest
+
+import mne
+from mne.utils.check import _check_sphere
+from mne.channels.layout import _find_topomap_coords
+from mne.viz.topomap import _setup_interp
+
+from apm.plts.topo import TopoInterp, get_topo_pos, get_topo_interp, clear_topo_cache
+
+###################################################################################################
+###################################################################################################
+
+@pytest.fixture(params=['standard_1020', 'biosemi64', 'GSN-HydroCel-129'])
+def info(request):
+
+    # Some montage names, such as 'standard_1020', are deprecated in recent versions of MNE
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        montage = mne.channels.make_standard_montage(request.param)
+
+    # Drop channels with duplicate positions, which MNE does not plot
+    positions = montage.get_positions()['ch_pos']
+    _, inds = np.unique(np.round(list(positions.values()), 6), axis=0, return_index=True)
+    info = mne.create_info([montage.ch_names[ind] for ind in np.sort(inds)], 250, 'eeg')
+    info.set_montage(montage)
+
+    return info
+
+
+@pytest.mark.parametrize('sphere', [None, 0.1, 'auto'])
+def test_get_topo_pos(info, sphere):
+
+    pos, sphere_out = get_topo_pos(info, sphere)
+
+    expected_sphere = _check_sphere(sphere, info)
+    assert np.allclose(sphere_out, expected_sphere)
+    assert np.allclose(pos, _find_topomap_coords(info, picks=None, sphere=expected_sphere))
+
+
+@pytest.mark.parametrize('method', ['cubic', 'linear'])
+def test_topo_interp(info, method):
+
+    pos, sphere = get_topo_pos(info)
+    topo = TopoInterp(pos, sphere, method=method)
+
+    values = np.random.default_rng(0).standard_normal([len(pos), 3])
+
+    extent, xx, yy, interp = _setup_interp(pos, 64, method, 'head', topo.outlines, 'mean')
+    expected = np.stack([interp.set_values(vals).set_locations(xx, yy)() \
+        for vals in values.T], axis=-1)
+
+    assert topo.extent == extent
+
+    # The first single set is interpolated directly, and later sets with the matrix
+    for ind in range(values.shape[1]):
+        image = topo.interpolate(values[:, ind], mask=False)
+        assert np.allclose(image, expected[..., ind], atol=1e-6, equal_nan=True)
+
+    image = topo.interpolate(values, mask=False)
+    assert np.allclose(image, expected, atol=1e-6, equal_nan=True)
+
+
+def test_topo_interp_nans(info):
+
+    pos, sphere = get_topo_pos(info)
+    topo = TopoInterp(pos, sphere)
+
+    values = np.random.default_rng(0).standard_normal([len(pos), 2])
+    values[[0, 5], 1] = np.nan
+
+    image = topo.interpolate(values)
+    assert not np.isnan(image[topo.mask]).any()
+
+    valid = ~np.isnan(values[:, 1])
+    expected = TopoInterp(pos[valid], sphere).interpolate(values[valid, 1])
+    assert np.allclose(image[..., 1], expected, atol=1e-6, equal_nan=True)
+
+
+def test_get_topo_interp(info):
+
+    clear_topo_cache()
+    topo = get_topo_interp(info)
+    assert get_topo_interp(info) is topo
+    assert get_topo_interp(info, res=32) is not topo
+    assert get_topo_interp(info, sphere=0.1) is not topo
+    clear_topo_cache()
@@ -46,3 +46,34 @@ def select_vals(select, *arrays):
         arrays = [arr[select] for arr in arrays]
 
     return arrays
+
+
+def make_windows(data, win_len, step):
+    """Make sliding windows across the last axis of an array, as a strided view.
+
+    Parameters
+    ----------
+    data : ndarray
+        Data to window, with time as the last axis, such as [channels, timepoints].
+    win_len : int
+        Window length, in samples.
+    step : int
+        Step between the starts of consecutive windows, in samples.
+
+    Returns
+    -------
+    windows : ndarray
+        Read-only view of the data, organized as [..., n_windows, win_len].
+
+    Notes
+    -----
+    Windows are views into the input data, and are not copied. Window `ind`
+    starts at sample `ind * step`. Any samples after the last full window are dropped.
+    """
+
+    if win_len > data.shape[-1]:
+        raise ValueError('Window length is longer than the data.')
+
+    windows = np.lib.stride_tricks.sliding_window_view(data, win_len, axis=-1)
+
+    return windows[..., ::step, :]
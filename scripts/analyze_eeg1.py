@@ -13,7 +13,7 @@ from neurodsp.spectral import compute_spectrum
 # Import custom code
 import sys
 sys.path.append(str(Path('..').resolve()))
-from apm.io import APMDB, save_pickle
+from apm.io import APMDB, save_pickle, save_results
 from apm.io.data import load_eeg_demo_group_data
 from apm.analysis import (compute_avgs, compute_all_corrs,
                           compute_corrs_to_feature, compute_diffs_to_feature)
@@ -88,15 +88,21 @@ def main():
     # Compute measures of interest on the EEG1 dataset
     results = run_group_measures(data, MEASURES)
 
+    # Compute power spectra, one subject at a time
+    powers = []
+    for subj_data in data:
+        freqs, subj_powers = compute_spectrum(np.asarray(subj_data), **PSD_SETTINGS)
+        powers.append(subj_powers)
+    powers = np.array(powers)
+
     # Run specparam
-    freqs, powers = compute_spectrum(data, **PSD_SETTINGS)
     fg = FOOOFGroup(**SPECPARAM_SETTINGS)
     fgs = fit_fooof_3d(fg, freqs, powers, FIT_RANGE)
     for ind, fg in enumerate(fgs):
         fg.save('eeg1_specparam_' + str(ind).zfill(2), OUTPATH / 'specparam', save_results=True)
     results['specparam'] = np.array([cfg.get_params('aperiodic', 'exponent') for cfg in fgs])
 
-    save_pickle(results, 'eeg1_results', OUTPATH)
+    save_results(results, 'eeg1_results', OUTPATH)
 
     ## PEAK MEASURES
 
@@ -107,7 +113,7 @@ def main():
             results_peaks['alpha_power'][s_ind, c_ind] = \
                 get_fm_peak_power(fg.get_fooof(c_ind), ALPHA_RANGE)
 
-    save_pickle(results_peaks, 'eeg1_results_peaks', OUTPATH)
+    save_results(results_peaks, 'eeg1_results_peaks', OUTPATH)
 
     ## SPATIAL MEASURES: APERIODIC
 
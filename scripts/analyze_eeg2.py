@@ -13,7 +13,8 @@ from neurodsp.spectral import compute_spectrum
 # Import custom code
 import sys
 sys.path.append(str(Path('..').resolve()))
-from apm.io import APMDB, save_pickle
+from apm.io import APMDB, save_pickle, save_results
+from apm.io.data import load_eeg_dev_group_data
 from apm.analysis import (compute_avgs, compute_all_corrs,
                           compute_corrs_to_feature, compute_diffs_to_feature)
 from apm.run import run_group_measures
@@ -76,24 +77,29 @@ def main():
 
     print('\nANALYZING GROUP EEG DATA...')
 
-    # Load data
-    data = np.load(DATA_FOLDER / 'MIPDB_extracted_block.npy')
-    data = np.squeeze(data[:, 0, :, :])
+    # Load data - memory-mapped, selecting the first condition
+    data = load_eeg_dev_group_data(DATA_FOLDER, condition=0)
 
     ## APERIODIC MEASURES
 
     # Compute results across the group
     results = run_group_measures(data, MEASURES)
 
+    # Compute power spectra, one subject at a time
+    powers = []
+    for subj_data in data:
+        freqs, subj_powers = compute_spectrum(np.asarray(subj_data), **PSD_SETTINGS)
+        powers.append(subj_powers)
+    powers = np.array(powers)
+
     # Run specparam
-    freqs, powers = compute_spectrum(data, **PSD_SETTINGS)
     fg = FOOOFGroup(**SPECPARAM_SETTINGS)
     fgs = fit_fooof_3d(fg, freqs, powers, FIT_RANGE)
     for ind, fg in enumerate(fgs):
         fg.save('eeg2_specparam_' + str(ind).zfill(2), OUTPATH / 'specparam', save_results=True)
     results['specparam'] = np.array([cfg.get_params('aperiodic', 'exponent') for cfg in fgs])
 
-    save_pickle(results, 'eeg2_results', OUTPATH)
+    save_results(results, 'eeg2_results', OUTPATH)
 
     ## PEAK MEASURES
 
@@ -104,7 +110,7 @@ def main():
             results_peaks['alpha_power'][s_ind, c_ind] = \
                 get_fm_peak_power(fg.get_fooof(c_ind), ALPHA_RANGE)
 
-    save_pickle(results_peaks, 'eeg2_results_peaks', OUTPATH)
+    save_results(results_peaks, 'eeg2_results_peaks', OUTPATH)
 
     ## SPATIAL MEASURES
 
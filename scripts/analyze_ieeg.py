@@ -16,7 +16,7 @@ from neurodsp.aperiodic.irasa import compute_irasa
 import sys
 sys.path.append(str(Path('..').resolve()))
 from apm.io.data import load_ieeg_all
-from apm.io import APMDB, get_files, save_pickle
+from apm.io import APMDB, get_files, save_pickle, save_results
 from apm.run import run_measures
 from apm.run.utils import set_measure_settings
 from apm.methods import fit_irasa_exp, fit_irasa_knee
@@ -56,6 +56,14 @@ FS = 200
 # Define max time to load
 MAX_TIME = 30
 
+## LOAD SETTINGS
+
+# Number of threads to use to load data files
+N_JOBS = 4
+
+# Settings for caching loaded data
+CACHEPATH = OUTPATH / 'cache'
+
 ## TS METHOD SETTINGS
 
 # Update sampling rate for time series methods
@@ -95,7 +103,8 @@ def main():
     files = get_files(DATA_FOLDER)
 
     # Load all ieeg data files
-    all_data = load_ieeg_all(files, DATA_FOLDER, MAX_TIME, exclude_files=NON_CORTICAL)
+    all_data = load_ieeg_all(files, DATA_FOLDER, MAX_TIME, exclude_files=NON_CORTICAL,
+                             n_jobs=N_JOBS, cache_path=CACHEPATH)
 
     ## APERIODIC MEASURES
 
@@ -149,7 +158,7 @@ def main():
     results['irasa_knee_freq'] = np.nan_to_num(np.array(knee_freqs_ir))
 
     # Save out results
-    save_pickle(results, 'ieeg_results', OUTPATH)
+    save_results(results, 'ieeg_results', OUTPATH)
 
     ## APERIODIC CORRELATIONS
 